@@ -0,0 +1,270 @@
+"""
+pbd_di 容器微基准测试。
+
+覆盖的场景：
+- 单例命中
+- 作用域实例命中与未命中
+- 不同深度、宽度的瞬时依赖图
+- replace_service 间接解析
+- injectable_extension 扩展的类
+- 大量 asyncio 任务并发解析
+
+用法：
+    python benchmarks/pbd_di/bench_container.py                      # 运行并与默认基线比较
+    python benchmarks/pbd_di/bench_container.py --save               # 运行并保存为默认基线
+    python benchmarks/pbd_di/bench_container.py -k transient         # 只运行名称包含 transient 的场景
+    python benchmarks/pbd_di/bench_container.py --baseline other.json --threshold 0.1 --fail-on-regression
+
+基线与运行机器相关，更换机器或 Python 版本后应重新保存。
+未安装工作区包 (uv sync) 时，直接从仓库根目录运行即可，脚本会使用 framework/*/src 下的源码。
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# 未安装工作区包时，使用仓库中的源码目录
+for _src in sorted((Path(__file__).resolve().parents[2] / "framework").glob("*/src"), reverse=True):
+    if str(_src) not in sys.path:
+        sys.path.insert(0, str(_src))
+
+from pbd_di import (
+    Container, ISingletonDependency, IScopedDependency, ITransientDependency,
+    IReplaceableInterface, replace_service, injectable_extension,
+)
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "default.json"
+
+Operation = Callable[[], Awaitable[Any]]
+# 场景：名称 -> 返回待测操作的异步工厂
+_cases: Dict[str, Callable[[Container], Awaitable[Operation]]] = {}
+
+
+def case(name: str):
+    """注册基准场景"""
+    def decorator(factory: Callable[[Container], Awaitable[Operation]]):
+        _cases[name] = factory
+        return factory
+    return decorator
+
+
+def _transient_chain(prefix: str, depth: int) -> type:
+    """创建深度为 depth 的瞬时依赖链，返回链头"""
+    dep = type(f"{prefix}0", (ITransientDependency,), {})
+    for level in range(1, depth):
+        dep = type(f"{prefix}{level}", (ITransientDependency,), {"_deps": [dep]})
+    return dep
+
+
+def _transient_fan(prefix: str, width: int) -> type:
+    """创建直接依赖 width 个瞬时依赖的服务"""
+    deps = [type(f"{prefix}Dep{index}", (ITransientDependency,), {}) for index in range(width)]
+    return type(f"{prefix}Root", (ITransientDependency,), {"_deps": deps})
+
+
+@case("singleton_hit")
+async def _singleton_hit(container: Container) -> Operation:
+    service = type("BenchSingleton", (ISingletonDependency,), {})
+    await container.get(service)
+    return lambda: container.get(service)
+
+
+@case("scoped_hit")
+async def _scoped_hit(container: Container) -> Operation:
+    service = type("BenchScopedHit", (IScopedDependency,), {})
+    # 在当前上下文中创建作用域实例，之后的解析都会命中
+    await container.get(service)
+    return lambda: container.get(service)
+
+
+@case("scoped_miss")
+async def _scoped_miss(container: Container) -> Operation:
+    service = type("BenchScopedMiss", (IScopedDependency,), {})
+
+    async def operation():
+        async with container.scope():
+            return await container.get(service)
+    return operation
+
+
+for _depth in (1, 5, 10):
+    def _make_depth(depth):
+        async def factory(container: Container) -> Operation:
+            root = _transient_chain(f"BenchDepth{depth}_", depth)
+            return lambda: container.get(root)
+        return factory
+    case(f"transient_depth_{_depth}")(_make_depth(_depth))
+
+for _width in (5, 20):
+    def _make_width(width):
+        async def factory(container: Container) -> Operation:
+            root = _transient_fan(f"BenchWidth{width}_", width)
+            return lambda: container.get(root)
+        return factory
+    case(f"transient_width_{_width}")(_make_width(_width))
+
+
+@case("replace_service")
+async def _replace_service(container: Container) -> Operation:
+    class IBenchReplaced(ITransientDependency, IReplaceableInterface):
+        pass
+
+    class BenchReplaced(IBenchReplaced):
+        pass
+
+    class BenchReplacement(ITransientDependency):
+        pass
+
+    replace_service(BenchReplacement, IBenchReplaced)
+    return lambda: container.get(IBenchReplaced)
+
+
+@case("injectable_extension")
+async def _injectable_extension(container: Container) -> Operation:
+    dep = type("BenchExtensionDep", (ITransientDependency,), {})
+    target = type("BenchExtended", (ITransientDependency,), {})
+
+    @injectable_extension(target, deps=[dep])
+    class BenchExtension:
+        def extra(self):
+            return self.get_dependency(dep)
+
+    return lambda: container.get(target)
+
+
+for _tasks in (100,):
+    def _make_concurrent(tasks):
+        async def factory(container: Container) -> Operation:
+            singleton = type(f"BenchConcurrentSingleton{tasks}", (ISingletonDependency,), {})
+            root = type(
+                f"BenchConcurrentRoot{tasks}", (ITransientDependency,),
+                {"_deps": [singleton, _transient_chain(f"BenchConcurrent{tasks}_", 3)]},
+            )
+            return lambda: asyncio.gather(*(container.get(root) for _ in range(tasks)))
+        return factory
+    case(f"concurrent_{_tasks}_tasks")(_make_concurrent(_tasks))
+
+
+async def _measure(operation: Operation, rounds: int, number: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        await operation()
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            await operation()
+        timings.append((time.perf_counter() - start) / number * 1e6)
+    return {
+        "median_us": statistics.median(timings),
+        "min_us": min(timings),
+        "mean_us": statistics.fmean(timings),
+        "stdev_us": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "rounds": rounds,
+        "number": number,
+    }
+
+
+async def run(names: List[str], rounds: int, number: int, warmup: int) -> Dict[str, Dict[str, Any]]:
+    """运行指定场景，返回 名称 -> 统计结果 (微秒/次)"""
+    container = Container()
+    results = {}
+    for name in names:
+        operation = await _cases[name](container)
+        results[name] = await _measure(operation, rounds, number, warmup)
+    await container.shutdown()
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> Tuple[List[str], List[str]]:
+    """
+    按中位数与基线比较。
+
+    :return: (报告行, 变慢超过 threshold 的场景)
+    """
+    lines = [f"{'场景':<26}{'基线(us)':>12}{'当前(us)':>12}{'变化':>10}"]
+    regressions = []
+    for name, result in results.items():
+        current = result["median_us"]
+        base = baseline.get(name)
+        if base is None:
+            lines.append(f"{name:<26}{'-':>12}{current:>12.2f}{'新增':>10}")
+            continue
+        change = current / base["median_us"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  变慢"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  变快"
+        lines.append(f"{name:<26}{base['median_us']:>12.2f}{current:>12.2f}{change:>+10.1%}{flag}")
+    return lines, regressions
+
+
+def _load_baseline(path: Path) -> Optional[Dict[str, Dict[str, Any]]]:
+    if not path.exists():
+        return None
+    with path.open(encoding="utf-8") as file:
+        return json.load(file)["results"]
+
+
+def _save_baseline(path: Path, results: Dict[str, Dict[str, Any]]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    with path.open("w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
+        file.write("\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="pbd_di 容器微基准测试")
+    parser.add_argument("-k", dest="keyword", help="只运行名称包含该关键字的场景")
+    parser.add_argument("--rounds", type=int, default=15, help="测量轮数")
+    parser.add_argument("--number", type=int, default=200, help="每轮执行次数")
+    parser.add_argument("--warmup", type=int, default=50, help="预热次数")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="基线文件")
+    parser.add_argument("--save", action="store_true", help="将结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=0.2, help="中位数变化超过该比例视为变慢/变快")
+    parser.add_argument("--fail-on-regression", action="store_true", help="存在变慢的场景时返回非零退出码")
+    args = parser.parse_args(argv)
+
+    names = [name for name in _cases if not args.keyword or args.keyword in name]
+    if not names:
+        parser.error(f"没有匹配的场景: {args.keyword}")
+    results = asyncio.run(run(names, args.rounds, args.number, args.warmup))
+
+    baseline = None if args.save else _load_baseline(args.baseline)
+    if baseline is None:
+        for name, result in results.items():
+            print(f"{name:<26}{result['median_us']:>12.2f} us  (±{result['stdev_us']:.2f})")
+    else:
+        lines, regressions = compare(results, baseline, args.threshold)
+        print("\n".join(lines))
+        if regressions and args.fail_on_regression:
+            return 1
+
+    if args.save:
+        if args.keyword and args.baseline.exists():
+            # 只运行了部分场景时保留基线中的其他场景
+            merged = _load_baseline(args.baseline)
+            merged.update(results)
+            results = merged
+        _save_baseline(args.baseline, results)
+        print(f"基线已保存: {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
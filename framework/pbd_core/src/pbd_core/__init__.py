@@ -1,5 +1,5 @@
 from .singleton import SingletonBase
-from .modularity import PbdModuleBase, ModuleManager, ModuleLoadError
+from .modularity import PbdModuleBase, ModuleManager, ModuleLoadError, StartupProfile, PhaseTiming
 from .exceptions import PbdException, InternalException, BusinessException, SimpleMessageException
 from .logging import Logger, HasLogger, LoggerSetting
 from .decorators import extend_class
@@ -18,6 +18,8 @@ __all__ = [
     'PbdModuleBase',
     'ModuleManager',
     'ModuleLoadError',
+    'StartupProfile',
+    'PhaseTiming',
 
     # exceptions
     'PbdException',
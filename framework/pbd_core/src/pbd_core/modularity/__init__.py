@@ -1,3 +1,4 @@
 from .base import PbdModuleBase
 from .exceptions import ModuleLoadError
-from .module_manager import ModuleManager
\ No newline at end of file
+from .module_manager import ModuleManager
+from .startup_profile import StartupProfile, PhaseTiming
\ No newline at end of file
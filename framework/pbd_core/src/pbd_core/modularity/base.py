@@ -11,6 +11,14 @@ class PbdModuleBase:
             ✅ 依赖列表中模块的顺序很重要：
             如果模块 A 依赖模块 B 和 C，且 B 必须在 C 之前初始化，
             则应声明为：_deps = [B, C]
+        _lazy (bool):
+            是否延迟激活。延迟模块不在启动时初始化，而是在首次从容器解析其服务时
+            (见 ModuleManager.activate_for) 才实例化并执行各初始化阶段。
+            只被延迟模块依赖的模块随之延迟；根模块总是在启动时初始化。
+        _services (List[type]):
+            延迟模块提供的服务类型，解析这些类型或其子类 (如接口的实现类) 时激活模块。
+            未声明时，模块所在包 (及子包) 中定义的类型都视为该模块的服务；
+            模块定义在包的 __init__.py 中时即为该包本身。
     """
     # 声明当前模块直接依赖的模块类列表。
     # ⚠️ 注意：只需要声明“直接依赖”模块，传递依赖会由系统自动处理。
@@ -18,6 +26,8 @@ class PbdModuleBase:
     #    如果模块 A 依赖模块 B 和 C，且 B 必须在 C 之前初始化，
     #    则应声明为：_deps = [B, C]
     _deps: ClassVar[List[Type['PbdModuleBase']]] = []
+    _lazy: ClassVar[bool] = False
+    _services: ClassVar[List[type]] = []
 
     async def pre_configure(self):
         pass
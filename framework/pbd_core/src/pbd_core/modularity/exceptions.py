@@ -1,9 +1,10 @@
+from typing import Optional
 from ..exceptions import PbdException
 
 class ModuleLoadError(PbdException):
     """模块加载时抛出的异常，主要用于检测循环依赖"""
-    def __init__(self, message: str):
-        super().__init__(message)
+    def __init__(self, message: str, data: Optional[dict] = None):
+        super().__init__(message, data=data)
         self.message = message
         self.code = "MODULE_LOAD_ERROR"
         self.details = "模块加载时发生错误，请检查模块间的依赖关系。"
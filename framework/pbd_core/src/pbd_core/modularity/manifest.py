@@ -0,0 +1,98 @@
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence, Type, Union
+
+# 清单格式版本，格式变化时递增，旧清单会被忽略
+MANIFEST_VERSION = 1
+
+
+def qualified_name(mod_cls: Type) -> str:
+    """模块类的完整名称，格式为 '包.模块:类名'"""
+    return f"{mod_cls.__module__}:{mod_cls.__qualname__}"
+
+
+def load_class(name: str) -> Type:
+    """按 qualified_name() 的格式导入模块类"""
+    module_name, _, qualname = name.partition(':')
+    target = importlib.import_module(module_name)
+    for part in qualname.split('.'):
+        target = getattr(target, part)
+    return target
+
+
+def _source_file(module_name: str) -> Optional[str]:
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return getattr(module, '__file__', None)
+    spec = importlib.util.find_spec(module_name)
+    return spec.origin if spec is not None and spec.has_location else None
+
+
+def source_fingerprint(names: Sequence[str]) -> Optional[str]:
+    """
+    模块类所在源文件内容的指纹。
+
+    只查找源文件而不导入模块，任一模块找不到源文件时返回 None (无法生成可靠的指纹)。
+    """
+    digest = hashlib.sha256()
+    for module_name in sorted({name.partition(':')[0] for name in names}):
+        path = _source_file(module_name)
+        if path is None or not os.path.isfile(path):
+            return None
+        digest.update(module_name.encode('utf-8'))
+        digest.update(b'\0')
+        with open(path, 'rb') as file:
+            digest.update(hashlib.sha256(file.read()).digest())
+    return digest.hexdigest()
+
+
+def load_manifest(path: Union[str, Path], root: Type) -> Optional[List[Type]]:
+    """
+    读取模块清单。清单不存在、根模块不同或源文件指纹不匹配时返回 None；
+    匹配时按清单中的顺序导入模块并返回模块类列表。
+
+    清单损坏或模块无法导入时抛出异常，由调用方决定回退到重新排序。
+    """
+    path = Path(path)
+    if not path.is_file():
+        return None
+    with path.open(encoding='utf-8') as file:
+        manifest = json.load(file)
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('root') != qualified_name(root):
+        return None
+    names = manifest['modules']
+    fingerprint = source_fingerprint(names)
+    if fingerprint is None or fingerprint != manifest.get('fingerprint'):
+        return None
+    return [load_class(name) for name in names]
+
+
+def save_manifest(path: Union[str, Path], root: Type, order: Sequence[Type]) -> bool:
+    """
+    写入模块清单 (先写临时文件再替换，避免并发启动的进程读到不完整的清单)。
+
+    :return: 是否写入。有模块类无法按名称导入 (如定义在函数内) 或找不到源文件时不写入
+    """
+    names = [qualified_name(mod_cls) for mod_cls in order]
+    if any('<locals>' in name for name in names):
+        return False
+    fingerprint = source_fingerprint(names)
+    if fingerprint is None:
+        return False
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with temp.open('w', encoding='utf-8') as file:
+        json.dump({
+            'version': MANIFEST_VERSION,
+            'root': qualified_name(root),
+            'fingerprint': fingerprint,
+            'modules': names,
+        }, file, ensure_ascii=False, indent=2)
+    os.replace(temp, path)
+    return True
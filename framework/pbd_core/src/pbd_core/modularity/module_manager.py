@@ -1,54 +1,128 @@
-from typing import Type, List, Set, Dict
+from typing import Any, Awaitable, Callable, FrozenSet, Optional, Type, List, Set, Dict, Tuple, Union
 import asyncio
+from contextvars import ContextVar
+import inspect
+import sys
+import threading
+import time
+from pathlib import Path
 from .base import PbdModuleBase
 from .exceptions import ModuleLoadError
+from .manifest import load_manifest, save_manifest
+from .startup_profile import StartupProfile
 from ..logging import HasLogger
 
+# 当前上下文中正在激活的延迟模块，用于识别模块初始化阶段中对自身服务的重入解析
+_activating_ctx: ContextVar[FrozenSet[Type['PbdModuleBase']]] = ContextVar("activating_modules", default=frozenset())
+_MISSING = object()
+
 
 class ModuleManager(HasLogger):
-    def __init__(self, root_module_cls: Type['PbdModuleBase']):
+    PHASES = ('pre_configure', 'configure', 'post_configure')
+    _order_cache: Dict[Type['PbdModuleBase'], Tuple[Type['PbdModuleBase'], ...]] = {}  # 类属性，根模块 -> 初始化顺序
+
+    def __init__(
+            self,
+            root_module_cls: Type['PbdModuleBase'],
+            parallel: bool = False,
+            max_concurrency: Optional[int] = None,
+            manifest_file: Optional[Union[str, Path]] = None,
+        ):
         """
         :param root_module_cls: 应用的根模块类，作为依赖收集的起点
+        :param parallel: 是否按拓扑层级并发执行各初始化阶段。
+            并发模式只保证依赖模块先于被依赖模块执行，不再保证 _deps 中兄弟模块的声明顺序，
+            需要先后顺序的模块应直接声明依赖
+        :param max_concurrency: 并发模式下同一层级最多同时执行的模块数，None 表示不限制
+        :param manifest_file: 模块清单文件路径。排序后将初始化顺序和模块源文件的指纹写入清单，
+            进程重启后指纹匹配时直接按清单顺序导入模块，不再遍历依赖图
         """
         super().__init__()
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError(f"max_concurrency 必须大于 0: {max_concurrency}")
         self.root_module_cls = root_module_cls
+        self.parallel = parallel
+        self.max_concurrency = max_concurrency
+        self.manifest_file = manifest_file
+        self.profile: Optional[StartupProfile] = None  # 最近一次 initialize_modules 的性能分析
         self._init_order: List[Type['PbdModuleBase']] = []  # 拓扑排序后的模块初始化顺序
         self._visited: Set[Type['PbdModuleBase']] = set()  # 已访问的模块集合，防止重复访问
-        self._rec_stack: Set[Type['PbdModuleBase']] = set()  # 当前递归栈，用于检测循环依赖
+        self._rec_stack: Dict[Type['PbdModuleBase'], None] = {}  # 当前 DFS 路径 (有序)，用于检测循环依赖
+        self.instances: Dict[Type['PbdModuleBase'], 'PbdModuleBase'] = {}  # 已初始化的模块实例
+        self._deferred: List[Type['PbdModuleBase']] = []  # 尚未激活的延迟模块，保持拓扑顺序
+        self._service_owners: Dict[type, Type['PbdModuleBase']] = {}  # 声明的服务类型 -> 延迟模块
+        self._package_owners: Dict[str, Type['PbdModuleBase']] = {}  # 包名 -> 未声明服务的延迟模块
+        self._owner_cache: Dict[type, Optional[Type['PbdModuleBase']]] = {}
+        self._activations: Dict[Type['PbdModuleBase'], asyncio.Future] = {}  # 正在激活或已激活的延迟模块
 
     def _topo_sort(self, mod_cls: Type['PbdModuleBase']):
         """
-        递归进行拓扑排序：
-        - 遍历模块的所有依赖 (_deps)
-        - 先递归排序依赖模块，再将自己加入初始化顺序列表
-        - 如果检测到当前模块在递归栈中，说明存在循环依赖，抛出异常
+        迭代深度优先拓扑排序 (不受递归深度限制，时间复杂度与模块数和依赖数成线性)：
+        - 按声明顺序遍历模块的所有依赖 (_deps)
+        - 依赖模块全部排序后，再将自己加入初始化顺序列表
+        - 如果依赖已在当前路径上，说明存在循环依赖，按路径顺序报告完整的循环链路
         """
         if mod_cls in self._visited:
             self.logger.debug(f"模块 {mod_cls.__name__} 已经访问过，跳过")
             return
-        if mod_cls in self._rec_stack:
-            path = " -> ".join(m.__name__ for m in self._rec_stack)
-            self.logger.error(f"检测到循环依赖: {path} -> {mod_cls.__name__}")
-            raise ModuleLoadError(f"循环依赖检测到模块链路: {path} -> {mod_cls.__name__}")
 
-        self.logger.debug(f"开始处理模块 {mod_cls.__name__}")
-        self._rec_stack.add(mod_cls)
+        self._enter(mod_cls)
+        stack = [(mod_cls, iter(getattr(mod_cls, '_deps', [])))]
+        while stack:
+            current, deps = stack[-1]
+            dep = next(deps, None)
+            if dep is None:
+                stack.pop()
+                del self._rec_stack[current]
+                self._visited.add(current)
+                self._init_order.append(current)
+                self.logger.info(f"模块 {current.__name__} 添加到初始化顺序")
+                continue
+
+            self.logger.debug(f"模块 {current.__name__} 依赖 {dep.__name__}")
+            if dep in self._visited:
+                self.logger.debug(f"模块 {dep.__name__} 已经访问过，跳过")
+                continue
+            if dep in self._rec_stack:
+                path = list(self._rec_stack)
+                cycle = [m.__name__ for m in path[path.index(dep):]] + [dep.__name__]
+                message = " -> ".join(cycle)
+                self.logger.error(f"检测到循环依赖: {message}")
+                raise ModuleLoadError(f"循环依赖检测到模块链路: {message}", data={'cycle': cycle})
+            self._enter(dep)
+            stack.append((dep, iter(getattr(dep, '_deps', []))))
 
-        for dep in getattr(mod_cls, '_deps', []):
-            self.logger.debug(f"模块 {mod_cls.__name__} 依赖 {dep.__name__}")
-            self._topo_sort(dep)
+    def _enter(self, mod_cls: Type['PbdModuleBase']):
+        self.logger.debug(f"开始处理模块 {mod_cls.__name__}")
+        self._rec_stack[mod_cls] = None
 
-        self._rec_stack.remove(mod_cls)
-        self._visited.add(mod_cls)
-        self._init_order.append(mod_cls)
-        self.logger.info(f"模块 {mod_cls.__name__} 添加到初始化顺序")
+    @classmethod
+    def clear_cache(cls):
+        """
+        清空缓存的初始化顺序，运行时修改了模块的 _deps 后需要调用。
+        模块清单只按源文件判断是否失效，运行时的修改需要同时删除清单文件。
+        """
+        cls._order_cache.clear()
 
     def collect_and_sort(self) -> List[Type['PbdModuleBase']]:
         """
         从根模块开始，收集所有依赖模块并拓扑排序。
 
+        结果按根模块缓存，同一根模块再次调用时直接返回缓存的顺序。
+        设置了 manifest_file 时，进程内没有缓存则先尝试读取清单，清单无效时重新排序并写入清单。
+
         :return: 按依赖顺序排序后的模块类列表
         """
+        cached = self._order_cache.get(self.root_module_cls)
+        if cached is None and self.manifest_file is not None:
+            cached = self._load_manifest()
+        if cached is not None:
+            self.logger.debug(f"使用缓存的模块初始化顺序，根模块: {self.root_module_cls.__name__}")
+            self._init_order[:] = cached
+            self._visited = set(cached)
+            self._rec_stack.clear()
+            return self._init_order
+
         self.logger.info(f"开始收集模块依赖并拓扑排序，根模块: {self.root_module_cls.__name__}")
         self._init_order.clear()
         self._visited.clear()
@@ -60,36 +134,343 @@ class ModuleManager(HasLogger):
         for mod_cls in self._init_order:
             self.logger.info(f" - {mod_cls.__name__}")
 
+        self._order_cache[self.root_module_cls] = tuple(self._init_order)
+        if self.manifest_file is not None:
+            self._save_manifest()
         return self._init_order
 
-    async def initialize_modules(self) -> Dict[Type['PbdModuleBase'], 'PbdModuleBase']:
+    def _load_manifest(self) -> Optional[Tuple[Type['PbdModuleBase'], ...]]:
+        try:
+            order = load_manifest(self.manifest_file, self.root_module_cls)
+        except Exception as e:
+            self.logger.warning(f"读取模块清单 {self.manifest_file} 失败，重新排序: {e!r}")
+            return None
+        if order is None:
+            self.logger.info(f"模块清单 {self.manifest_file} 不存在或已失效，重新排序")
+            return None
+        self.logger.info(f"使用模块清单 {self.manifest_file}，共 {len(order)} 个模块")
+        cached = self._order_cache[self.root_module_cls] = tuple(order)
+        return cached
+
+    def _save_manifest(self):
+        try:
+            saved = save_manifest(self.manifest_file, self.root_module_cls, self._init_order)
+        except OSError as e:
+            self.logger.warning(f"写入模块清单 {self.manifest_file} 失败: {e!r}")
+            return
+        if not saved:
+            self.logger.debug("存在无法按名称导入或找不到源文件的模块，不写入模块清单")
+
+    @staticmethod
+    def group_levels(order: List[Type['PbdModuleBase']]) -> List[List[Type['PbdModuleBase']]]:
+        """
+        将拓扑排序结果按层级分组：没有依赖的模块在第 0 层，
+        其他模块位于其全部依赖所在层级的下一层。同一层级的模块互不依赖，保持拓扑顺序。
+        """
+        levels: Dict[Type['PbdModuleBase'], int] = {}
+        groups: List[List[Type['PbdModuleBase']]] = []
+        for mod_cls in order:
+            level = max((levels[dep] + 1 for dep in getattr(mod_cls, '_deps', []) if dep in levels), default=0)
+            levels[mod_cls] = level
+            if level == len(groups):
+                groups.append([])
+            groups[level].append(mod_cls)
+        return groups
+
+    def split_lazy(self, order: List[Type['PbdModuleBase']]) -> Tuple[List[Type['PbdModuleBase']], List[Type['PbdModuleBase']]]:
+        """
+        将初始化顺序拆分为启动时初始化的模块和延迟激活的模块，两者均保持拓扑顺序。
+
+        从根模块出发、不经过延迟模块即可到达的模块在启动时初始化；
+        延迟模块以及只能经由延迟模块到达的模块推迟到首次使用时激活。
+        """
+        root = self.root_module_cls
+        reachable = {root}
+        # 逆拓扑顺序遍历，被依赖模块总在依赖它的模块之后处理
+        for mod_cls in reversed(order):
+            if mod_cls in reachable and (mod_cls is root or not self._is_lazy(mod_cls)):
+                reachable.update(getattr(mod_cls, '_deps', []))
+        eager, deferred = [], []
+        for mod_cls in order:
+            if mod_cls in reachable and (mod_cls is root or not self._is_lazy(mod_cls)):
+                eager.append(mod_cls)
+            else:
+                deferred.append(mod_cls)
+        return eager, deferred
+
+    @staticmethod
+    def _is_lazy(mod_cls: Type['PbdModuleBase']) -> bool:
+        return getattr(mod_cls, '_lazy', False) is True
+
+    def _index_services(self):
+        """
+        建立服务类型到尚未激活的延迟模块的索引，声明的服务的子类也属于该模块。
+
+        未声明 _services 的延迟模块按所在包认领服务：模块定义在包的 __init__.py 中时为该包本身，
+        否则为模块文件所在的包。两个延迟模块认领同一服务或同一个包时抛出 ModuleLoadError。
+        """
+        self._service_owners.clear()
+        self._package_owners.clear()
+        self._owner_cache.clear()
+        for mod_cls in self._deferred:
+            if not self._is_lazy(mod_cls):
+                # 只经由延迟模块到达的普通模块随依赖它的延迟模块一起激活
+                continue
+            services = getattr(mod_cls, '_services', None)
+            if isinstance(services, (list, tuple)) and services:
+                for service in services:
+                    self._claim(self._service_owners, service, mod_cls, getattr(service, '__name__', service))
+            else:
+                module = mod_cls.__module__
+                if not hasattr(sys.modules.get(module), '__path__'):
+                    module = module.rpartition('.')[0] or module
+                self._claim(self._package_owners, module, mod_cls, f"包 {module}")
+
+    @staticmethod
+    def _claim(owners: Dict[Any, Type['PbdModuleBase']], key: Any, mod_cls: Type['PbdModuleBase'], label: Any):
+        owner = owners.setdefault(key, mod_cls)
+        if owner is not mod_cls:
+            raise ModuleLoadError(
+                f"延迟模块 {owner.__name__} 和 {mod_cls.__name__} 同时认领了 {label}，请通过 _services 明确声明服务",
+                data={'modules': [owner.__name__, mod_cls.__name__]},
+            )
+
+    def _owner_of(self, service: type) -> Optional[Type['PbdModuleBase']]:
+        owner = self._owner_cache.get(service, _MISSING)
+        if owner is not _MISSING:
+            return owner
+        owner = None
+        if self._service_owners:
+            # 实现类按 MRO 匹配声明的服务 (接口)，结果不依赖容器是否已按接口编译过计划
+            for base in getattr(service, '__mro__', (service,)):
+                owner = self._service_owners.get(base)
+                if owner is not None:
+                    break
+        if owner is None and self._package_owners:
+            # 按最长的包名前缀匹配
+            package = getattr(service, '__module__', None) or ''
+            while package:
+                owner = self._package_owners.get(package)
+                if owner is not None:
+                    break
+                package = package.rpartition('.')[0]
+        self._owner_cache[service] = owner
+        return owner
+
+    @property
+    def deferred_modules(self) -> List[Type['PbdModuleBase']]:
+        """尚未激活的延迟模块"""
+        return list(self._deferred)
+
+    def activate_for(self, *services: type) -> Optional[Awaitable[None]]:
+        """
+        解析服务前调用：任一服务类型属于尚未激活的延迟模块时返回激活这些模块的 awaitable，否则返回 None。
+
+        用作容器的激活钩子：Container().set_activation_hook(manager.activate_for)，
+        容器会传入请求的接口和实现类。所有延迟模块激活后只剩一次列表判断。
+        """
+        if not self._deferred:
+            return None
+        owners = []
+        for service in services:
+            owner = self._owner_of(service)
+            if owner is not None and owner in self._deferred and owner not in owners:
+                owners.append(owner)
+        if not owners:
+            return None
+        if len(owners) == 1:
+            return self.activate(owners[0])
+        return self._activate_all(owners)
+
+    async def _activate_all(self, modules: List[Type['PbdModuleBase']]):
+        for mod_cls in modules:
+            await self.activate(mod_cls)
+
+    async def activate(self, mod_cls: Type['PbdModuleBase']):
+        """
+        激活延迟模块：按拓扑顺序实例化该模块及其尚未激活的依赖模块，并执行各初始化阶段。
+
+        每个模块只激活一次，并发请求等待同一次激活；激活失败的模块保持未激活状态，下次使用时重试。
+        模块初始化阶段中解析自身服务时不会再次等待激活。
+        """
+        if self.profile is None:
+            raise RuntimeError("尚未执行 initialize_modules")
+        closure = set()
+        stack = [mod_cls]
+        while stack:
+            current = stack.pop()
+            if current in closure:
+                continue
+            closure.add(current)
+            stack.extend(getattr(current, '_deps', []))
+        for pending in [m for m in self._deferred if m in closure]:
+            await self._activate_one(pending)
+
+    async def _activate_one(self, mod_cls: Type['PbdModuleBase']):
+        future = self._activations.get(mod_cls)
+        if future is not None:
+            if mod_cls not in _activating_ctx.get():
+                await asyncio.shield(future)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._activations[mod_cls] = future
+        token = _activating_ctx.set(_activating_ctx.get() | {mod_cls})
+        try:
+            self.logger.info(f"激活延迟模块 {mod_cls.__name__}")
+            instance = self._call_timed(mod_cls.__name__, StartupProfile.INSTANTIATE, mod_cls)
+            for phase in self.PHASES:
+                await self._run_phase(mod_cls, instance, phase)
+        except BaseException as e:
+            del self._activations[mod_cls]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                self.logger.error(f"延迟模块 {mod_cls.__name__} 激活失败: {e!r}")
+                future.set_exception(e)
+                future.exception()  # 没有等待方时避免未获取异常的警告
+            raise
+        finally:
+            _activating_ctx.reset(token)
+
+        self.instances[mod_cls] = instance
+        self._deferred.remove(mod_cls)
+        self._index_services()
+        future.set_result(None)
+
+    async def _run_phase(self, mod_cls: Type['PbdModuleBase'], instance: 'PbdModuleBase', phase: str):
+        method = getattr(instance, phase, None)
+        if method:
+            self.logger.info(f"执行模块 {mod_cls.__name__} 的 {phase} 方法")
+            if asyncio.iscoroutinefunction(method):
+                start = time.perf_counter()
+                cpu = time.thread_time()
+                try:
+                    await method()
+                finally:
+                    self.profile.record(
+                        mod_cls.__name__, phase, start,
+                        time.perf_counter() - start, time.thread_time() - cpu,
+                    )
+            else:
+                await asyncio.to_thread(self._call_timed, mod_cls.__name__, phase, method)
+
+    def _call_timed(self, name: str, phase: str, method: Callable[[], Any]) -> Any:
+        """调用同步方法并记录耗时，在执行器线程中运行时 CPU 耗时只包含该方法"""
+        start = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            return method()
+        finally:
+            self.profile.record(name, phase, start, time.perf_counter() - start, time.thread_time() - cpu, threading.get_ident())
+
+    def startup_report(self, slowest: int = 10) -> Dict[str, Any]:
+        """
+        最近一次 initialize_modules 的启动报告 (见 StartupProfile.report)，
+        包括总耗时、各阶段耗时、关键路径和最慢的阶段。
+        """
+        if self.profile is None:
+            raise RuntimeError("尚未执行 initialize_modules")
+        return self.profile.report(slowest)
+
+    async def _run_phase_parallel(
+            self,
+            levels: List[List[Type['PbdModuleBase']]],
+            instances: Dict[Type['PbdModuleBase'], 'PbdModuleBase'],
+            phase: str,
+        ):
+        """
+        逐层执行阶段，同一层级的模块并发执行。
+
+        一个层级中有模块失败时，等待该层级其余模块执行完毕后不再执行后续层级，
+        记录全部失败，并抛出拓扑顺序最靠前的模块的异常，保证报错结果确定。
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+
+        async def run(mod_cls):
+            if semaphore is None:
+                return await self._run_phase(mod_cls, instances[mod_cls], phase)
+            async with semaphore:
+                return await self._run_phase(mod_cls, instances[mod_cls], phase)
+
+        for index, level in enumerate(levels):
+            self.logger.debug(f"阶段 {phase} 第 {index} 层: {', '.join(m.__name__ for m in level)}")
+            results = await asyncio.gather(*(run(mod_cls) for mod_cls in level), return_exceptions=True)
+            errors = [
+                (mod_cls, result) for mod_cls, result in zip(level, results)
+                if isinstance(result, BaseException)
+            ]
+            if errors:
+                for mod_cls, error in errors:
+                    self.logger.error(f"模块 {mod_cls.__name__} 的 {phase} 方法执行失败: {error!r}")
+                raise errors[0][1]
+
+    async def initialize_modules(
+            self,
+            on_initialized: Optional[Callable[[], Union[None, Awaitable[None]]]] = None,
+            trace_file: Optional[Union[str, Path]] = None,
+        ) -> Dict[Type['PbdModuleBase'], 'PbdModuleBase']:
         """
         按拓扑排序的顺序，依次创建模块实例，并调用模块的三个初始化阶段：
         pre_configure -> configure -> post_configure
 
         支持模块的初始化方法为同步或异步，统一用 await 调用。
+        声明 _lazy = True 的模块 (及只被其依赖的模块) 不在此时初始化，
+        而是在首次解析其服务时由 activate_for 激活，需要将其设置为容器的激活钩子。
+        parallel 为 True 时，每个阶段按拓扑层级执行，同一层级的模块并发执行，
+        各阶段之间仍然严格先后执行。
 
+        :param on_initialized: 所有阶段完成后调用的回调 (同步或异步)，
+            例如 Container().validate_and_warm，用于启动时检查依赖图并预热单例
+        :param trace_file: 写入 Chrome Trace 格式性能分析的文件路径，失败时同样写入
         :return: 模块类到模块实例的映射字典
+
+        每个模块实例化和各阶段的耗时记录在 self.profile 中，可通过 startup_report() 获取报告。
         """
         self.logger.info("开始初始化模块")
-        order = self.collect_and_sort()
-        instances: Dict[Type['PbdModuleBase'], 'PbdModuleBase'] = {}
+        self.profile = StartupProfile()
+        try:
+            instances = await self._initialize_modules(on_initialized)
+        finally:
+            self.profile.finish()
+            if trace_file is not None:
+                self.profile.write_chrome_trace(trace_file)
+                self.logger.info(f"启动性能分析已写入 {trace_file}")
+        report = self.profile.report(slowest=1)
+        self.logger.info(
+            f"模块初始化耗时 {report['total']:.3f}s，关键路径耗时 {report['critical_path_duration']:.3f}s"
+        )
+        self.logger.info("所有模块初始化完成")
+        return instances
+
+    async def _initialize_modules(
+            self,
+            on_initialized: Optional[Callable[[], Union[None, Awaitable[None]]]],
+        ) -> Dict[Type['PbdModuleBase'], 'PbdModuleBase']:
+        order, self._deferred = self.split_lazy(self.collect_and_sort())
+        self.profile.set_modules(order + self._deferred)
+        self._activations.clear()
+        self._index_services()
+        if self._deferred:
+            self.logger.info(f"延迟激活的模块: {', '.join(m.__name__ for m in self._deferred)}")
+        instances = self.instances = {}
 
         for mod_cls in order:
             self.logger.info(f"实例化模块 {mod_cls.__name__}")
-            instances[mod_cls] = mod_cls()
+            instances[mod_cls] = self._call_timed(mod_cls.__name__, StartupProfile.INSTANTIATE, mod_cls)
 
-        for phase in ['pre_configure', 'configure', 'post_configure']:
+        levels = self.group_levels(order) if self.parallel else None
+        for phase in self.PHASES:
             self.logger.info(f"开始执行阶段: {phase}")
+            if levels is not None:
+                await self._run_phase_parallel(levels, instances, phase)
+                continue
             for mod_cls in order:
-                instance = instances[mod_cls]
-                method = getattr(instance, phase, None)
-                if method:
-                    self.logger.info(f"执行模块 {mod_cls.__name__} 的 {phase} 方法")
-                    if asyncio.iscoroutinefunction(method):
-                        await method()
-                    else:
-                        await asyncio.to_thread(method)
+                await self._run_phase(mod_cls, instances[mod_cls], phase)
 
-        self.logger.info("所有模块初始化完成")
+        if on_initialized is not None:
+            self.logger.info("执行模块初始化完成回调")
+            result = on_initialized()
+            if inspect.isawaitable(result):
+                await result
         return instances
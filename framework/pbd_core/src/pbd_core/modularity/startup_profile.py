@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Type, Union
+
+
+class PhaseTiming(NamedTuple):
+    """一个模块一个阶段的耗时"""
+    module: str
+    phase: str
+    start: float   # 相对于性能分析开始的时间 (秒)
+    wall: float    # 墙钟耗时 (秒)
+    cpu: float     # CPU 耗时 (秒)
+    thread_id: int
+
+
+class StartupProfile:
+    """
+    模块启动性能分析。
+
+    ModuleManager.initialize_modules 会记录每个模块实例化和各阶段的墙钟耗时与 CPU 耗时。
+    同步方法在执行器线程中运行，CPU 耗时只包含该方法本身；异步方法的 CPU 耗时按当前线程
+    统计，并发执行时会包含同一事件循环中其他任务的 CPU 时间。
+    """
+    INSTANTIATE = "instantiate"
+
+    def __init__(self):
+        self.timings: List[PhaseTiming] = []
+        self.started_at = time.perf_counter()
+        self.total = 0.0
+        self._order: List[str] = []
+        self._deps: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def set_modules(self, order: Sequence[Type]):
+        """记录模块的拓扑顺序和依赖关系，用于计算关键路径"""
+        self._order = [mod_cls.__name__ for mod_cls in order]
+        self._deps = {
+            mod_cls.__name__: [dep.__name__ for dep in getattr(mod_cls, '_deps', [])]
+            for mod_cls in order
+        }
+
+    def record(self, module: str, phase: str, start: float, wall: float, cpu: float, thread_id: Optional[int] = None):
+        """
+        :param start: time.perf_counter() 的绝对值
+        """
+        timing = PhaseTiming(
+            module, phase, start - self.started_at, wall, cpu,
+            threading.get_ident() if thread_id is None else thread_id,
+        )
+        with self._lock:
+            self.timings.append(timing)
+
+    def finish(self):
+        """结束分析，记录总耗时"""
+        self.total = time.perf_counter() - self.started_at
+
+    def critical_path(self, phase: str) -> Dict[str, Any]:
+        """
+        阶段内沿模块依赖的最长路径 (按墙钟耗时)，即并发执行时该阶段耗时的下限。
+        """
+        walls = {timing.module: timing.wall for timing in self.timings if timing.phase == phase}
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for module in self._order:
+            best, best_dep = 0.0, None
+            for dep in self._deps.get(module, []):
+                if dep in finish and finish[dep] > best:
+                    best, best_dep = finish[dep], dep
+            finish[module] = best + walls.get(module, 0.0)
+            previous[module] = best_dep
+        if not finish:
+            return {"modules": [], "duration": 0.0}
+        end = max(self._order, key=lambda module: finish[module])
+        path = []
+        node: Optional[str] = end
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        path.reverse()
+        return {"modules": path, "duration": finish[end]}
+
+    def report(self, slowest: int = 10) -> Dict[str, Any]:
+        """
+        结构化的启动报告：
+        - total: initialize_modules 总耗时
+        - phases: 每个阶段的墙钟、CPU 耗时合计
+        - modules: 每个模块每个阶段的墙钟、CPU 耗时
+        - critical_path: 每个配置阶段的关键路径，critical_path_duration 为其合计
+        - slowest: 最慢的若干个 (模块, 阶段)
+        """
+        phases: Dict[str, Dict[str, float]] = {}
+        modules: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for timing in self.timings:
+            phase = phases.setdefault(timing.phase, {"wall": 0.0, "cpu": 0.0})
+            phase["wall"] += timing.wall
+            phase["cpu"] += timing.cpu
+            modules.setdefault(timing.module, {})[timing.phase] = {"wall": timing.wall, "cpu": timing.cpu}
+        critical_path = {
+            phase: self.critical_path(phase)
+            for phase in phases if phase != self.INSTANTIATE
+        }
+        ordered = sorted(self.timings, key=lambda timing: timing.wall, reverse=True)[:slowest]
+        return {
+            "total": self.total,
+            "phases": phases,
+            "modules": modules,
+            "critical_path": critical_path,
+            "critical_path_duration": sum(item["duration"] for item in critical_path.values()),
+            "slowest": [
+                {"module": timing.module, "phase": timing.phase, "wall": timing.wall, "cpu": timing.cpu}
+                for timing in ordered
+            ],
+        }
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        转换为 Chrome Trace Event 格式，可在 chrome://tracing 或 Perfetto 中查看。
+        重叠的事件分配到不同的泳道。
+        """
+        lanes: List[float] = []
+        events = []
+        pid = os.getpid()
+        for timing in sorted(self.timings, key=lambda timing: timing.start):
+            lane = next((index for index, end in enumerate(lanes) if end <= timing.start), None)
+            if lane is None:
+                lane = len(lanes)
+                lanes.append(0.0)
+            lanes[lane] = timing.start + timing.wall
+            events.append({
+                "name": f"{timing.module}.{timing.phase}",
+                "cat": timing.phase,
+                "ph": "X",
+                "ts": timing.start * 1e6,
+                "dur": timing.wall * 1e6,
+                "pid": pid,
+                "tid": lane,
+                "args": {"cpu_ms": timing.cpu * 1e3, "thread_id": timing.thread_id},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Union[str, Path]):
+        """将 Chrome Trace 写入 JSON 文件"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as file:
+            json.dump(self.to_chrome_trace(), file, ensure_ascii=False)
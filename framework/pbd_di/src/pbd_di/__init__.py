@@ -1,24 +1,28 @@
-from .container import Container
+from .container import Container, get_current_container
+from .child_containers import ChildContainerCache
 from .funcs import replace_service, get_default_dependency_name
-from .generic import SINGLETON, TRANSIENT, SCOPED, VALID_SCOPES, TDependency
-from .interfaces import IDependencyBase, ISingletonDependency, ITransientDependency, IScopedDependency, IServiceProvider, IReplaceableInterface
+from .generic import SINGLETON, TRANSIENT, SCOPED, POOLED, VALID_SCOPES, TDependency
+from .interfaces import IDependencyBase, ISingletonDependency, ITransientDependency, IScopedDependency, IPooledDependency, IServiceProvider, IReplaceableInterface
 from .service_provider import ServiceProvider
 from .decorators import injectable_extension 
-from .exceptions import CircularDependencyException, InvalidScopeException, DependencyNotFoundException, InjectableExtensionInvalidTypeException
+from .metrics import ResolutionMetrics, ResolutionEvent
+from .lazy import Lazy, LazyProxy
+from .environment import register_when
+from .exceptions import CircularDependencyException, InvalidScopeException, DependencyNotFoundException, InjectableExtensionInvalidTypeException, DependencyGraphException, DisposeException, LazyResolutionException, RegistryFrozenException, RestoreException
 
 __all__ = [
     # container
-    "Container",
+    "Container", "get_current_container", "ChildContainerCache",
 
     # funcs
     "replace_service",  "get_default_dependency_name",
 
     # generic
-    "SINGLETON", "TRANSIENT", "SCOPED", "VALID_SCOPES", "TDependency",
+    "SINGLETON", "TRANSIENT", "SCOPED", "POOLED", "VALID_SCOPES", "TDependency",
 
     #interfaces
     "IDependencyBase", "ISingletonDependency",
-    "ITransientDependency", "IScopedDependency",
+    "ITransientDependency", "IScopedDependency", "IPooledDependency",
     "IServiceProvider", "IReplaceableInterface",
 
     # service provider
@@ -27,8 +31,18 @@ __all__ = [
     # decorators
     "injectable_extension",
 
+    # metrics
+    "ResolutionMetrics", "ResolutionEvent",
+
+    # lazy
+    "Lazy", "LazyProxy",
+
+    # environment
+    "register_when",
+
     # exceptions
     "CircularDependencyException", "InvalidScopeException", "DependencyNotFoundException",
-    "InjectableExtensionInvalidTypeException",
+    "InjectableExtensionInvalidTypeException", "DependencyGraphException", "DisposeException",
+    "LazyResolutionException", "RegistryFrozenException", "RestoreException",
     
 ]
\ No newline at end of file
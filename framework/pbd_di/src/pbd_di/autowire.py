@@ -0,0 +1,80 @@
+import inspect
+import threading
+import typing
+import weakref
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+_hints: "weakref.WeakKeyDictionary[type, Tuple[Tuple[str, Any], ...]]" = weakref.WeakKeyDictionary()   # 每个类型只分析一次
+_lock = threading.Lock()
+
+
+def _constructor(target: type) -> Optional[Callable]:
+    """沿 MRO 找到实际使用的构造函数，object.__init__ 返回 None"""
+    owner = next((klass for klass in target.__mro__ if "__init__" in klass.__dict__), object)
+    init = owner.__dict__["__init__"]
+    return None if init is object.__init__ else init
+
+
+def _class_hints(target: type) -> Dict[str, Any]:
+    return {
+        name: hint
+        for name, hint in typing.get_type_hints(target, include_extras=True).items()
+        if typing.get_origin(hint) is not typing.ClassVar
+    }
+
+
+def _constructor_hints(target: type) -> Dict[str, Any]:
+    # IDependencyBase.__init__ 只接受 **kwargs，不会产生注解
+    init = _constructor(target)
+    if init is None:
+        return {}
+    try:
+        parameters = list(inspect.signature(init).parameters.values())[1:]
+    except (TypeError, ValueError):
+        return {}
+    annotated = {
+        parameter.name for parameter in parameters
+        if parameter.kind in (parameter.POSITIONAL_OR_KEYWORD, parameter.KEYWORD_ONLY)
+        and parameter.annotation is not parameter.empty
+    }
+    if not annotated:
+        return {}
+    hints = typing.get_type_hints(init, include_extras=True)
+    return {name: hints[name] for name in annotated if name in hints}
+
+
+def autowire_hints(target: type) -> Tuple[Tuple[str, Any], ...]:
+    """
+    获取类注解和构造函数参数注解 (构造函数参数优先)，结果按类型缓存。
+
+    字符串注解通过 typing.get_type_hints 在定义类的模块中求值，ClassVar 被忽略；
+    无法求值的注解抛出 NameError (不缓存，之后可以重试)。
+    """
+    hints = _hints.get(target)
+    if hints is None:
+        with _lock:
+            hints = _hints.get(target)
+            if hints is None:
+                merged = _class_hints(target)
+                merged.update(_constructor_hints(target))
+                hints = _hints[target] = tuple(merged.items())
+    return hints
+
+
+def constructor_parameters(target: type) -> Optional[FrozenSet[str]]:
+    """
+    构造函数可以按名称接收的参数，接受 **kwargs 时返回 None (可以接收任意名称)。
+    """
+    init = _constructor(target)
+    if init is None:
+        return frozenset()
+    try:
+        parameters = list(inspect.signature(init).parameters.values())[1:]
+    except (TypeError, ValueError):
+        return None
+    if any(parameter.kind is parameter.VAR_KEYWORD for parameter in parameters):
+        return None
+    return frozenset(
+        parameter.name for parameter in parameters
+        if parameter.kind in (parameter.POSITIONAL_OR_KEYWORD, parameter.KEYWORD_ONLY)
+    )
@@ -0,0 +1,131 @@
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Hashable, List, Optional
+from pbd_core import HasLogger
+from .container import Container
+from .exceptions import DisposeException
+
+
+class ChildContainerCache(HasLogger):
+    """
+    按键 (如租户 ID) 管理子容器，每个键拥有独立的单例缓存。
+
+    - 最多保留 max_size 个子容器，超出时按最近最少使用的顺序淘汰空闲的子容器
+    - 空闲超过 idle_timeout 的子容器可通过 evict_idle() 淘汰
+    - 被淘汰的子容器会调用 shutdown() 释放其单例和对象池
+    - 正在 use() 中的子容器不会被淘汰
+    """
+
+    def __init__(self, parent: Optional[Container] = None, max_size: int = 100, idle_timeout: Optional[float] = None):
+        """
+        :param parent: 父容器，默认为根容器
+        :param max_size: 最多保留的子容器数量
+        :param idle_timeout: 子容器的空闲时间 (秒)，None 表示只按数量淘汰
+        """
+        if max_size < 1:
+            raise ValueError(f"max_size 必须大于 0: {max_size}")
+        self.parent = parent or Container()
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._containers: "OrderedDict[Hashable, Container]" = OrderedDict()
+        self._last_used: Dict[Hashable, float] = {}
+        self._in_use: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._containers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._containers
+
+    async def get(self, key: Hashable) -> Container:
+        """
+        获取键对应的子容器，不存在时创建。
+
+        返回的子容器不受保护，可能被之后的并发请求淘汰；需要在使用期间保留子容器时使用 use()。
+        """
+        self._retain(key)
+        try:
+            return await self._get(key)
+        finally:
+            self._release(key)
+
+    async def _get(self, key: Hashable) -> Container:
+        # 调用方已将 key 标记为使用中，淘汰其他子容器期间当前子容器不会被淘汰
+        container = self._containers.get(key)
+        if container is None:
+            container = self.parent.create_child()
+            self._containers[key] = container
+            self.logger.debug(f"已创建子容器: {key}")
+        else:
+            self._containers.move_to_end(key)
+        self._last_used[key] = time.monotonic()
+        await self._evict_overflow(key)
+        return container
+
+    @asynccontextmanager
+    async def use(self, key: Hashable):
+        """在子容器中处理请求：激活子容器并进入其作用域，期间该子容器不会被淘汰"""
+        # 在任何 await 之前标记为使用中，避免并发请求在创建过程中淘汰该子容器
+        self._retain(key)
+        try:
+            container = await self._get(key)
+            with container.activate():
+                async with container.scope():
+                    yield container
+        finally:
+            self._release(key)
+            self._last_used[key] = time.monotonic()
+
+    def _retain(self, key: Hashable):
+        self._in_use[key] = self._in_use.get(key, 0) + 1
+
+    def _release(self, key: Hashable):
+        self._in_use[key] -= 1
+        if not self._in_use[key]:
+            del self._in_use[key]
+
+    async def evict(self, key: Hashable):
+        """淘汰并关闭指定子容器"""
+        container = self._containers.pop(key, None)
+        self._last_used.pop(key, None)
+        if container is None:
+            return
+        self.logger.debug(f"淘汰子容器: {key}")
+        await container.shutdown()
+
+    async def evict_idle(self):
+        """淘汰空闲超时的子容器"""
+        if self.idle_timeout is None:
+            return
+        deadline = time.monotonic() - self.idle_timeout
+        expired = [
+            key for key in self._containers
+            if key not in self._in_use and self._last_used.get(key, 0) <= deadline
+        ]
+        await self._evict_all(expired)
+
+    async def close(self):
+        """关闭全部子容器"""
+        await self._evict_all(list(self._containers))
+
+    async def _evict_overflow(self, current: Hashable):
+        overflow = len(self._containers) - self.max_size
+        if overflow <= 0:
+            return
+        # OrderedDict 头部是最近最少使用的子容器
+        candidates = [
+            key for key in self._containers
+            if key != current and key not in self._in_use
+        ][:overflow]
+        await self._evict_all(candidates)
+
+    async def _evict_all(self, keys: List[Hashable]):
+        errors = []
+        for key in keys:
+            try:
+                await self.evict(key)
+            except DisposeException as e:
+                errors.extend(e.errors)
+        if errors:
+            raise DisposeException(errors)
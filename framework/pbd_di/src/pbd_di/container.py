@@ -1,115 +1,809 @@
+import asyncio
+import concurrent.futures
 import threading
 import inspect
-from typing import Dict, Any, List, Optional, Type
-from contextvars import ContextVar
-from .generic import SINGLETON, TRANSIENT, SCOPED
+import time
+import weakref
+from functools import partial
+from typing import Awaitable, Callable, Dict, Any, FrozenSet, Iterable, List, Mapping, Optional, Tuple, Type
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from .generic import SINGLETON, TRANSIENT, SCOPED, POOLED, VALID_SCOPES
 from pbd_core import HasLogger, SingletonBase
 from .scoped_context import ScopedContext
-from .exceptions import CircularDependencyException, InvalidScopeException
-from .funcs import get_default_dependency_name
+from .exceptions import CircularDependencyException, InvalidScopeException, DependencyGraphException, DisposeException, RestoreException
+from .resolution_plan import ResolutionPlan
+from .validation import DependencyGraphValidator
+from .disposal import dispose_instances, _dependency_levels
+from .snapshot import dump_snapshot, load_snapshot, restore_singletons
+from .pool import ObjectPool
+from .metrics import ResolutionMetrics
+from .lazy import LazyProxy
+from .environment import select_implementations
 
-_creating_instances_ctx: ContextVar[set] = ContextVar("_creating_instances_ctx")
-def get_creating_instances() -> set:
-    try:
-        return _creating_instances_ctx.get()
-    except LookupError:
-        s = set()
-        _creating_instances_ctx.set(s)
-        return s
+_MISSING = object()
+
+class _ResolutionPath:
+    """
+    当前解析链路，以不可变链表形式保存。
+
+    每次解析只追加一个节点指向父节点，不需要复制整条链路；
+    并发子任务共享父链路，互不影响。
+    """
+    __slots__ = ("name", "parent")
+
+    def __init__(self, name: str, parent: Optional["_ResolutionPath"]):
+        self.name = name
+        self.parent = parent
+
+    def contains(self, name: str) -> bool:
+        node = self
+        while node is not None:
+            if node.name == name:
+                return True
+            node = node.parent
+        return False
+
+    def names(self) -> List[str]:
+        """从根到当前节点的名称列表"""
+        names = []
+        node = self
+        while node is not None:
+            names.append(node.name)
+            node = node.parent
+        names.reverse()
+        return names
+
+    def cycle(self, name: str) -> List[str]:
+        """返回从 name 出发再回到 name 的完整循环路径"""
+        names = []
+        node = self
+        while node is not None:
+            names.append(node.name)
+            if node.name == name:
+                break
+            node = node.parent
+        names.reverse()
+        names.append(name)
+        return names
+
+
+_resolution_path_ctx: ContextVar[Optional[_ResolutionPath]] = ContextVar("_resolution_path_ctx", default=None)
+
+_current_container_ctx: ContextVar[Optional["Container"]] = ContextVar("_current_container_ctx", default=None)
+
+# run_in_executor() 派发任务时所在的事件循环，执行器线程中的 get_sync() 将解析提交回该循环
+_owner_loop_ctx: ContextVar[Optional[asyncio.AbstractEventLoop]] = ContextVar("_owner_loop_ctx", default=None)
+
+
+def get_current_container() -> Optional["Container"]:
+    """获取当前上下文中正在使用的子容器，不在子容器中时返回 None"""
+    return _current_container_ctx.get()
 
 
 class Container(SingletonBase,HasLogger):
     """
     依赖注入容器。
+
+    Container() 始终返回根容器；create_child() 创建的子容器共享根容器的注册信息
+    (解析计划)，但拥有独立的单例缓存、对象池和作用域。声明 _di_shared = True 的
+    单例始终由根容器创建并在所有子容器间共享。
+
+    并发模型：
+    - 单例在所有线程和事件循环之间只创建一次：创建中的单例以线程安全的
+      concurrent.futures.Future 表示，其他线程/事件循环中的请求等待该 Future 而不阻塞自身的事件循环
+    - 类级别的锁只保护字典读写，从不跨越 await，也不会在等待时持有
+    - 对象池按事件循环分别创建 (asyncio 同步原语绑定事件循环)
+    - SCOPED 作用域保存在 ContextVar 中，不会自动进入执行器线程；
+      使用 run_in_executor() 派发的函数会带上当前上下文 (作用域、当前子容器)，
+      并可在线程中调用 get_sync() 同步解析
     """
     _singletons: Dict[str, Any] = {}      # 类属性，全局单例存储
-    _threading_lock = threading.RLock()  # 类级别锁，确保多个方法共享
-    _creating_lock = threading.RLock()  # 专用于循环依赖检测
+    _singleton_plans: Dict[str, ResolutionPlan] = {}  # 类属性，单例名称 -> 创建时的解析计划 (开始创建时记录)，关闭时据此确定依赖顺序，构建时据此检查过期单例
+    _singleton_futures: Dict[str, concurrent.futures.Future] = {}  # 正在创建中的单例，同名请求共享同一次构造
+    _singleton_waits: Dict[str, List[str]] = {}  # 正在创建中的单例 -> 其创建过程正在等待的其他单例，用于检查并发创建之间的循环等待
+    _pools: Dict[Tuple[str, asyncio.AbstractEventLoop], ObjectPool] = {}     # 类属性，POOLED 作用域的对象池，按事件循环区分
+    _threading_lock = threading.RLock()  # 类级别锁，只保护字典读写，不跨越 await
 
     
     def initialize(self):
+        self._parent: Optional["Container"] = None
+        self._root: "Container" = self
         self._scoped_context = ScopedContext()
+        # 是否并发解析互不依赖的兄弟依赖，可被服务类的 _di_parallel 覆盖
+        self.parallel_resolution = False
+        # 解析指标，调用 enable_metrics() 后才记录
+        self.metrics: Optional[ResolutionMetrics] = None
+        # build() 时确定的环境和特性开关
+        self.environment: Optional[str] = None
+        self.features: FrozenSet[str] = frozenset()
+        # 解析未缓存的实例前调用的激活钩子，所有子容器共用根容器的钩子
+        self._activation_hook: Optional[Callable[[Type], Optional[Awaitable[Any]]]] = None
+        # 存活的子容器 (包括子容器的子容器)，build() 时检查其单例缓存
+        self._children: "weakref.WeakSet[Container]" = weakref.WeakSet()
         self.logger.debug("容器已初始化")
 
+    def create_child(self) -> "Container":
+        """
+        创建子容器。
+
+        子容器继承当前容器的设置 (并发解析、指标收集、作用域关闭超时)，
+        拥有独立的单例缓存和对象池，使用完毕后应调用 shutdown()。
+        """
+        child = object.__new__(Container)
+        child._initialized = True
+        child._parent = self
+        child._root = self._root
+        child._singletons = {}
+        child._singleton_plans = {}
+        child._singleton_futures = {}
+        child._singleton_waits = {}
+        child._pools = {}
+        child._scoped_context = ScopedContext(self._scoped_context.dispose_timeout)
+        child.parallel_resolution = self.parallel_resolution
+        child.metrics = self.metrics
+        child.environment = self.environment
+        child.features = self.features
+        self._root._children.add(child)
+        return child
+
+    @property
+    def parent(self) -> Optional["Container"]:
+        """父容器，根容器返回 None"""
+        return self._parent
+
+    def scope(self):
+        """进入当前容器的 SCOPED 作用域 (异步上下文管理器)"""
+        return self._scoped_context.scope()
+
+    @contextmanager
+    def activate(self):
+        """将当前容器设置为上下文中的当前容器，ServiceProvider 会从中解析服务"""
+        token = _current_container_ctx.set(self)
+        try:
+            yield self
+        finally:
+            _current_container_ctx.reset(token)
+
+    def enable_metrics(self, metrics: Optional[ResolutionMetrics] = None) -> ResolutionMetrics:
+        """
+        启用解析指标收集。
+
+        :param metrics: 指标收集器，默认创建新的 ResolutionMetrics
+        :return: 正在使用的指标收集器
+        """
+        self.metrics = metrics or ResolutionMetrics()
+        return self.metrics
+
+    def disable_metrics(self):
+        """停止解析指标收集"""
+        self.metrics = None
+
+    def set_activation_hook(self, hook: Optional[Callable[[Type], Optional[Awaitable[Any]]]]):
+        """
+        设置激活钩子，例如 ModuleManager.activate_for，用于首次解析延迟模块的服务时激活模块。
+
+        未命中单例和作用域缓存的解析 (包括每一次 TRANSIENT 和 POOLED 解析) 在循环依赖检测之后、
+        创建实例之前调用钩子，参数为解析到同一计划的全部类型 (请求的接口和实现类)。
+        钩子返回 awaitable 时先等待其完成再创建实例，激活期间注册表发生变化 (如模块注册了工厂) 时
+        按请求的类型重新获取计划，不会使用激活前的实现；钩子位于瞬时依赖的热路径上，
+        无需激活时应尽快返回 None。传入 None 移除钩子。
+        """
+        if self._parent is not None:
+            raise RuntimeError("set_activation_hook() 只能在根容器上调用")
+        self._activation_hook = hook
+
+    def build(self, environment: str, features: Iterable[str] = ()) -> "Container":
+        """
+        按环境和特性开关确定 register_when 声明的实现，并冻结注册表。
+
+        条件只在此时计算一次，解析时不再判断；冻结后 replace_service、
+        register_factory、register_instance、unregister 以及定义新的接口实现会抛出 RegistryFrozenException。
+
+        根容器或存活的子容器中已创建 (或正在创建) 的单例如果直接或间接依赖了构建后会改变的实现，
+        构建会被拒绝并抛出 RuntimeError，注册表保持未冻结：这些单例及其依赖方无法安全地替换，
+        应在创建单例之前调用 build()。
+
+        :param environment: 环境名称，如 development、staging、production
+        :param features: 开启的特性开关
+        :return: 当前容器
+        """
+        if self._parent is not None:
+            raise RuntimeError("build() 只能在根容器上调用")
+        features = frozenset(features)
+        selected, excluded = select_implementations(environment, features)
+        ResolutionPlan.freeze(selected, excluded)
+        try:
+            self._ensure_no_stale_singletons()
+        except BaseException:
+            ResolutionPlan.thaw()
+            raise
+        self.environment = environment
+        self.features = features
+        for child in list(self._children):
+            child.environment = environment
+            child.features = features
+        self.logger.debug(f"容器已构建: 环境 {environment}, 特性 {sorted(features)}, 条件实现 {len(selected)} 个")
+        return self
+
+    def _ensure_no_stale_singletons(self):
+        """
+        按容器为每个已缓存 (或正在创建) 的单例记录的计划检查：
+        任一可达依赖记录的实现与构建后同一类型的计划不同时拒绝构建。
+        不依赖计划缓存，构建前的 invalidate() 不会影响检查结果。
+        """
+        stale = set()
+        for container in [self, *self._children]:
+            with self._threading_lock:
+                plans = [
+                    plan for name, plan in container._singleton_plans.items()
+                    if name in container._singletons or name in container._singleton_futures
+                ]
+            for plan in plans:
+                if any(
+                    ResolutionPlan.of(service).target is not dep.target
+                    for dep in plan.reachable() for service in dep.services
+                ):
+                    stale.add(plan.name)
+        if stale:
+            raise RuntimeError(
+                f"单例 {', '.join(sorted(stale))} 已创建，且依赖的实现会在构建后改变，请在创建单例之前调用 build()"
+            )
+
+    def register_factory(self, target: Type, factory: Callable[[], Any], scope: str = SINGLETON, shared: bool = False):
+        """
+        注册类型的工厂。
+
+        解析 target 时直接调用工厂 (同步或异步，无参数) 创建实例，
+        不构造类、不解析 deps、不调用 initialize。注册信息在所有容器间共享。
+
+        :param target: 注册的类型，可以是接口
+        :param factory: 无参数的同步或异步工厂
+        :param scope: 工厂创建实例的作用域
+        :param shared: 单例是否由根容器创建并在子容器间共享
+        """
+        if scope not in VALID_SCOPES:
+            raise InvalidScopeException(target, scope)
+        if not callable(factory):
+            raise TypeError(f"{target.__name__} 的工厂必须是可调用对象")
+        ResolutionPlan.register(target, scope, factory=factory, shared=shared)
+
+    def register_instance(self, target: Type, instance: Any):
+        """
+        注册现成实例，解析 target 时直接返回该实例。
+
+        实例由调用方创建和管理，容器 shutdown() 时不会关闭它。
+        """
+        ResolutionPlan.register(target, SINGLETON, instance=instance, has_instance=True, shared=True)
+
+    def unregister(self, target: Type):
+        """移除 register_factory / register_instance 的注册"""
+        ResolutionPlan.unregister(target)
+
     async def get(self, target: Type, context_instances: Optional[Dict[str,Type]] = None) -> Any:
         """
         从容器中获取一个依赖实例。
         """
-        creating_instances = get_creating_instances()
-        
-        if hasattr(target, "__di_implementation__") and target.__di_implementation__ is not None:
-            return await self.get(target.__di_implementation__)
+        if self._parent is None:
+            return await self._resolve(ResolutionPlan.of(target), context_instances, target)
+        with self.activate():
+            return await self._resolve(ResolutionPlan.of(target), context_instances, target)
 
-        name = f"{target.__module__}.{target.__qualname__}"
+    async def get_many(self, *targets: Type, context_instances: Optional[Dict[str,Type]] = None) -> List[Any]:
+        """
+        一次解析多个依赖，按传入顺序返回实例。
+
+        同一次调用中重复的类型 (包括解析到同一实现的接口) 只解析一次；
+        共享的单例和作用域依赖只创建一次。启用 parallel_resolution 时，
+        互不依赖的类型会并发解析。
+        """
+        plans = []
+        unique = {}  # 计划 -> 第一个解析到该计划的类型
+        for target in targets:
+            plan = ResolutionPlan.of(target)
+            plans.append(plan)
+            unique.setdefault(plan, target)
+
+        results: Dict[ResolutionPlan, Any] = {}
+        items = tuple((plan, plan) for plan in unique)
+        with self.activate():
+            if self.parallel_resolution and len(items) > 1:
+                await self._resolve_batches(ResolutionPlan.split_batches(items), results, context_instances, unique)
+            else:
+                for plan, _ in items:
+                    results[plan] = await self._resolve(plan, context_instances, unique[plan])
+        return [results[plan] for plan in plans]
+
+    async def get_all(self, target: Type, context_instances: Optional[Dict[str,Type]] = None) -> List[Any]:
+        """
+        获取接口的全部实现实例。
 
-        if name in creating_instances:
-            raise CircularDependencyException(name)
+        实现按 _di_order 和定义顺序排列 (顺序被缓存)；互不依赖的实现并发解析，
+        单例实现按常规方式缓存。接口没有登记多个实现时返回只包含 get(target) 结果的列表。
+        """
+        plans = ResolutionPlan.implementations(target)
+        results: Dict[ResolutionPlan, Any] = {}
+        with self.activate():
+            if len(plans) == 1:
+                results[plans[0]] = await self._resolve(plans[0], context_instances)
+            else:
+                items = tuple((plan, plan) for plan in plans)
+                await self._resolve_batches(ResolutionPlan.split_batches(items), results, context_instances)
+        return [results[plan] for plan in plans]
+
+    def run_in_executor(self, func: Callable, *args, executor: Optional[concurrent.futures.Executor] = None) -> Awaitable:
+        """
+        在执行器线程中运行同步函数，并带上当前上下文。
+
+        线程中可以访问当前的 SCOPED 作用域和当前子容器，
+        调用 get_sync() 时解析会提交回当前事件循环执行。
+        """
+        loop = asyncio.get_running_loop()
+        context = copy_context()
+        context.run(_owner_loop_ctx.set, loop)
+        return loop.run_in_executor(executor, partial(context.run, func, *args))
+
+    def get_sync(self, target: Type, context_instances: Optional[Dict[str,Type]] = None, timeout: Optional[float] = None) -> Any:
+        """
+        在没有运行事件循环的线程 (如执行器线程) 中同步获取依赖实例。
 
-        new_creating_instances = creating_instances.copy()
-        new_creating_instances.add(name)
-        token = _creating_instances_ctx.set(new_creating_instances)
+        - 由 run_in_executor() 派发的线程：解析提交回派发时的事件循环，当前线程阻塞等待
+        - 其他线程：在新的事件循环中解析，单例仍与其他线程/事件循环共享
+
+        :raises RuntimeError: 在事件循环线程中调用 (会阻塞事件循环)
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("不能在事件循环线程中调用 get_sync()，请使用 await get()")
+        loop = _owner_loop_ctx.get()
+        if loop is not None and loop.is_running():
+            return asyncio.run_coroutine_threadsafe(self.get(target, context_instances), loop).result(timeout)
+        return asyncio.run(self._get_in_new_loop(target, context_instances, timeout))
+
+    async def _get_in_new_loop(self, target: Type, context_instances: Optional[Dict[str,Type]], timeout: Optional[float]) -> Any:
+        """在 get_sync() 创建的临时事件循环中解析，循环结束前关闭并移除绑定到该循环的对象池"""
+        try:
+            return await asyncio.wait_for(self.get(target, context_instances), timeout)
+        finally:
+            await self._close_loop_pools(asyncio.get_running_loop())
+
+    async def _close_loop_pools(self, loop: asyncio.AbstractEventLoop):
+        with self._threading_lock:
+            pools = [self._pools.pop(key) for key in list(self._pools) if key[1] is loop]
+        for pool in pools:
+            try:
+                await pool.close()
+            except DisposeException as e:
+                self.logger.warning(f"关闭对象池 {pool.name} 失败: {e.message}")
+
+    async def _resolve(self, plan: ResolutionPlan, context_instances: Optional[Dict[str,Type]] = None, requested: Any = None) -> Any:
+        """
+        按解析计划获取实例，计划中已包含实现类、名称和作用域。
+
+        :param requested: 请求的类型 (可能是接口)，激活钩子执行后据此重新获取计划，默认为计划的实现类
+        """
+        name = plan.name
+        scope = plan.scope
+        metrics = self.metrics
+        # 快速路径：已缓存的单例和作用域实例无需加锁，也无需循环依赖检测
+        if plan.has_instance:
+            if metrics is not None:
+                metrics.record_hit(name, scope)
+            return plan.instance
+        if scope == SINGLETON:
+            if plan.shared and self._parent is not None:
+                # 共享单例交给根容器，根容器缓存命中时 O(1) 返回
+                return await self._root._resolve(plan, context_instances, requested)
+            instance = self._singletons.get(name, _MISSING)
+            if instance is not _MISSING:
+                if metrics is not None:
+                    metrics.record_hit(name, scope)
+                return instance
+        elif scope == SCOPED:
+            instance = self._scoped_context.get(name)
+            if instance is not None:
+                if metrics is not None:
+                    metrics.record_hit(name, scope)
+                return instance
+
+        parent = _resolution_path_ctx.get()
+        if parent is not None and parent.contains(name):
+            raise CircularDependencyException(name, parent.cycle(name))
+        hook = self._root._activation_hook
+        if hook is not None:
+            pending = hook(*plan.services)
+            if pending is not None:
+                await pending
+                # 激活的模块可能在初始化阶段修改了注册 (如 register_factory)，按请求的类型重新获取计划
+                current = ResolutionPlan.of(plan.target if requested is None else requested)
+                if current is not plan:
+                    return await self._resolve(current, context_instances, requested)
+        node = _ResolutionPath(name, parent)
+        token = _resolution_path_ctx.set(node)
+        start = time.perf_counter() if metrics is not None else 0.0
 
         try:
-            scope = target._di_scope
+            target = plan.target
             if scope == SINGLETON:
-                with self._threading_lock:
-                    if name not in self._singletons:
-                        self._singletons[name] = await self._create_instance(target, context_instances)
-                    return self._singletons[name]
+                instance = await self._get_or_create_singleton(plan, context_instances)
             elif scope == SCOPED:
-                instance = self._scoped_context.get(name)
-                if instance is None:
-                    instance = await self._create_instance(target, context_instances)
-                    self._scoped_context.set(name, instance)
-                return instance
+                instance = await self._create_instance(target, context_instances)
+                self._scoped_context.set(name, instance, plan)
             elif scope == TRANSIENT:
-                return await self._create_instance(target, context_instances)
+                instance = await self._create_instance(target, context_instances)
+            elif scope == POOLED:
+                instance = await self._acquire_pooled(plan, context_instances)
             else:
                 raise InvalidScopeException(target, scope)
         finally:
-            _creating_instances_ctx.reset(token)
+            _resolution_path_ctx.reset(token)
+
+        if metrics is not None:
+            metrics.record_resolve(name, scope, time.perf_counter() - start, node.names)
+        return instance
         
+    def _find_wait_cycle(self, name: str, waiting: List[str]) -> Optional[List[str]]:
+        """
+        沿等待关系查找从 name 的创建出发、最终等待 waiting 中某个单例的链路 (需持有 _threading_lock)。
+
+        :return: 从 name 到 waiting 中单例的名称列表，不存在循环等待时返回 None
+        """
+        if not waiting:
+            return None
+        targets = set(waiting)
+        chains = [[name]]
+        visited = {name}
+        while chains:
+            chain = chains.pop()
+            for waited in self._singleton_waits.get(chain[-1], ()):
+                if waited in targets:
+                    return chain + [waited]
+                if waited not in visited:
+                    visited.add(waited)
+                    chains.append(chain + [waited])
+        return None
+
+    async def _get_or_create_singleton(self, plan: ResolutionPlan, context_instances: Optional[Dict[str,Type]] = None) -> Any:
+        """
+        创建单例。
+
+        同一单例的并发首次请求共享一个创建 future，只构造一次；
+        不同单例之间互不阻塞，可以并发构造。创建失败不会被缓存，下次请求会重试。
+        future 是线程安全的 concurrent.futures.Future，其他线程或事件循环中的请求同样可以等待。
+        两个请求并发创建互相依赖的单例时，等待对方的创建会形成循环等待，此时抛出 CircularDependencyException。
+        """
+        name = plan.name
+        while True:
+            with self._threading_lock:
+                instance = self._singletons.get(name, _MISSING)
+                if instance is not _MISSING:
+                    return instance
+                future = self._singleton_futures.get(name)
+                owner = future is None
+                if owner:
+                    future = concurrent.futures.Future()
+                    self._singleton_futures[name] = future
+                    self._singleton_plans[name] = plan
+                else:
+                    # 当前链路上正在由本请求创建的单例，在等待期间都依赖 name 的创建
+                    node = _resolution_path_ctx.get()
+                    parent = node.parent if node is not None else None
+                    waiting = [] if parent is None else [waiter for waiter in parent.names() if waiter in self._singleton_futures]
+                    cycle = self._find_wait_cycle(name, waiting)
+                    if cycle is not None:
+                        names = node.names()
+                        raise CircularDependencyException(name, names[names.index(cycle[-1]):-1] + cycle)
+                    for waiter in waiting:
+                        self._singleton_waits.setdefault(waiter, []).append(name)
+
+            if not owner:
+                try:
+                    # wrap_future: 在当前事件循环中等待，不阻塞线程
+                    # shield: 等待方被取消时不影响共享的创建过程
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except asyncio.CancelledError:
+                    # 创建方被取消，由当前请求重新创建
+                    if future.cancelled():
+                        continue
+                    raise
+                finally:
+                    with self._threading_lock:
+                        for waiter in waiting:
+                            waits = self._singleton_waits[waiter]
+                            waits.remove(name)
+                            if not waits:
+                                del self._singleton_waits[waiter]
+
+            try:
+                instance = await self._create_instance(plan.target, context_instances)
+            except asyncio.CancelledError:
+                with self._threading_lock:
+                    self._singleton_futures.pop(name, None)
+                    self._singleton_plans.pop(name, None)
+                future.cancel()
+                raise
+            except Exception as e:
+                with self._threading_lock:
+                    self._singleton_futures.pop(name, None)
+                    self._singleton_plans.pop(name, None)
+                future.set_exception(e)
+                raise
+
+            with self._threading_lock:
+                self._singletons[name] = instance
+                self._singleton_futures.pop(name, None)
+            future.set_result(instance)
+            return instance
+
+    def _get_pool(self, plan: ResolutionPlan) -> ObjectPool:
+        key = (plan.name, asyncio.get_running_loop())
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._threading_lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    # 顺便移除已关闭的事件循环的对象池，避免持有已结束的循环
+                    for stale in [entry for entry in self._pools if entry[1].is_closed()]:
+                        del self._pools[stale]
+                    target = plan.target
+                    pool = ObjectPool(
+                        plan.name,
+                        min_size=getattr(target, "_pool_min_size", 0),
+                        max_size=getattr(target, "_pool_max_size", 10),
+                        idle_timeout=getattr(target, "_pool_idle_timeout", None),
+                    )
+                    self._pools[key] = pool
+        return pool
+
+    async def _acquire_pooled(self, plan: ResolutionPlan, context_instances: Optional[Dict[str,Type]] = None) -> Any:
+        """
+        从对象池借出实例，作用域结束时自动归还。
+        不在作用域内时无法归还，直接创建新实例 (与瞬时依赖相同)。
+        """
+        if not self._scoped_context.in_scope():
+            return await self._create_instance(plan.target, context_instances)
+        pool = self._get_pool(plan)
+        instance = await pool.acquire(lambda: self._create_instance(plan.target, context_instances))
+        self._scoped_context.add_lease(plan.name, lambda: pool.release(instance))
+        return instance
+
     async def _create_instance(self, target: Type, context_instances: Optional[Dict[str,Type]] = None) -> Any:
         """
-        基于注册表条目创建实例，实现全配置驱动的依赖注入。
+        按解析计划创建实例。
 
         Args:
-            name:  原始的依赖名称 (可能是 str 或 Type)。
-            class_name: 依赖的完整类路径字符串。
-            dependency_type: 依赖的注册信息。
+            target: 实现类。
+            context_instances: 额外传入构造函数的实例。
 
         Returns:
             创建的依赖实例。
         """
-        deps = target.deps or {}
-        self.logger.debug(f"创建实例: {target.__name__}({deps})")
+        plan = ResolutionPlan.of(target)
+        if plan.factory is not None:
+            return await self._call_factory(plan)
+        if plan.is_stale():
+            plan = ResolutionPlan.recompile(target)
+        self.logger.debug(f"创建实例: {target.__name__}({plan.deps_source})")
         ctor_args = {}
         if context_instances:
             for name,instance in context_instances.items():
                 ctor_args[name] = instance
-        for name, dep in deps.items():
-            ctor_args[name] =  await self.get(dep, context_instances)
-        # 3. 实例化对象
+        parallel = self.parallel_resolution if plan.parallel is None else plan.parallel
+        if parallel and len(plan.dependencies) > 1:
+            await self._resolve_batches(plan.dependency_batches(), ctor_args, context_instances, plan.dependency_types)
+        else:
+            for name, dep_plan in plan.dependencies:
+                ctor_args[name] = await self._resolve(dep_plan, context_instances, plan.dependency_types.get(name))
+        if plan.lazy_dependencies:
+            # 延迟依赖在当前上下文 (子容器、作用域) 中解析，但不属于当前解析链路
+            context = copy_context()
+            context.run(_resolution_path_ctx.set, None)
+            for name, dep_plan in plan.lazy_dependencies:
+                ctor_args[name] = LazyProxy(dep_plan.name, partial(self._resolve, dep_plan, context_instances), context)
+        metrics = self.metrics
+        start = time.perf_counter() if metrics is not None else 0.0
+        # 3. 实例化对象，构造函数不接受的依赖在构造后赋值
+        attributes = None
+        if plan.attribute_dependencies:
+            attributes = {name: ctor_args.pop(name) for name in plan.attribute_dependencies if name in ctor_args}
         instance = target(**ctor_args)
+        if attributes:
+            for name, value in attributes.items():
+                setattr(instance, name, value)
+        if metrics is not None:
+            constructed = time.perf_counter()
+            metrics.record_construct(plan.name, plan.scope, constructed - start)
 
-        # 4. 调用异步初始化方法 (如果存在)
-        if hasattr(instance, "initialize") and callable(instance.initialize):
-            if inspect.iscoroutinefunction(instance.initialize):
+        # 4. 调用初始化方法 (如果存在)，同步/异步已在计划中判断
+        if plan.initialize is not None and callable(plan.initialize):
+            if plan.initialize_is_async:
                 await instance.initialize()
             else:
                 instance.initialize()
+            if metrics is not None:
+                metrics.record_initialize(plan.name, plan.scope, time.perf_counter() - constructed)
 
         return instance
     
-    async def shutdown(self):
-        """清理所有单例资源"""
-        for name, instance in list(self._singletons.items()):
-            if hasattr(instance, "close") and callable(instance.close):
-                if inspect.iscoroutinefunction(instance.close):  # 判断是否是异步方法
-                    await instance.close()  # 异步调用
-                else:
-                    instance.close()  # 同步调用            
-            del self._singletons[name]
-            self.logger.debug(f"已清理单例: {name}")
+    async def _call_factory(self, plan: ResolutionPlan) -> Any:
+        """调用注册的工厂创建实例"""
+        metrics = self.metrics
+        start = time.perf_counter() if metrics is not None else 0.0
+        if plan.factory_is_async:
+            instance = await plan.factory()
+        else:
+            instance = plan.factory()
+        if metrics is not None:
+            metrics.record_construct(plan.name, plan.scope, time.perf_counter() - start)
+        return instance
+
+    async def _resolve_batches(self, batches, results: Dict[Any, Any], context_instances: Optional[Dict[str,Type]] = None,
+                               requested: Optional[Mapping[Any, Any]] = None):
+        """
+        按批次并发解析，批次之间保持声明顺序，结果按键写入 results。
+        requested 为键 -> 请求的类型，传给 _resolve()。
+
+        每个子任务在独立的上下文副本中运行，继承当前的循环依赖检测路径；
+        子任务中创建的作用域实例在批次结束后合并回当前上下文。
+        多个依赖失败时，按声明顺序抛出第一个异常。
+        """
+        for batch in batches:
+            if len(batch) == 1:
+                key, dep_plan = batch[0]
+                results[key] = await self._resolve(dep_plan, context_instances, requested.get(key) if requested else None)
+                continue
+
+            contexts = [copy_context() for _ in batch]
+            tasks = [
+                asyncio.create_task(
+                    self._resolve(dep_plan, context_instances, requested.get(key) if requested else None), context=context
+                )
+                for (key, dep_plan), context in zip(batch, contexts)
+            ]
+            batch_results = await asyncio.gather(*tasks, return_exceptions=True)
+            for context in contexts:
+                self._scoped_context.merge(context)
+            for (key, _), result in zip(batch, batch_results):
+                if isinstance(result, BaseException):
+                    raise result
+                results[key] = result
+
+    async def validate_and_warm(self, targets: Optional[Iterable[Type]] = None, warm: bool = True):
+        """
+        启动时检查依赖图，并可选地预先并发创建全部单例。
+
+        可作为 ModuleManager.initialize_modules 的 on_initialized 回调使用。
+
+        :param targets: 需要检查的类型，默认为全部已定义的 IDependencyBase 具体子类
+        :param warm: 是否预先创建依赖图中的全部单例
+        :raises DependencyGraphException: 存在缺失依赖、循环依赖或作用域冲突
+        """
+        validator = DependencyGraphValidator(targets)
+        errors = validator.validate()
+        if errors:
+            for error in errors:
+                self.logger.error(error)
+            raise DependencyGraphException(errors)
+        self.logger.debug(f"依赖图检查通过，共 {len(validator.plans)} 个类型")
+
+        if not warm:
+            return
+        singletons = validator.singletons()
+        results = await asyncio.gather(
+            *(self._resolve(plan) for plan in singletons), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        self.logger.debug(f"已预先创建 {len(singletons)} 个单例")
+
+    def snapshot(self) -> bytes:
+        """
+        将已创建的单例写入快照，用于加速工作进程启动。
+
+        在预热 (如 validate_and_warm) 之后调用；快照记录 build() 的环境和特性开关。
+        无法 pickle 的单例或声明 _di_snapshot = False 的单例不会写入，恢复后按需重新创建；
+        单例之间的引用只记录名称，不会把被引用的单例复制到引用方中。
+        单例可通过 __getstate__/__setstate__ 控制写入的状态。
+        """
+        with self._threading_lock:
+            singletons = dict(self._singletons)
+        data, skipped = dump_snapshot(singletons, self.environment, self.features)
+        for name in skipped:
+            self.logger.debug(f"单例 {name} 未写入快照，恢复后将重新创建")
+        self.logger.debug(f"已创建快照: {len(singletons) - len(skipped)} 个单例")
+        return data
+
+    async def restore(self, data: bytes) -> List[str]:
+        """
+        从 snapshot() 的结果恢复单例，快照只能来自可信的来源。
+
+        - 快照带有环境且注册表尚未冻结时，先按快照的环境调用 build()
+        - 已存在的同名单例保持不变，恢复的单例对其他单例的引用连接到容器中已存在的实例
+        - 引用了不可用单例 (未写入快照且容器中不存在) 的单例不会恢复，之后按需重新创建
+        - 恢复的单例按依赖顺序 (依赖项在前) 调用 on_restore 方法 (同步或异步)，
+          用于重新打开文件、套接字、连接等操作系统资源；失败的单例会从缓存中移除，
+          全部完成后统一抛出 RestoreException
+
+        :return: 恢复的单例名称
+        """
+        snapshot = load_snapshot(data)
+        if snapshot.environment is not None and self._parent is None and not ResolutionPlan.is_frozen():
+            self.build(snapshot.environment, snapshot.features)
+
+        with self._threading_lock:
+            existing = dict(self._singletons)
+        loaded, unavailable = restore_singletons(snapshot, existing)
+        for name in unavailable:
+            self.logger.debug(f"单例 {name} 引用的单例不可用，未从快照恢复，将按需重新创建")
 
+        known = {plan.name: plan for plan in ResolutionPlan.compiled().values()}
+        restored = {}
+        with self._threading_lock:
+            for name, instance in loaded.items():
+                # 反序列化期间可能已被并发创建
+                if name not in self._singletons:
+                    self._singletons[name] = instance
+                    if name in known:
+                        self._singleton_plans[name] = known[name]
+                    restored[name] = instance
+            plans = {name: self._singleton_plans[name] for name in restored if name in self._singleton_plans}
 
+        errors = []
+        for level in reversed(_dependency_levels(restored, plans)):
+            results = await asyncio.gather(
+                *(self._call_restore_hook(restored[name]) for name in level), return_exceptions=True
+            )
+            for name, result in zip(level, results):
+                if isinstance(result, BaseException):
+                    with self._threading_lock:
+                        self._singletons.pop(name, None)
+                        self._singleton_plans.pop(name, None)
+                    errors.append((name, result))
+        self.logger.debug(f"已从快照恢复 {len(restored) - len(errors)} 个单例")
+        if errors:
+            raise RestoreException(errors)
+        return list(restored)
+
+    @staticmethod
+    async def _call_restore_hook(instance: Any):
+        on_restore = getattr(instance, "on_restore", None)
+        if on_restore is not None and callable(on_restore):
+            result = on_restore()
+            if inspect.isawaitable(result):
+                await result
+
+    async def shutdown(self, timeout: Optional[float] = None):
+        """
+        清理所有单例资源和对象池。
+
+        按依赖关系逆序关闭单例，互不依赖的单例并发关闭；
+        单个单例关闭失败不会中断其他单例的清理，全部完成后统一抛出 DisposeException。
+
+        :param timeout: 每个实例关闭的超时时间 (秒)，None 表示不限制
+        """
+        with self._threading_lock:
+            singletons = dict(self._singletons)
+            plans = dict(self._singleton_plans)
+            self._singletons.clear()
+            self._singleton_plans.clear()
+            pools = list(self._pools.values())
+            self._pools.clear()
+        errors = []
+        try:
+            await dispose_instances(singletons, timeout, plans)
+        except DisposeException as e:
+            errors.extend(e.errors)
+        for name in singletons:
+            self.logger.debug(f"已清理单例: {name}")
+        for pool in pools:
+            try:
+                await pool.close(timeout)
+            except DisposeException as e:
+                errors.extend(e.errors)
+            self.logger.debug(f"已清理对象池: {pool.name}")
+        if errors:
+            raise DisposeException(errors)
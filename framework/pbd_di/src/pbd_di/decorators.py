@@ -1,5 +1,6 @@
 from .interfaces import IDependencyBase
 from .exceptions import InjectableExtensionInvalidTypeException
+from .resolution_plan import ResolutionPlan
 
 def injectable_extension(target_class, deps=None):
     """
@@ -17,10 +18,14 @@ def injectable_extension(target_class, deps=None):
         if deps:
             # 确保目标类有deps属性
             target_class.deps = {} if not hasattr(target_class, 'deps') else target_class.deps
+            if '_dependency_attrs' not in target_class.__dict__:
+                target_class._dependency_attrs = dict(target_class._dependency_attrs)
             
             for dep in deps:
                 name = target_class._get_default_dependency_name(dep)
                 target_class.deps[name] = dep
+                # 同步更新依赖类型到属性名的映射，get_dependency 只需一次字典访问
+                target_class._dependency_attrs[target_class._dependency_key(dep)] = name
         
         # === 2. 添加/覆盖方法 ===
         for name in dir(extension_module):
@@ -30,6 +35,9 @@ def injectable_extension(target_class, deps=None):
             func = getattr(extension_module, name)
             if callable(func):
                 setattr(target_class, name, func)
+
+        # === 3. 目标类已变更，丢弃已编译的解析计划 ===
+        ResolutionPlan.invalidate()
         
         return extension_module
     
@@ -0,0 +1,82 @@
+import asyncio
+import inspect
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from .exceptions import DisposeException
+from .resolution_plan import ResolutionPlan
+
+
+async def _close(name: str, instance: Any, timeout: Optional[float]) -> None:
+    close = getattr(instance, "close", None)
+    if close is None or not callable(close):
+        return
+    result = close()
+    if inspect.isawaitable(result):
+        if timeout is None:
+            await result
+        else:
+            try:
+                await asyncio.wait_for(result, timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"{name} 关闭超时 ({timeout}s)")
+
+
+def _dependency_levels(instances: Dict[str, Any], plans: Optional[Mapping[str, ResolutionPlan]] = None) -> List[List[str]]:
+    """
+    按依赖关系逆序分层：每一层中的实例不被剩余的任何实例依赖，
+    可以并发关闭；依赖项总是在依赖它的实例关闭之后才关闭。
+
+    :param plans: 实例名称 -> 容器创建该实例时使用的解析计划，
+        没有计划的实例 (如池化实例) 视为与其他实例互不依赖
+    """
+    # 按名称比较可达性，实例可能来自失效前后不同版本的计划
+    reachable = {
+        name: {dep.name for dep in plan.reachable()}
+        for name, plan in (plans or {}).items() if name in instances
+    }
+    # dependents[name]: 依赖 name 的实例集合
+    dependents = {name: set() for name in instances}
+    for name, names in reachable.items():
+        for other in instances:
+            if other != name and other in names:
+                dependents[other].add(name)
+
+    levels = []
+    remaining = list(instances)
+    while remaining:
+        level = [name for name in remaining if not dependents[name]]
+        if not level:
+            # 理论上不会出现 (循环依赖的实例无法被创建)，兜底一次性全部关闭
+            level = remaining
+        levels.append(level)
+        closed = set(level)
+        remaining = [name for name in remaining if name not in closed]
+        for name in remaining:
+            dependents[name] -= closed
+    return levels
+
+
+async def dispose_instances(instances: Dict[str, Any], timeout: Optional[float] = None,
+                            plans: Optional[Mapping[str, ResolutionPlan]] = None) -> None:
+    """
+    按依赖关系逆序关闭实例 (调用同步或异步的 close 方法)。
+
+    - 互不依赖的实例并发关闭
+    - timeout 为每个实例异步 close 的超时时间 (秒)
+    - 单个实例关闭失败不会中断其他实例的关闭，全部完成后统一抛出 DisposeException
+
+    :param instances: 名称到实例的映射
+    :param timeout: 每个实例的关闭超时时间，None 表示不限制
+    :param plans: 实例名称到解析计划的映射，用于确定依赖关系
+    :raises DisposeException: 至少一个实例关闭失败
+    """
+    errors: List[Tuple[str, BaseException]] = []
+    for level in _dependency_levels(instances, plans):
+        results = await asyncio.gather(
+            *(_close(name, instances[name], timeout) for name in level),
+            return_exceptions=True,
+        )
+        for name, result in zip(level, results):
+            if isinstance(result, BaseException):
+                errors.append((name, result))
+    if errors:
+        raise DisposeException(errors)
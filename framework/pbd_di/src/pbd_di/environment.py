@@ -0,0 +1,73 @@
+import threading
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+Condition = Callable[[str, FrozenSet[str]], bool]
+
+
+class ConditionalRegistration(NamedTuple):
+    """按环境/特性开关生效的实现注册"""
+    target: type
+    implementation: type
+    environments: Optional[FrozenSet[str]]
+    features: Optional[FrozenSet[str]]
+    condition: Optional[Condition]
+
+    def matches(self, environment: str, features: FrozenSet[str]) -> bool:
+        if self.environments is not None and environment not in self.environments:
+            return False
+        if self.features is not None and not self.features <= features:
+            return False
+        if self.condition is not None and not self.condition(environment, features):
+            return False
+        return True
+
+
+_registrations: List[ConditionalRegistration] = []
+_lock = threading.Lock()
+
+
+def register_when(target: type, environments: Optional[Iterable[str]] = None,
+                  features: Optional[Iterable[str]] = None, condition: Optional[Condition] = None):
+    """
+    类装饰器：声明实现类只在指定环境/特性开关下作为 target 的实现。
+
+    条件只在 Container.build() 时计算一次，同一 target 有多个实现满足条件时，
+    后声明的生效；未满足条件的实现不会出现在 get_all() 的结果中。
+
+    :param target: 服务类型 (通常是接口)
+    :param environments: 生效的环境名称，None 表示不限
+    :param features: 需要全部开启的特性开关，None 表示不限
+    :param condition: 额外条件，接收 (environment, features)，返回是否生效
+    """
+    if not isinstance(target, type):
+        raise TypeError("服务类型必须是类型")
+
+    def decorator(implementation: type) -> type:
+        registration = ConditionalRegistration(
+            target,
+            implementation,
+            frozenset(environments) if environments is not None else None,
+            frozenset(features) if features is not None else None,
+            condition,
+        )
+        with _lock:
+            _registrations.append(registration)
+        return implementation
+    return decorator
+
+
+def select_implementations(environment: str, features: FrozenSet[str]) -> Tuple[Dict[type, type], Set[type]]:
+    """
+    计算条件注册的结果。
+
+    :return: (服务类型 -> 选中的实现, 未被选中的条件实现)
+    """
+    with _lock:
+        registrations = list(_registrations)
+    selected: Dict[type, type] = {}
+    candidates: Set[type] = set()
+    for registration in registrations:
+        candidates.add(registration.implementation)
+        if registration.matches(environment, features):
+            selected[registration.target] = registration.implementation
+    return selected, candidates - set(selected.values())
@@ -1,11 +1,15 @@
+from typing import List, Optional, Tuple
 from pbd_core import InternalException
 
 class CircularDependencyException(InternalException):
     
-    def __init__(self, name: str):
+    def __init__(self, name: str, path: Optional[List[str]] = None):
         code = 'Circular dependency exception'
         data = {'name': name}
         message = f"检查到循环依赖： {name}"
+        if path:
+            data['path'] = path
+            message = f"检查到循环依赖： {' -> '.join(path)}"
         super().__init__(message, code=code, data=data)
 
 class InvalidScopeException(InternalException):
@@ -30,4 +34,47 @@ class InjectableExtensionInvalidTypeException(InternalException):
         code = 'Injectable extension invalid type exception'
         data = {'target': target.__name__}
         message = f"Injectable extension {target.__name__} 必须是类"
-        super().__init__(message, code=code, data=data)
\ No newline at end of file
+        super().__init__(message, code=code, data=data)
+
+class DependencyGraphException(InternalException):
+
+    def __init__(self, errors: List[str]):
+        code = 'Dependency graph exception'
+        data = {'errors': errors}
+        message = "依赖图检查失败：\n" + "\n".join(errors)
+        super().__init__(message, code=code, data=data)
+
+class DisposeException(InternalException):
+
+    def __init__(self, errors: List[Tuple[str, BaseException]]):
+        code = 'Dispose exception'
+        data = {'errors': {name: str(error) for name, error in errors}}
+        message = "关闭实例失败：" + ", ".join(name for name, _ in errors)
+        super().__init__(message, code=code, inner_exception=errors[0][1], data=data)
+        self.errors = errors
+
+class LazyResolutionException(InternalException):
+
+    def __init__(self, name: str):
+        code = 'Lazy resolution exception'
+        data = {'name': name}
+        message = f"延迟依赖 {name} 尚未解析，请先 await 该依赖"
+        super().__init__(message, code=code, data=data)
+
+class RegistryFrozenException(InternalException):
+
+    def __init__(self, target: Optional[type] = None):
+        code = 'Registry frozen exception'
+        name = getattr(target, '__name__', None)
+        data = {'target': name}
+        message = f"容器已构建，注册表已冻结，无法修改 {name} 的注册" if name else "容器已构建，注册表已冻结"
+        super().__init__(message, code=code, data=data)
+
+class RestoreException(InternalException):
+
+    def __init__(self, errors: List[Tuple[str, BaseException]]):
+        code = 'Restore exception'
+        data = {'errors': {name: str(error) for name, error in errors}}
+        message = "恢复快照失败：" + ", ".join(name for name, _ in errors)
+        super().__init__(message, code=code, inner_exception=errors[0][1], data=data)
+        self.errors = errors
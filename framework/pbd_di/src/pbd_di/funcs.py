@@ -1,3 +1,7 @@
+from .resolution_plan import ResolutionPlan
+from .lazy import Lazy
+
+
 def replace_service(source: type, target: type):
     """
     替换服务
@@ -10,8 +14,11 @@ def replace_service(source: type, target: type):
         raise TypeError("源服务类型和目标服务类型不能为空")
     if not isinstance(source, type) or not isinstance(target, type):
         raise TypeError("源服务类型和目标服务类型必须是类型")
+    # 构建后替换会让已缓存的单例与新的实现不一致
+    ResolutionPlan.ensure_not_frozen(target)
     
     setattr(target, '__di_implementation__', source)
+    ResolutionPlan.invalidate()
 
 def get_default_dependency_name(target: type):
     """
@@ -19,4 +26,7 @@ def get_default_dependency_name(target: type):
     :param target: 服务类型
     :return: 字符串，默认依赖名称
     """
+    if isinstance(target, Lazy):
+        # 延迟依赖与直接依赖使用相同的名称
+        target = target.target
     return f"{target.__module__}.{target.__qualname__}".lower()
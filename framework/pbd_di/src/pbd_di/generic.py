@@ -4,8 +4,9 @@ from typing import TypeVar
 SINGLETON = "singleton"
 TRANSIENT = "transient"
 SCOPED = "scoped"
+POOLED = "pooled"
 
-VALID_SCOPES = [SINGLETON, TRANSIENT, SCOPED]
+VALID_SCOPES = [SINGLETON, TRANSIENT, SCOPED, POOLED]
 
 
 TDependency = TypeVar("TDependency")
\ No newline at end of file
@@ -1,11 +1,23 @@
+import inspect
 from abc import ABC, abstractmethod
-from typing import Any, Type
+from typing import Any, Dict, List, Optional, Type
 from pbd_core import HasLogger
-from .generic import TDependency, SINGLETON, TRANSIENT, SCOPED
+from .generic import TDependency, SINGLETON, TRANSIENT, SCOPED, POOLED
 from .exceptions import DependencyNotFoundException
 from .funcs import get_default_dependency_name
+from .resolution_plan import ResolutionPlan
+from .lazy import Lazy
+from .autowire import autowire_hints
+
+_MISSING = object()
 
 class IReplaceableInterface:
+    """
+    可替换的接口。
+
+    接口的每个具体实现类定义时会登记到接口的 __di_implementations__ 中 (按定义顺序)，
+    最后定义的实现同时成为接口的默认实现 (__di_implementation__)。
+    """
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
 
@@ -20,7 +32,17 @@ class IReplaceableInterface:
         # 找出最接近的接口类，注册默认实现
         for base in cls.__mro__[1:]:
             if base.is_interface():
+                # 容器构建后实现已经确定，不再接受新的实现
+                ResolutionPlan.ensure_not_frozen(base)
                 base.__di_implementation__ = cls
+                if not inspect.isabstract(cls):
+                    # 只登记在接口自身上，避免子接口共享父接口的列表
+                    implementations = base.__dict__.get("__di_implementations__")
+                    if implementations is None:
+                        implementations = []
+                        base.__di_implementations__ = implementations
+                    implementations.append(cls)
+                ResolutionPlan.invalidate()
                 break
 
     @classmethod
@@ -31,6 +53,8 @@ class IReplaceableInterface:
 
 class IDependencyBase(HasLogger):
     _di_scope = None  # 可被子类重写
+    _di_autowire = False  # 为 True 时按类注解和构造函数参数注解注入依赖
+    _dependency_attrs: Dict[Any, str] = {}  # 依赖类型 -> 属性名，每个子类在定义时预先计算
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -49,6 +73,7 @@ class IDependencyBase(HasLogger):
             delattr(cls, '_deps')  # 删除原始声明
 
         cls.deps = deps
+        cls._dependency_attrs = {cls._dependency_key(dep): name for name, dep in deps.items()}
 
     def __init__(self, **kwargs):
         # 赋值依赖实例
@@ -59,11 +84,39 @@ class IDependencyBase(HasLogger):
     def _get_default_dependency_name(cls, dep_type: type) -> str:
         return get_default_dependency_name(dep_type)        
 
+    @staticmethod
+    def _dependency_key(dep: Any) -> Any:
+        """依赖在 _dependency_attrs 中的键，延迟依赖使用其目标类型"""
+        return dep.target if isinstance(dep, Lazy) else dep
+
     def get_dependency(self, dependency_type: Type[TDependency]) -> TDependency:
-        name = self._get_default_dependency_name(dependency_type)
-        if hasattr(self, name):
-            return getattr(self, name)
+        name = self._dependency_attrs.get(dependency_type)
+        if name is None:
+            name = self._find_dependency_attr(dependency_type)
+        if name is not None:
+            instance = getattr(self, name, _MISSING)
+            if instance is not _MISSING:
+                return instance
         raise DependencyNotFoundException(dependency_type)
+
+    def _find_dependency_attr(self, dependency_type: type) -> Optional[str]:
+        """
+        查找未登记在 _dependency_attrs 中的依赖 (手动赋值的默认名称属性或自动注入的注解属性)，
+        找到后登记，之后的查找只需一次字典访问。
+        """
+        cls = type(self)
+        candidates = [cls._get_default_dependency_name(dependency_type)]
+        if cls._di_autowire:
+            candidates.extend(
+                name for name, hint in autowire_hints(cls)
+                if cls._dependency_key(hint) is dependency_type
+            )
+        for name in candidates:
+            if hasattr(self, name):
+                if "_dependency_attrs" in cls.__dict__:
+                    cls._dependency_attrs[dependency_type] = name
+                return name
+        return None
     
     
 class ISingletonDependency(IDependencyBase):
@@ -75,6 +128,21 @@ class ITransientDependency(IDependencyBase):
 class IScopedDependency(IDependencyBase):
     _di_scope = SCOPED
 
+class IPooledDependency(IDependencyBase):
+    """
+    池化依赖：在作用域内从对象池借出，作用域结束时归还。
+    适用于创建代价高但不是线程安全的服务 (解析器、序列化器、客户端等)。
+    不在任何作用域内解析时，行为与瞬时依赖相同。
+    """
+    _di_scope = POOLED
+    _pool_min_size: int = 0                  # 空闲回收时至少保留的实例数
+    _pool_max_size: int = 10                 # 最多同时存在的实例数
+    _pool_idle_timeout: Optional[float] = 300  # 空闲实例的存活时间 (秒)，None 表示不回收
+
+    def reset(self):
+        """归还到对象池时调用，子类在此清理请求相关的状态，可以是异步方法"""
+        pass
+
 class IServiceProvider(ITransientDependency,IReplaceableInterface, ABC):
     """服务提供者接口 (类似 .NET 的 IServiceProvider)"""
 
@@ -82,4 +150,12 @@ class IServiceProvider(ITransientDependency,IReplaceableInterface, ABC):
     async def get(self, service_type: Type) -> Any:
         """获取指定类型的服务实例"""
         raise NotImplementedError()
+
+    async def get_many(self, *service_types: Type) -> List[Any]:
+        """按顺序获取多个服务实例，默认逐个调用 get"""
+        return [await self.get(service_type) for service_type in service_types]
+
+    async def get_all(self, service_type: Type) -> List[Any]:
+        """获取接口的全部实现实例，默认只返回 get 的结果"""
+        return [await self.get(service_type)]
    
\ No newline at end of file
@@ -0,0 +1,96 @@
+import asyncio
+from contextvars import Context
+from typing import Any, Awaitable, Callable, Optional
+from .exceptions import LazyResolutionException
+
+_MISSING = object()
+
+
+class Lazy:
+    """
+    延迟依赖声明。
+
+    在 _deps 中使用 Lazy[IFoo] 时，容器不会在构造时解析 IFoo，
+    而是注入一个 LazyProxy，await 代理时才解析真实实例。
+    依赖名称与直接声明 IFoo 相同，get_dependency(IFoo) 返回该代理。
+    """
+    __slots__ = ("target",)
+
+    def __init__(self, target: type):
+        self.target = target
+
+    def __class_getitem__(cls, target: type) -> "Lazy":
+        return cls(target)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Lazy) and other.target is self.target
+
+    def __hash__(self) -> int:
+        return hash((Lazy, self.target))
+
+    def __repr__(self) -> str:
+        return f"Lazy[{getattr(self.target, '__qualname__', self.target)}]"
+
+
+class LazyProxy:
+    """
+    延迟依赖的代理。
+
+    - await proxy 或 await proxy.resolve() 解析并返回真实实例，之后的属性访问直接转发
+    - 解析在创建代理时捕获的上下文中执行 (当前子容器、SCOPED 作用域)，与首次使用的位置无关；
+      SCOPED 依赖在其作用域结束后无法再解析
+    - 未解析时访问属性抛出 LazyResolutionException，必须先 await
+    - 代理不是真实类型的实例，isinstance 检查需要先 await 取得真实实例
+    """
+    __slots__ = ("_name", "_resolver", "_context", "_instance")
+
+    def __init__(self, name: str, resolver: Callable[[], Awaitable[Any]], context: Optional[Context] = None):
+        """
+        :param name: 依赖名称
+        :param resolver: 解析真实实例的协程函数
+        :param context: 执行解析的上下文，None 表示使用 await 时的当前上下文
+        """
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_resolver", resolver)
+        object.__setattr__(self, "_context", context)
+        object.__setattr__(self, "_instance", _MISSING)
+
+    @property
+    def resolved(self) -> bool:
+        """真实实例是否已经解析"""
+        return self._instance is not _MISSING
+
+    async def resolve(self) -> Any:
+        """解析并返回真实实例"""
+        if self._instance is _MISSING:
+            if self._context is None:
+                instance = await self._resolver()
+            else:
+                instance = await asyncio.create_task(self._resolver(), context=self._context)
+            # 并发 await 时保留先完成的实例
+            if self._instance is _MISSING:
+                object.__setattr__(self, "_instance", instance)
+        return self._instance
+
+    def _resolved_instance(self) -> Any:
+        instance = self._instance
+        if instance is _MISSING:
+            raise LazyResolutionException(self._name)
+        return instance
+
+    def __await__(self):
+        return self.resolve().__await__()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolved_instance(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._resolved_instance(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self._resolved_instance(), name)
+
+    def __repr__(self) -> str:
+        if self._instance is _MISSING:
+            return f"<LazyProxy {self._name} (未解析)>"
+        return f"<LazyProxy {self._instance!r}>"
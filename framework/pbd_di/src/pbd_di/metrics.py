@@ -0,0 +1,189 @@
+import bisect
+import heapq
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from pbd_core import HasLogger
+
+# 延迟直方图的桶上界 (秒)，最后一个桶收集超过最大上界的值
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class ResolutionEvent(NamedTuple):
+    """
+    传给监控钩子的事件。
+
+    kind:
+    - hit: 命中已缓存的单例或作用域实例
+    - resolve: 完成一次未命中缓存的解析 (包含依赖解析、构造和初始化)
+    - construct: 调用构造函数
+    - initialize: 调用 initialize 方法
+    """
+    kind: str
+    name: str
+    scope: Optional[str]
+    duration: float
+
+
+class LatencyHistogram:
+    """固定桶的延迟直方图"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        bounds = [str(bound) for bound in self.buckets] + ["+inf"]
+        return {
+            "count": self.count,
+            "total": self.total,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "buckets": dict(zip(bounds, self.counts)),
+        }
+
+
+class _TypeStats:
+    __slots__ = ("resolutions", "hits", "resolve", "construct", "initialize")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.resolutions = 0
+        self.hits = 0
+        self.resolve = LatencyHistogram(buckets)
+        self.construct = LatencyHistogram(buckets)
+        self.initialize = LatencyHistogram(buckets)
+
+
+class ResolutionMetrics(HasLogger):
+    """
+    容器解析指标。
+
+    通过 Container.enable_metrics() 启用，记录：
+    - 每个类型的解析次数和缓存命中次数
+    - 每个作用域的缓存命中率
+    - 解析、构造、initialize 的延迟直方图
+    - 最慢的若干条解析路径
+
+    snapshot() 返回可序列化的快照；add_hook() 注册的钩子会收到每个 ResolutionEvent，
+    可用于对接外部监控系统。钩子抛出的异常只记录日志，不影响解析。
+    """
+
+    def __init__(self, slowest_size: int = 10, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        :param slowest_size: 保留最慢解析路径的数量
+        :param buckets: 延迟直方图的桶上界 (秒)
+        """
+        self.slowest_size = slowest_size
+        self.buckets = tuple(buckets)
+        self._hooks: List[Callable[[ResolutionEvent], Any]] = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空已记录的指标"""
+        with self._lock:
+            self._types: Dict[str, _TypeStats] = {}
+            self._scopes: Dict[Optional[str], List[int]] = {}   # scope -> [hits, misses]
+            self._slowest: List[Tuple[float, int, List[str]]] = []  # 小顶堆
+            self._sequence = 0
+
+    def add_hook(self, hook: Callable[[ResolutionEvent], Any]):
+        """注册监控钩子"""
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[ResolutionEvent], Any]):
+        """移除监控钩子"""
+        self._hooks.remove(hook)
+
+    def record_hit(self, name: str, scope: Optional[str]):
+        with self._lock:
+            stats = self._stats(name)
+            stats.resolutions += 1
+            stats.hits += 1
+            self._scope(scope)[0] += 1
+        self._emit("hit", name, scope, 0.0)
+
+    def record_resolve(self, name: str, scope: Optional[str], duration: float, path: Callable[[], List[str]]):
+        """
+        :param path: 返回解析路径的函数，只在进入最慢列表时调用
+        """
+        with self._lock:
+            stats = self._stats(name)
+            stats.resolutions += 1
+            stats.resolve.observe(duration)
+            self._scope(scope)[1] += 1
+            if len(self._slowest) < self.slowest_size:
+                self._sequence += 1
+                heapq.heappush(self._slowest, (duration, self._sequence, path()))
+            elif self._slowest and duration > self._slowest[0][0]:
+                self._sequence += 1
+                heapq.heapreplace(self._slowest, (duration, self._sequence, path()))
+        self._emit("resolve", name, scope, duration)
+
+    def record_construct(self, name: str, scope: Optional[str], duration: float):
+        with self._lock:
+            self._stats(name).construct.observe(duration)
+        self._emit("construct", name, scope, duration)
+
+    def record_initialize(self, name: str, scope: Optional[str], duration: float):
+        with self._lock:
+            self._stats(name).initialize.observe(duration)
+        self._emit("initialize", name, scope, duration)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回当前指标的快照"""
+        with self._lock:
+            types = {
+                name: {
+                    "resolutions": stats.resolutions,
+                    "hits": stats.hits,
+                    "resolve": stats.resolve.snapshot(),
+                    "construct": stats.construct.snapshot(),
+                    "initialize": stats.initialize.snapshot(),
+                }
+                for name, stats in self._types.items()
+            }
+            scopes = {}
+            for scope, (hits, misses) in self._scopes.items():
+                total = hits + misses
+                scopes[scope] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_ratio": hits / total if total else 0.0,
+                }
+            slowest = [
+                {"path": path, "duration": duration}
+                for duration, _, path in sorted(self._slowest, key=lambda item: (-item[0], item[1]))
+            ]
+        return {"types": types, "scopes": scopes, "slowest": slowest}
+
+    def _stats(self, name: str) -> _TypeStats:
+        stats = self._types.get(name)
+        if stats is None:
+            stats = self._types[name] = _TypeStats(self.buckets)
+        return stats
+
+    def _scope(self, scope: Optional[str]) -> List[int]:
+        counters = self._scopes.get(scope)
+        if counters is None:
+            counters = self._scopes[scope] = [0, 0]
+        return counters
+
+    def _emit(self, kind: str, name: str, scope: Optional[str], duration: float):
+        if not self._hooks:
+            return
+        event = ResolutionEvent(kind, name, scope, duration)
+        for hook in list(self._hooks):
+            try:
+                hook(event)
+            except Exception as e:
+                self.logger.warning(f"监控钩子执行失败: {e}")
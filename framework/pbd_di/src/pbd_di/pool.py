@@ -0,0 +1,136 @@
+import asyncio
+import inspect
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Optional, Tuple
+from pbd_core import HasLogger
+from .disposal import dispose_instances
+from .exceptions import DisposeException
+
+
+class ObjectPool(HasLogger):
+    """
+    POOLED 作用域使用的有界对象池。
+
+    - 同时借出的实例数量不超过 max_size，池满时等待归还
+    - 借出时优先复用最近归还的实例
+    - 归还时调用实例的 reset 方法 (同步或异步)，失败的实例会被关闭并丢弃
+    - 空闲超过 idle_timeout 的实例会被关闭，但至少保留 min_size 个。
+      回收只在 acquire/release 时进行，没有定时器：长时间无人使用的池不会自动回收，
+      需要时由调用方定期调用 evict_idle()
+    - close() 之后仍在借出的实例归还时直接关闭
+    """
+
+    def __init__(self, name: str, min_size: int = 0, max_size: int = 10, idle_timeout: Optional[float] = None):
+        """
+        :param name: 池名称，即池化类型的名称
+        :param min_size: 空闲回收时至少保留的实例数
+        :param max_size: 最多同时存在的实例数
+        :param idle_timeout: 空闲实例的存活时间 (秒)，None 表示不回收
+        """
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError(f"对象池 {name} 的大小设置无效: min_size={min_size}, max_size={max_size}")
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._size = 0
+        self._closed = False
+        self._semaphore = asyncio.Semaphore(max_size)
+
+    @property
+    def size(self) -> int:
+        """池中实例总数 (空闲 + 借出)"""
+        return self._size
+
+    @property
+    def idle_count(self) -> int:
+        """空闲实例数"""
+        return len(self._idle)
+
+    async def acquire(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """借出实例，没有空闲实例时调用 factory 创建"""
+        await self._semaphore.acquire()
+        try:
+            await self.evict_idle()
+            if self._idle:
+                instance, _ = self._idle.pop()
+                return instance
+            instance = await factory()
+            self._size += 1
+            return instance
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def release(self, instance: Any):
+        """
+        归还实例。
+
+        - 池已关闭 (close() 之后) 时直接关闭实例，不再放回池中
+        - 重置失败的实例被关闭并丢弃
+        - 重置被取消等 BaseException 时实例状态未知，直接丢弃 (不调用 close)
+        """
+        if self._closed:
+            self._discard()
+            await self._dispose([instance])
+            return
+        try:
+            reset = getattr(instance, "reset", None)
+            if reset is not None and callable(reset):
+                result = reset()
+                if inspect.isawaitable(result):
+                    await result
+        except Exception as e:
+            self.logger.warning(f"对象池 {self.name} 重置实例失败，丢弃该实例: {e}")
+            self._discard()
+            await self._dispose([instance])
+            return
+        except BaseException:
+            self._discard()
+            raise
+        if self._closed:
+            # 重置期间池被关闭
+            self._discard()
+            await self._dispose([instance])
+            return
+        self._idle.append((instance, time.monotonic()))
+        self._semaphore.release()
+        await self.evict_idle()
+
+    def _discard(self):
+        """丢弃一个借出的实例：释放其占用的名额"""
+        self._size -= 1
+        self._semaphore.release()
+
+    async def evict_idle(self):
+        """关闭空闲超时的实例"""
+        if self.idle_timeout is None:
+            return
+        deadline = time.monotonic() - self.idle_timeout
+        expired = []
+        while self._idle and self._size > self.min_size and self._idle[0][1] <= deadline:
+            instance, _ = self._idle.popleft()
+            self._size -= 1
+            expired.append(instance)
+        if expired:
+            self.logger.debug(f"对象池 {self.name} 回收 {len(expired)} 个空闲实例")
+            await self._dispose(expired)
+
+    async def close(self, timeout: Optional[float] = None):
+        """关闭全部空闲实例，之后归还的实例会被直接关闭"""
+        self._closed = True
+        idle = [instance for instance, _ in self._idle]
+        self._idle.clear()
+        self._size -= len(idle)
+        await dispose_instances(self._named(idle), timeout)
+
+    async def _dispose(self, instances):
+        try:
+            await dispose_instances(self._named(instances))
+        except DisposeException as e:
+            self.logger.warning(f"对象池 {self.name} 关闭实例失败: {e.message}")
+
+    def _named(self, instances):
+        return {f"{self.name}#{index}": instance for index, instance in enumerate(instances)}
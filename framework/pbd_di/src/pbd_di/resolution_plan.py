@@ -0,0 +1,372 @@
+import inspect
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+from .generic import SINGLETON, SCOPED
+from .lazy import Lazy
+from .autowire import autowire_hints, constructor_parameters
+from .exceptions import RegistryFrozenException
+
+
+class ResolutionPlan:
+    """
+    类型的解析计划。
+
+    首次解析某个类型时编译一次，之后每次解析直接重放：
+    - 预先沿 __di_implementation__ 找到最终实现类
+    - 预先计算单例/作用域实例的存储名称
+    - 预先读取作用域
+    - 预先编译依赖树（依赖项直接指向其解析计划），Lazy[...] 声明的延迟依赖单独存放
+    - 声明 _di_autowire = True 的类额外按类注解和构造函数参数注解注入依赖，
+      以属性名/参数名作为构造参数，注入后可直接作为普通属性访问；
+      构造函数不接受的依赖 (没有同名参数也没有 **kwargs) 在构造后作为属性赋值
+    - 预先判断 initialize 是同步还是异步方法
+    - 按需计算可以并发解析的依赖分组
+
+    通过 register() 注册了工厂或实例的类型直接使用注册信息，不再读取类上的
+    作用域、依赖和 initialize，解析时也不会构造类。
+
+    Container.build() 通过 freeze() 写入按环境选中的实现，这些实现优先于
+    __di_implementation__；冻结后 replace_service 和 register() 会被拒绝。
+
+    replace_service、injectable_extension、register() 以及 IReplaceableInterface 注册实现时
+    会调用 invalidate() 清空全部计划，下一次解析时重新编译。
+    """
+    __slots__ = (
+        "target", "name", "scope", "deps_source", "dependencies", "lazy_dependencies",
+        "initialize", "initialize_is_async", "parallel", "shared",
+        "factory", "factory_is_async", "instance", "has_instance",
+        "attribute_dependencies", "dependency_types", "services", "_reachable", "_batches",
+    )
+
+    _plans: Dict[Any, "ResolutionPlan"] = {}   # 类属性，全局计划缓存
+    _implementations: Dict[Any, Tuple["ResolutionPlan", ...]] = {}  # 类属性，接口全部实现的计划缓存
+    _registrations: Dict[Any, Tuple[str, Optional[Callable[[], Any]], Any, bool, bool]] = {}  # 类属性，工厂和实例注册
+    _overrides: Mapping[Any, Any] = MappingProxyType({})  # 类属性，构建时按环境选中的实现 (只读)
+    _excluded: FrozenSet[Any] = frozenset()  # 类属性，构建时未被选中的条件实现
+    _frozen = False
+    _lock = threading.RLock()
+
+    def __init__(self, target: Any):
+        self.target = target
+        self.name = f"{target.__module__}.{target.__qualname__}"
+        # 解析到该计划的全部类型 (实现类，以及编译或 get_all 时指向它的接口)
+        self.services: Tuple[Any, ...] = (target,)
+        self.factory: Optional[Callable[[], Any]] = None
+        self.factory_is_async = False
+        self.instance: Any = None
+        self.has_instance = False
+        self._reachable: Optional[FrozenSet["ResolutionPlan"]] = None
+        self._batches: Optional[Tuple[Tuple[Tuple[str, "ResolutionPlan"], ...], ...]] = None
+        registration = self._registrations.get(target)
+        if registration is not None:
+            self._init_registration(*registration)
+            return
+        self.scope = getattr(target, "_di_scope", None)
+        self.deps_source = getattr(target, "deps", None)
+        self.dependencies: Tuple[Tuple[str, "ResolutionPlan"], ...] = ()
+        # 依赖名称 -> 声明的类型 (可能是接口)，模块激活改变注册后据此重新获取依赖的计划
+        self.dependency_types: Mapping[str, Any] = MappingProxyType({})
+        # 延迟依赖只在首次使用时解析，不参与并发分组和可达性计算
+        self.lazy_dependencies: Tuple[Tuple[str, "ResolutionPlan"], ...] = ()
+        # 构造函数不接受、需要在构造后赋值的依赖名称
+        self.attribute_dependencies: FrozenSet[str] = frozenset()
+        self.initialize = getattr(target, "initialize", None)
+        self.initialize_is_async = (
+            self.initialize is not None and inspect.iscoroutinefunction(self.initialize)
+        )
+        # None 表示沿用容器的设置
+        self.parallel: Optional[bool] = getattr(target, "_di_parallel", None)
+        # 单例是否在子容器间共享
+        self.shared: bool = bool(getattr(target, "_di_shared", False))
+
+    def _init_registration(self, scope: str, factory: Optional[Callable[[], Any]], instance: Any, has_instance: bool, shared: bool):
+        self.scope = scope
+        self.deps_source = None
+        self.dependencies = ()
+        self.dependency_types = MappingProxyType({})
+        self.lazy_dependencies = ()
+        self.attribute_dependencies = frozenset()
+        self.initialize = None
+        self.initialize_is_async = False
+        self.parallel = None
+        self.shared = shared
+        self.factory = factory
+        self.factory_is_async = factory is not None and inspect.iscoroutinefunction(factory)
+        self.instance = instance
+        self.has_instance = has_instance
+
+    @property
+    def registered(self) -> bool:
+        """是否通过 register() 注册了工厂或实例"""
+        return self.factory is not None or self.has_instance
+
+    @classmethod
+    def register(cls, target: Any, scope: str = SINGLETON, factory: Optional[Callable[[], Any]] = None,
+                 instance: Any = None, has_instance: bool = False, shared: bool = False) -> None:
+        """
+        注册类型的工厂或现成实例，之后解析该类型时不再构造类。
+
+        :param target: 注册的类型 (可以是接口)
+        :param scope: 工厂创建实例的作用域
+        :param factory: 无参数的同步或异步工厂
+        :param instance: 现成实例，has_instance 为 True 时使用
+        :param shared: 单例工厂创建的实例是否在子容器间共享
+        """
+        with cls._lock:
+            cls.ensure_not_frozen(target)
+            cls._registrations[target] = (scope, factory, instance, has_instance, shared)
+            cls.invalidate()
+
+    @classmethod
+    def unregister(cls, target: Any) -> None:
+        """移除类型的工厂或实例注册"""
+        with cls._lock:
+            cls.ensure_not_frozen(target)
+            if cls._registrations.pop(target, None) is not None:
+                cls.invalidate()
+
+    @classmethod
+    def freeze(cls, overrides: Mapping[Any, Any], excluded: Iterable[Any]) -> None:
+        """写入构建时选中的实现并冻结注册表"""
+        with cls._lock:
+            if cls._frozen:
+                raise RegistryFrozenException()
+            cls._overrides = MappingProxyType(dict(overrides))
+            cls._excluded = frozenset(excluded)
+            cls._frozen = True
+            cls.invalidate()
+
+    @classmethod
+    def thaw(cls) -> None:
+        """解除冻结并清除构建结果 (用于测试或重新构建)"""
+        with cls._lock:
+            cls._overrides = MappingProxyType({})
+            cls._excluded = frozenset()
+            cls._frozen = False
+            cls.invalidate()
+
+    @classmethod
+    def is_frozen(cls) -> bool:
+        return cls._frozen
+
+    @classmethod
+    def ensure_not_frozen(cls, target: Any = None) -> None:
+        """注册表冻结后拒绝修改注册"""
+        if cls._frozen:
+            raise RegistryFrozenException(target)
+
+    @classmethod
+    def of(cls, target: Any) -> "ResolutionPlan":
+        """获取类型的解析计划，不存在时编译"""
+        plan = cls._plans.get(target)
+        if plan is None:
+            with cls._lock:
+                plan = cls._plans.get(target)
+                if plan is None:
+                    plan = cls._compile(target)
+        return plan
+
+    @classmethod
+    def compiled(cls) -> Dict[Any, "ResolutionPlan"]:
+        """当前已编译的计划 (类型 -> 计划) 的副本"""
+        with cls._lock:
+            return dict(cls._plans)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """清空全部解析计划"""
+        with cls._lock:
+            cls._plans = {}
+            cls._implementations = {}
+
+    @classmethod
+    def implementations(cls, target: Any) -> Tuple["ResolutionPlan", ...]:
+        """
+        接口全部实现的解析计划，按 _di_order (默认 0) 和定义顺序排序，结果被缓存。
+
+        接口注册了工厂或实例、或者没有登记任何实现时，只返回接口本身的计划。
+        """
+        plans = cls._implementations.get(target)
+        if plans is None:
+            with cls._lock:
+                plans = cls._implementations.get(target)
+                if plans is None:
+                    implementations = [
+                        implementation
+                        for implementation in getattr(target, "__dict__", {}).get("__di_implementations__") or ()
+                        if implementation not in cls._excluded
+                    ]
+                    if target in cls._registrations or not implementations:
+                        plans = (cls.of(target),)
+                    else:
+                        ordered = sorted(
+                            enumerate(implementations),
+                            key=lambda item: (getattr(item[1], "_di_order", 0), item[0]),
+                        )
+                        plans = []
+                        for _, implementation in ordered:
+                            plan = cls.of(implementation)
+                            plan._add_service(target)
+                            if plan not in plans:
+                                plans.append(plan)
+                        plans = tuple(plans)
+                    cls._implementations[target] = plans
+        return plans
+
+    @classmethod
+    def _compile(cls, target: Any) -> "ResolutionPlan":
+        implementation = cls._resolve_implementation(target)
+        plan = cls._plans.get(implementation)
+        if plan is None:
+            plan = cls(implementation)
+            # 先登记再编译依赖，循环依赖时依赖项直接指向已登记的计划，
+            # 循环检测交给解析阶段处理
+            cls._plans[implementation] = plan
+            plan._compile_dependencies()
+        cls._plans[target] = plan
+        plan._add_service(target)
+        return plan
+
+    def _add_service(self, target: Any) -> None:
+        if target not in self.services:
+            self.services += (target,)
+
+    @classmethod
+    def _resolve_implementation(cls, target: Any) -> Any:
+        """
+        沿构建时选中的实现和 __di_implementation__ 查找最终实现类，
+        遇到注册了工厂或实例的类型时停止
+        """
+        seen = {id(target)}
+        implementation = target
+        while True:
+            if implementation in cls._registrations:
+                return implementation
+            candidate = cls._overrides.get(implementation)
+            if candidate is None:
+                # 只读取类自身声明的 __di_implementation__：实现类会继承接口上的值，
+                # 不能据此把一个实现类解析为同一接口的另一个实现
+                declared = getattr(implementation, "__dict__", {})
+                candidate = declared.get("__di_implementation__")
+                if candidate is not None and candidate in cls._excluded:
+                    # 默认实现在构建时未被选中，回退到最后登记的未被排除的实现 (与 implementations() 一致)
+                    candidate = next(
+                        (item for item in reversed(declared.get("__di_implementations__") or ())
+                         if item not in cls._excluded),
+                        None,
+                    )
+            if candidate is None or id(candidate) in seen:
+                return implementation
+            seen.add(id(candidate))
+            implementation = candidate
+
+    def _compile_dependencies(self) -> None:
+        dependencies = []
+        dependency_types = {}
+        lazy_dependencies = []
+        for name, dep in self._declared_dependencies():
+            if isinstance(dep, Lazy):
+                lazy_dependencies.append((name, ResolutionPlan._plans.get(dep.target) or ResolutionPlan._compile(dep.target)))
+            else:
+                dependencies.append((name, ResolutionPlan._plans.get(dep) or ResolutionPlan._compile(dep)))
+                dependency_types[name] = dep
+        self.dependencies = tuple(dependencies)
+        self.dependency_types = MappingProxyType(dependency_types)
+        self.lazy_dependencies = tuple(lazy_dependencies)
+        self.attribute_dependencies = frozenset()
+        if dependencies or lazy_dependencies:
+            accepted = constructor_parameters(self.target)
+            if accepted is not None:
+                self.attribute_dependencies = frozenset(
+                    name for name, _ in dependencies + lazy_dependencies if name not in accepted
+                )
+
+    def _declared_dependencies(self):
+        items = list((self.deps_source or {}).items())
+        if getattr(self.target, "_di_autowire", False):
+            items.extend(
+                (name, hint) for name, hint in autowire_hints(self.target)
+                if self._is_dependency(hint)
+            )
+        return items
+
+    @classmethod
+    def _is_dependency(cls, hint: Any) -> bool:
+        """注解是否是容器可以解析的类型"""
+        if isinstance(hint, Lazy):
+            return True
+        return isinstance(hint, type) and (
+            getattr(hint, "_di_scope", None) is not None or hint in cls._registrations
+        )
+
+    def reachable(self) -> FrozenSet["ResolutionPlan"]:
+        """当前计划及其直接、间接依赖的全部计划"""
+        if self._reachable is None:
+            seen = set()
+            stack = [self]
+            while stack:
+                plan = stack.pop()
+                if plan in seen:
+                    continue
+                seen.add(plan)
+                stack.extend(dep for _, dep in plan.dependencies)
+            self._reachable = frozenset(seen)
+        return self._reachable
+
+    def dependency_batches(self) -> Tuple[Tuple[Tuple[str, "ResolutionPlan"], ...], ...]:
+        """
+        将依赖按声明顺序切分为若干批次，同一批次内的依赖可以并发解析。
+
+        两个依赖在以下情况下不能放在同一批次：
+        - 其中一个直接或间接依赖另一个
+        - 二者共享同一个 SCOPED 依赖 (并发创建会得到两个作用域实例)
+        """
+        if self._batches is None:
+            self._batches = self.split_batches(self.dependencies)
+        return self._batches
+
+    @classmethod
+    def split_batches(cls, items: Tuple[Tuple[Any, "ResolutionPlan"], ...]) -> Tuple[Tuple[Tuple[Any, "ResolutionPlan"], ...], ...]:
+        """将 (键, 计划) 序列按 dependency_batches 的规则切分为批次"""
+        batches = []
+        current = []
+        for key, plan in items:
+            if any(cls._conflicts(plan, other) for _, other in current):
+                batches.append(tuple(current))
+                current = []
+            current.append((key, plan))
+        if current:
+            batches.append(tuple(current))
+        return tuple(batches)
+
+    @staticmethod
+    def _conflicts(a: "ResolutionPlan", b: "ResolutionPlan") -> bool:
+        reach_a = a.reachable()
+        reach_b = b.reachable()
+        if b in reach_a or a in reach_b:
+            return True
+        return any(plan.scope == SCOPED for plan in reach_a & reach_b)
+
+    def is_stale(self) -> bool:
+        """
+        检查目标类在编译后是否被直接修改过
+        (重新赋值 deps 或 initialize)，此时需要重新编译。
+        注册的工厂和实例不读取类属性，不会过期。
+        """
+        if self.registered:
+            return False
+        return (
+            getattr(self.target, "deps", None) is not self.deps_source
+            or getattr(self.target, "initialize", None) != self.initialize
+        )
+
+    @classmethod
+    def recompile(cls, target: Any) -> "ResolutionPlan":
+        """丢弃全部计划并重新编译指定类型"""
+        with cls._lock:
+            cls.invalidate()
+            return cls._compile(target)
+
+    def __repr__(self) -> str:
+        return f"ResolutionPlan({self.name}, scope={self.scope})"
@@ -1,34 +1,116 @@
 from contextlib import asynccontextmanager
-from contextvars import ContextVar
-import inspect
-from typing import Any
+import asyncio
+from contextvars import Context, ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from .disposal import dispose_instances
+from .exceptions import DisposeException
 
 
-class ScopedContext:
-    """专门管理SCOPED作用域实例的生命周期"""
+class _ScopeStore(dict):
+    """scope() 创建的作用域存储，额外记录实例的解析计划和需要在作用域结束时归还的池化实例"""
+    __slots__ = ("plans", "leases", "closed")
+
     def __init__(self):
-        self._context = ContextVar("scoped_ctx", default={})
-    
+        super().__init__()
+        self.plans: Dict[str, Any] = {}
+        self.leases: List[Tuple[str, Callable[[], Awaitable[None]]]] = []
+        self.closed = False
+
+
+class ScopedContext:
+    """
+    专门管理SCOPED作用域实例的生命周期
+
+    每个作用域持有一个可变字典，ContextVar 中只保存该字典的引用：
+    - 写入直接修改字典，不再复制整个作用域
+    - 作用域内派生的子任务复制上下文时共享同一个字典，创建的实例对整个作用域可见
+    - 不同的 scope() 各自创建新字典，并发任务之间互相隔离
+
+    作用域结束时按依赖关系逆序关闭实例，互不依赖的实例并发关闭，
+    之后归还在作用域内借出的池化实例。
+    """
+    def __init__(self, dispose_timeout: Optional[float] = None):
+        """
+        :param dispose_timeout: 作用域结束时每个实例关闭的超时时间 (秒)，None 表示不限制
+        """
+        self.dispose_timeout = dispose_timeout
+        self._context: ContextVar[Optional[Dict[str, Any]]] = ContextVar("scoped_ctx", default=None)
+
     def get(self, name: str) -> Any:
         """获取作用域实例"""
-        return self._context.get().get(name)
-    
-    def set(self, name: str, instance: Any):
-        """设置作用域实例"""
+        instances = self._context.get()
+        if instances is None:
+            return None
+        return instances.get(name)
+
+    def set(self, name: str, instance: Any, plan: Any = None):
+        """
+        设置作用域实例
+
+        :param plan: 创建实例的解析计划，作用域结束时据此按依赖关系关闭实例
+        """
+        instances = self._context.get()
+        if instances is None:
+            # 不在任何作用域内时，为当前上下文创建存储
+            instances = {}
+            self._context.set(instances)
+        elif isinstance(instances, _ScopeStore) and instances.closed:
+            # 捕获了已结束作用域的上下文 (如延迟依赖、遗留的任务)，实例不会再被关闭
+            raise RuntimeError(f"{name} 所在的作用域已结束")
+        instances[name] = instance
+        if plan is not None and isinstance(instances, _ScopeStore):
+            instances.plans[name] = plan
+
+    def in_scope(self) -> bool:
+        """当前是否处于 scope() 块内"""
+        store = self._context.get()
+        return isinstance(store, _ScopeStore) and not store.closed
+
+    def add_lease(self, name: str, release: Callable[[], Awaitable[None]]):
+        """登记在作用域结束时执行的归还操作，必须在 scope() 块内调用"""
+        store = self._context.get()
+        if not isinstance(store, _ScopeStore) or store.closed:
+            raise RuntimeError(f"{name} 只能在作用域内借出")
+        store.leases.append((name, release))
+
+    def merge(self, context: Context):
+        """将在子上下文 (如并发解析的子任务) 中创建的作用域实例合并到当前上下文"""
+        instances = context.get(self._context, None)
+        if not instances:
+            return
         current = self._context.get()
-        self._context.set({**current, name: instance})
-    
+        if current is None:
+            self._context.set(instances)
+        elif instances is not current:
+            current.update(instances)
+            if isinstance(instances, _ScopeStore) and isinstance(current, _ScopeStore):
+                current.plans.update(instances.plans)
+
     @asynccontextmanager
     async def scope(self):
         """SCOPED作用域上下文"""
-        token = self._context.set({})
+        store = _ScopeStore()
+        token = self._context.set(store)
         try:
             yield
         finally:
-            instances = self._context.get()
-            for inst in instances.values():
-                if (close := getattr(inst, "close", None)) and callable(close):
-                    result = close()
-                    if inspect.isawaitable(result):
-                        await result
-            self._context.reset(token)
+            # 结束后作用域不再返回或接受实例，捕获了该上下文的代码不会拿到已关闭的实例
+            store.closed = True
+            instances = dict(store)
+            store.clear()
+            try:
+                errors = []
+                try:
+                    await dispose_instances(instances, self.dispose_timeout, store.plans)
+                except DisposeException as e:
+                    errors.extend(e.errors)
+                results = await asyncio.gather(
+                    *(release() for _, release in store.leases), return_exceptions=True
+                )
+                for (name, _), result in zip(store.leases, results):
+                    if isinstance(result, BaseException):
+                        errors.append((name, result))
+                if errors:
+                    raise DisposeException(errors)
+            finally:
+                self._context.reset(token)
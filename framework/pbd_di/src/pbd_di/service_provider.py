@@ -1,9 +1,17 @@
-from typing import Any, Type
+from typing import Any, List, Type
 from .interfaces import IServiceProvider
-from .container import Container
+from .container import Container, get_current_container
 
 class ServiceProvider(IServiceProvider):
 
     async def get(self, service_type: Type) -> Any:
-        """从容器获取服务实例"""
-        return await Container().get(service_type)
\ No newline at end of file
+        """从当前容器 (子容器或根容器) 获取服务实例"""
+        return await (get_current_container() or Container()).get(service_type)
+
+    async def get_many(self, *service_types: Type) -> List[Any]:
+        """从当前容器 (子容器或根容器) 一次获取多个服务实例"""
+        return await (get_current_container() or Container()).get_many(*service_types)
+
+    async def get_all(self, service_type: Type) -> List[Any]:
+        """从当前容器 (子容器或根容器) 获取接口的全部实现实例"""
+        return await (get_current_container() or Container()).get_all(service_type)
@@ -0,0 +1,120 @@
+import io
+import pickle
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+SNAPSHOT_VERSION = 2
+_MISSING = object()
+
+
+class ContainerSnapshot(NamedTuple):
+    """容器快照的内容"""
+    version: int
+    environment: Optional[str]
+    features: FrozenSet[str]
+    singletons: Dict[str, bytes]   # 单例名称 -> 该单例单独序列化的数据
+
+
+class _UnavailableSingleton(Exception):
+    """引用的单例既不在快照中，也不在目标容器中 (或存在循环引用)"""
+
+
+class _SingletonPickler(pickle.Pickler):
+    """序列化一个单例，对其他单例的引用只写入名称"""
+
+    def __init__(self, file, names: Dict[int, str], current: Any):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._names = names
+        self._current = current
+
+    def persistent_id(self, obj: Any) -> Optional[str]:
+        if obj is self._current:
+            return None
+        return self._names.get(id(obj))
+
+
+class _SingletonUnpickler(pickle.Unpickler):
+    """反序列化一个单例，按名称把对其他单例的引用连接到目标容器中的实例"""
+
+    def __init__(self, file, resolve: Callable[[str], Any]):
+        super().__init__(file)
+        self._resolve = resolve
+
+    def persistent_load(self, pid: str) -> Any:
+        return self._resolve(pid)
+
+
+def dump_snapshot(singletons: Dict[str, Any], environment: Optional[str], features: FrozenSet[str]) -> Tuple[bytes, List[str]]:
+    """
+    序列化可以 pickle 的单例。
+
+    每个单例单独序列化，对其他单例的引用 (无论是否写入快照) 只记录名称，
+    恢复时连接到目标容器中的同名实例，不会产生单例的私有副本。
+    声明 _di_snapshot = False 的单例和无法 pickle 的单例会被跳过。
+
+    :return: (快照数据, 被跳过的单例名称)
+    """
+    names = {id(instance): name for name, instance in singletons.items()}
+    included = {}
+    skipped = []
+    for name, instance in singletons.items():
+        if not getattr(instance, "_di_snapshot", True):
+            skipped.append(name)
+            continue
+        buffer = io.BytesIO()
+        try:
+            _SingletonPickler(buffer, names, instance).dump(instance)
+        except Exception:
+            skipped.append(name)
+            continue
+        included[name] = buffer.getvalue()
+    snapshot = ContainerSnapshot(SNAPSHOT_VERSION, environment, features, included)
+    return pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL), skipped
+
+
+def load_snapshot(data: bytes) -> ContainerSnapshot:
+    """反序列化快照，快照只能来自可信的来源 (pickle 会执行任意代码)"""
+    snapshot = pickle.loads(data)
+    if not isinstance(snapshot, ContainerSnapshot) or snapshot.version != SNAPSHOT_VERSION:
+        raise ValueError("无效的容器快照或快照版本不兼容")
+    return snapshot
+
+
+def restore_singletons(snapshot: ContainerSnapshot, existing: Mapping[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    反序列化快照中目标容器还没有的单例。
+
+    对其他单例的引用优先连接到 existing 中的实例，其次是同一快照中恢复的实例。
+    引用的单例两者都没有 (如 _di_snapshot = False 的单例)、或单例之间存在循环引用时，
+    该单例不会被恢复，之后按需重新创建。
+
+    :param existing: 目标容器中已存在的单例
+    :return: (恢复的单例, 无法恢复的单例名称)
+    """
+    restored: Dict[str, Any] = {}
+    loading: Set[str] = set()
+
+    def load(name: str) -> Any:
+        instance = existing.get(name, restored.get(name, _MISSING))
+        if instance is not _MISSING:
+            return instance
+        data = snapshot.singletons.get(name)
+        if data is None or name in loading:
+            raise _UnavailableSingleton(name)
+        loading.add(name)
+        try:
+            instance = _SingletonUnpickler(io.BytesIO(data), load).load()
+        finally:
+            loading.discard(name)
+        restored[name] = instance
+        return instance
+
+    unavailable = []
+    for name in snapshot.singletons:
+        if name in existing or name in restored:
+            continue
+        try:
+            load(name)
+        except _UnavailableSingleton:
+            unavailable.append(name)
+    return restored, unavailable
+
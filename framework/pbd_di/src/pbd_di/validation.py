@@ -0,0 +1,148 @@
+import inspect
+from typing import Iterable, List, Optional, Set
+from .generic import SINGLETON, SCOPED, POOLED, VALID_SCOPES
+from .interfaces import IDependencyBase, ISingletonDependency, ITransientDependency, IScopedDependency, IPooledDependency
+from .resolution_plan import ResolutionPlan
+
+_BASE_CLASSES = {IDependencyBase, ISingletonDependency, ITransientDependency, IScopedDependency, IPooledDependency}
+
+
+def get_registered_dependencies() -> List[type]:
+    """
+    获取全部已定义的 IDependencyBase 具体子类 (跳过作用域基类、抽象类和未声明作用域的类)
+    """
+    result = []
+    seen = set()
+    stack = list(reversed(IDependencyBase.__subclasses__()))
+    while stack:
+        cls = stack.pop()
+        if cls in seen:
+            continue
+        seen.add(cls)
+        stack.extend(reversed(cls.__subclasses__()))
+        if cls in _BASE_CLASSES or inspect.isabstract(cls) or cls._di_scope is None:
+            continue
+        result.append(cls)
+    return result
+
+
+class DependencyGraphValidator:
+    """
+    静态检查依赖图：
+    - 缺失的依赖 (无效作用域或没有可实例化的实现)
+    - 循环依赖 (延迟依赖不构成循环)
+    - 作用域冲突 (单例直接或经由瞬时依赖间接依赖作用域实例或池化实例，
+      池化实例依赖作用域实例)
+    """
+
+    def __init__(self, targets: Optional[Iterable[type]] = None):
+        targets = get_registered_dependencies() if targets is None else targets
+        self.roots: List[ResolutionPlan] = []
+        for target in targets:
+            plan = ResolutionPlan.of(target)
+            if plan not in self.roots:
+                self.roots.append(plan)
+        self.plans: List[ResolutionPlan] = []
+        self.errors: List[str] = []
+
+    def validate(self) -> List[str]:
+        """执行检查并返回错误信息列表"""
+        self.plans = self._collect()
+        self.errors = []
+        self._check_missing()
+        self._check_cycles()
+        self._check_scopes()
+        return self.errors
+
+    def singletons(self) -> List[ResolutionPlan]:
+        """依赖图中全部单例的解析计划"""
+        return [plan for plan in self.plans if plan.scope == SINGLETON]
+
+    def _collect(self) -> List[ResolutionPlan]:
+        plans = []
+        seen: Set[ResolutionPlan] = set()
+        for root in self.roots:
+            for plan in self._walk(root):
+                if plan not in seen:
+                    seen.add(plan)
+                    plans.append(plan)
+        return plans
+
+    @staticmethod
+    def _walk(root: ResolutionPlan) -> List[ResolutionPlan]:
+        result = []
+        seen = {root}
+        stack = [root]
+        while stack:
+            plan = stack.pop()
+            result.append(plan)
+            for _, dep in reversed(plan.dependencies + plan.lazy_dependencies):
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append(dep)
+        return result
+
+    def _check_missing(self):
+        for plan in self.plans:
+            if plan.scope not in VALID_SCOPES:
+                self.errors.append(f"无法解析 {plan.name} 的作用域 {plan.scope}")
+            elif not plan.registered and inspect.isabstract(plan.target):
+                self.errors.append(f"{plan.name} 没有可实例化的实现")
+
+    def _check_cycles(self):
+        # 迭代 DFS，白/灰/黑三色标记，灰色节点组成当前路径
+        visiting, done = 1, 2
+        state = {}
+        reported = set()
+        for start in self.plans:
+            if start in state:
+                continue
+            state[start] = visiting
+            path = [start]
+            stack = [iter(start.dependencies)]
+            while stack:
+                item = next(stack[-1], None)
+                if item is None:
+                    stack.pop()
+                    state[path.pop()] = done
+                    continue
+                dep = item[1]
+                dep_state = state.get(dep)
+                if dep_state == visiting:
+                    cycle = path[path.index(dep):]
+                    key = frozenset(cycle)
+                    if key not in reported:
+                        reported.add(key)
+                        names = " -> ".join(plan.name for plan in cycle + [dep])
+                        self.errors.append(f"检查到循环依赖： {names}")
+                elif dep_state is None:
+                    state[dep] = visiting
+                    path.append(dep)
+                    stack.append(iter(dep.dependencies))
+
+    def _check_scopes(self):
+        for plan in self.plans:
+            if plan.scope == SINGLETON:
+                self._check_captive(plan, (SCOPED, POOLED), "单例")
+            elif plan.scope == POOLED:
+                self._check_captive(plan, (SCOPED,), "池化实例")
+
+    def _check_captive(self, owner: ResolutionPlan, captive_scopes, label: str):
+        """检查 owner 是否经由瞬时依赖捕获了生命周期更短的实例 (延迟依赖同样会被捕获)"""
+        # 沿瞬时依赖向下查找，遇到单例/作用域/池化实例时停止 (由其自身检查)
+        parents = {owner: None}
+        queue = [owner]
+        while queue:
+            plan = queue.pop(0)
+            for _, dep in plan.dependencies + plan.lazy_dependencies:
+                if dep in parents:
+                    continue
+                parents[dep] = plan
+                if dep.scope in captive_scopes:
+                    chain = [dep]
+                    while parents[chain[-1]] is not None:
+                        chain.append(parents[chain[-1]])
+                    names = " -> ".join(p.name for p in reversed(chain))
+                    self.errors.append(f"{label} {owner.name} 依赖生命周期更短的实例: {names}")
+                elif dep.scope not in (SINGLETON, SCOPED, POOLED):
+                    queue.append(dep)
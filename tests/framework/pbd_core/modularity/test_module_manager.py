@@ -1,7 +1,14 @@
+import asyncio
+import importlib
+import json
+import os
+import sys
+import tempfile
+import types
 import unittest
 from unittest import mock,IsolatedAsyncioTestCase
 from unittest.mock import Mock, patch
-from pbd_core import ModuleManager, ModuleLoadError
+from pbd_core import ModuleManager, ModuleLoadError, PbdModuleBase
 
 class TestModuleManager(IsolatedAsyncioTestCase):
     def setUp(self):
@@ -96,6 +103,38 @@ class TestModuleManager(IsolatedAsyncioTestCase):
             mock_logger.info.assert_called_with(f"开始收集模块依赖并拓扑排序，根模块: RootModule")
             mock_logger.error.assert_called()
 
+    def test_topo_sort_cycle_path_is_ordered(self):
+        self.mod_c._deps = [self.mod_a]
+        with patch('pbd_core.ModuleManager.logger'):
+            with self.assertRaises(ModuleLoadError) as context:
+                self.manager.collect_and_sort()
+        self.assertEqual(context.exception.data, {'cycle': ['ModuleA', 'ModuleB', 'ModuleC', 'ModuleA']})
+        self.assertEqual(context.exception.message, "循环依赖检测到模块链路: ModuleA -> ModuleB -> ModuleC -> ModuleA")
+        self.assertNotIn(self.root_module, ModuleManager._order_cache)
+
+    def test_topo_sort_deep_chain(self):
+        modules = [type('Module0', (PbdModuleBase,), {'_deps': []})]
+        for index in range(1, 5000):
+            modules.append(type(f'Module{index}', (PbdModuleBase,), {'_deps': [modules[-1]]}))
+        order = ModuleManager(modules[-1]).collect_and_sort()
+        self.assertEqual(order, modules)
+
+    def test_collect_and_sort_cached(self):
+        with patch('pbd_core.ModuleManager.logger'):
+            first = list(self.manager.collect_and_sort())
+        manager = ModuleManager(self.root_module)
+        with patch('pbd_core.ModuleManager.logger') as mock_logger:
+            self.assertEqual(manager.collect_and_sort(), first)
+            mock_logger.info.assert_not_called()
+        self.assertEqual(manager._visited, set(first))
+
+        # 修改依赖后需要清空缓存
+        self.mod_c._deps = [self.root_module]
+        ModuleManager.clear_cache()
+        with patch('pbd_core.ModuleManager.logger'):
+            with self.assertRaises(ModuleLoadError):
+                manager.collect_and_sort()
+
     async def test_initialize_modules_happy_path(self):
         # 准备模拟模块类
         for mod in [self.root_module, self.mod_a, self.mod_b, self.mod_c]:
@@ -180,6 +219,290 @@ class TestModuleManager(IsolatedAsyncioTestCase):
             # 不应该有error日志，因为异常是直接抛出的
             mock_logger.error.assert_not_called()
 
+    async def test_initialize_modules_with_on_initialized(self):
+        for mod in [self.root_module, self.mod_a, self.mod_b, self.mod_c]:
+            mod.return_value = Mock()
+
+        for callback in [Mock(return_value=None), mock.AsyncMock()]:
+            with patch('pbd_core.ModuleManager.logger') as mock_logger:
+                await self.manager.initialize_modules(on_initialized=callback)
+                callback.assert_called_once_with()
+                mock_logger.info.assert_any_call("执行模块初始化完成回调")
+                if isinstance(callback, mock.AsyncMock):
+                    callback.assert_awaited_once()
+
+
+class TestModuleManagerParallel(IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Root 依赖 A、B，A、B 都依赖 Core
+        self.events = []
+        self.running = 0
+        self.max_running = 0
+        manager_test = self
+
+        def make_module(name, deps):
+            async def configure(self):
+                manager_test.running += 1
+                manager_test.max_running = max(manager_test.max_running, manager_test.running)
+                manager_test.events.append(f"start {name}")
+                await asyncio.sleep(0.01)
+                manager_test.events.append(f"end {name}")
+                manager_test.running -= 1
+            return type(name, (PbdModuleBase,), {'_deps': deps, 'configure': configure})
+
+        self.core = make_module('Core', [])
+        self.mod_a = make_module('ModuleA', [self.core])
+        self.mod_b = make_module('ModuleB', [self.core])
+        self.root = make_module('Root', [self.mod_a, self.mod_b])
+
+    def test_group_levels(self):
+        order = ModuleManager(self.root).collect_and_sort()
+        self.assertEqual(
+            ModuleManager.group_levels(order),
+            [[self.core], [self.mod_a, self.mod_b], [self.root]],
+        )
+
+    async def test_parallel_phase_by_level(self):
+        manager = ModuleManager(self.root, parallel=True)
+        instances = await manager.initialize_modules()
+        self.assertEqual(len(instances), 4)
+        self.assertEqual(self.max_running, 2)
+        self.assertEqual(self.events[:2], ["start Core", "end Core"])
+        self.assertEqual(set(self.events[2:4]), {"start ModuleA", "start ModuleB"})
+        self.assertEqual(self.events[-2:], ["start Root", "end Root"])
+
+    async def test_parallel_max_concurrency(self):
+        manager = ModuleManager(self.root, parallel=True, max_concurrency=1)
+        await manager.initialize_modules()
+        self.assertEqual(self.max_running, 1)
+
+    async def test_parallel_errors_are_deterministic(self):
+        async def fail_a(self):
+            await asyncio.sleep(0.02)
+            raise ValueError("ModuleA 配置错误")
+
+        async def fail_b(self):
+            raise KeyError("ModuleB 配置错误")
+
+        self.mod_a.configure = fail_a
+        self.mod_b.configure = fail_b
+        manager = ModuleManager(self.root, parallel=True)
+        with patch('pbd_core.ModuleManager.logger') as mock_logger:
+            with self.assertRaises(ValueError):
+                await manager.initialize_modules()
+            self.assertEqual(mock_logger.error.call_count, 2)
+        self.assertNotIn("start Root", self.events)
+
+    async def test_startup_report(self):
+        manager = ModuleManager(self.root, parallel=True)
+        with self.assertRaises(RuntimeError):
+            manager.startup_report()
+        with tempfile.TemporaryDirectory() as directory:
+            trace_file = os.path.join(directory, 'startup.json')
+            await manager.initialize_modules(trace_file=trace_file)
+            with open(trace_file, encoding='utf-8') as file:
+                names = [event['name'] for event in json.load(file)['traceEvents']]
+        self.assertIn('ModuleA.configure', names)
+        self.assertIn('Root.instantiate', names)
+
+        report = manager.startup_report()
+        self.assertGreater(report['total'], 0)
+        self.assertGreaterEqual(report['modules']['ModuleA']['configure']['wall'], 0.01)
+        self.assertEqual(report['critical_path']['configure']['modules'][0], 'Core')
+        self.assertEqual(report['critical_path']['configure']['modules'][-1], 'Root')
+        self.assertLess(report['critical_path']['configure']['duration'], report['phases']['configure']['wall'])
+
+    def test_invalid_max_concurrency(self):
+        with self.assertRaises(ValueError):
+            ModuleManager(self.root, max_concurrency=0)
+
+
+class AdminService:
+    pass
+
+
+class TestModuleManagerLazy(IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Root 依赖 Web、Admin(延迟)；Admin 依赖 Core 和 Report，Report 只被 Admin 依赖
+        self.events = []
+        manager_test = self
+
+        def make_module(name, deps, **attrs):
+            async def configure(self):
+                manager_test.events.append(name)
+            return type(name, (PbdModuleBase,), {'_deps': deps, 'configure': configure, **attrs})
+
+        self.core = make_module('Core', [])
+        self.report = make_module('Report', [self.core])
+        self.admin = make_module('Admin', [self.core, self.report], _lazy=True, _services=[AdminService])
+        self.web = make_module('Web', [self.core])
+        self.root = make_module('Root', [self.web, self.admin])
+        self.manager = ModuleManager(self.root)
+
+    async def test_lazy_modules_are_deferred(self):
+        instances = await self.manager.initialize_modules()
+        self.assertEqual(set(instances), {self.core, self.web, self.root})
+        self.assertEqual(self.manager.deferred_modules, [self.report, self.admin])
+        self.assertEqual(self.events, ['Core', 'Web', 'Root'])
+        self.assertIsNone(self.manager.activate_for(str))
+
+    async def test_activate_for_service(self):
+        instances = await self.manager.initialize_modules()
+        await self.manager.activate_for(AdminService)
+        self.assertEqual(self.events[3:], ['Report', 'Admin'])
+        self.assertIn(self.admin, instances)
+        self.assertEqual(self.manager.deferred_modules, [])
+        self.assertIsNone(self.manager.activate_for(AdminService))
+        self.assertIn('Admin', self.manager.startup_report()['modules'])
+
+    async def test_activate_for_service_subclass(self):
+        await self.manager.initialize_modules()
+        # 只请求实现类时同样激活声明了接口的模块
+        implementation = type('AdminServiceImpl', (AdminService,), {})
+        await self.manager.activate_for(implementation)
+        self.assertIn('Admin', self.events)
+
+    async def test_services_default_to_module_package(self):
+        self.admin._services = []
+        await self.manager.initialize_modules()
+        # 测试模块与 AdminService 定义在同一个包中
+        await self.manager.activate_for(AdminService)
+        self.assertIn('Admin', self.events)
+
+    async def test_services_of_package_init_module(self):
+        # 定义在 app_pkg/orders/__init__.py 中的模块只认领 app_pkg.orders，而不是整个 app_pkg
+        package = types.ModuleType('app_pkg.orders')
+        package.__path__ = []
+        self.addCleanup(sys.modules.pop, 'app_pkg.orders', None)
+        sys.modules['app_pkg.orders'] = package
+        self.admin._services = []
+        self.admin.__module__ = 'app_pkg.orders'
+        await self.manager.initialize_modules()
+        billing = type('Billing', (), {'__module__': 'app_pkg.billing'})
+        orders = type('Orders', (), {'__module__': 'app_pkg.orders.services'})
+        self.assertIsNone(self.manager.activate_for(billing))
+        await self.manager.activate_for(billing, orders)
+        self.assertIn('Admin', self.events)
+
+    async def test_duplicate_package_owners(self):
+        self.admin._services = []
+        other = type('OtherAdmin', (PbdModuleBase,), {'_lazy': True})
+        self.root._deps = [self.web, self.admin, other]
+        with self.assertRaises(ModuleLoadError):
+            await self.manager.initialize_modules()
+
+    async def test_concurrent_activation_runs_once(self):
+        await self.manager.initialize_modules()
+        await asyncio.gather(*(self.manager.activate(self.admin) for _ in range(3)))
+        self.assertEqual(self.events.count('Admin'), 1)
+        self.assertEqual(self.events.count('Report'), 1)
+
+    async def test_failed_activation_is_retried(self):
+        attempts = []
+
+        async def configure(module):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ValueError("Admin 配置错误")
+
+        self.admin.configure = configure
+        await self.manager.initialize_modules()
+        with self.assertRaises(ValueError):
+            await self.manager.activate_for(AdminService)
+        self.assertIn(self.admin, self.manager.deferred_modules)
+        await self.manager.activate_for(AdminService)
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(self.events.count('Report'), 1)
+
+    async def test_reentrant_activation(self):
+        manager = self.manager
+
+        async def configure(module):
+            # 模块初始化时解析自身服务，不应等待自身激活完成
+            await manager.activate_for(AdminService)
+
+        self.admin.configure = configure
+        await manager.initialize_modules()
+        await asyncio.wait_for(manager.activate_for(AdminService), 1)
+        self.assertEqual(manager.deferred_modules, [])
+
+    async def test_activate_before_initialize(self):
+        with self.assertRaises(RuntimeError):
+            await self.manager.activate(self.admin)
+
+
+MANIFEST_MODULES = '''
+from pbd_core import PbdModuleBase
+
+class CoreModule(PbdModuleBase):
+    pass
+
+class WebModule(PbdModuleBase):
+    _deps = [CoreModule]
+
+class RootModule(PbdModuleBase):
+    _deps = [WebModule, CoreModule]
+'''
+
+
+class TestModuleManagerManifest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        package = os.path.join(self.directory.name, 'manifest_app')
+        os.mkdir(package)
+        open(os.path.join(package, '__init__.py'), 'w').close()
+        self.source = os.path.join(package, 'modules.py')
+        with open(self.source, 'w', encoding='utf-8') as file:
+            file.write(MANIFEST_MODULES)
+        sys.path.insert(0, self.directory.name)
+        self.addCleanup(sys.path.remove, self.directory.name)
+        self.addCleanup(lambda: [sys.modules.pop(name) for name in list(sys.modules) if name.startswith('manifest_app')])
+        self.addCleanup(ModuleManager.clear_cache)
+        self.modules = importlib.import_module('manifest_app.modules')
+        self.manifest_file = os.path.join(self.directory.name, 'cache', 'modules.json')
+
+    def manager(self):
+        ModuleManager.clear_cache()
+        return ModuleManager(self.modules.RootModule, manifest_file=self.manifest_file)
+
+    def test_manifest_written_and_reused(self):
+        order = list(self.manager().collect_and_sort())
+        with open(self.manifest_file, encoding='utf-8') as file:
+            manifest = json.load(file)
+        self.assertEqual(manifest['modules'], [
+            'manifest_app.modules:CoreModule', 'manifest_app.modules:WebModule', 'manifest_app.modules:RootModule',
+        ])
+
+        manager = self.manager()
+        with patch.object(manager, '_topo_sort') as topo_sort:
+            self.assertEqual(manager.collect_and_sort(), order)
+        topo_sort.assert_not_called()
+
+    def test_manifest_invalidated_by_source_change(self):
+        self.manager().collect_and_sort()
+        with open(self.source, 'a', encoding='utf-8') as file:
+            file.write('\n# changed\n')
+        manager = self.manager()
+        with patch.object(manager, '_topo_sort', wraps=manager._topo_sort) as topo_sort:
+            manager.collect_and_sort()
+        topo_sort.assert_called_once()
+
+    def test_corrupted_manifest_falls_back(self):
+        os.makedirs(os.path.dirname(self.manifest_file))
+        with open(self.manifest_file, 'w', encoding='utf-8') as file:
+            file.write('{')
+        order = self.manager().collect_and_sort()
+        self.assertEqual(order[-1], self.modules.RootModule)
+        with open(self.manifest_file, encoding='utf-8') as file:
+            self.assertEqual(len(json.load(file)['modules']), 3)
+
+    def test_local_modules_not_persisted(self):
+        Local = type('Local', (PbdModuleBase,), {})
+        Local.__qualname__ = 'test.<locals>.Local'
+        ModuleManager(Local, manifest_file=self.manifest_file).collect_and_sort()
+        self.assertFalse(os.path.exists(self.manifest_file))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+import unittest
+from pbd_core import StartupProfile, PbdModuleBase
+
+
+class TestStartupProfile(unittest.TestCase):
+    def setUp(self):
+        self.core = type('Core', (PbdModuleBase,), {'_deps': []})
+        self.mod_a = type('ModuleA', (PbdModuleBase,), {'_deps': [self.core]})
+        self.mod_b = type('ModuleB', (PbdModuleBase,), {'_deps': [self.core]})
+        self.root = type('Root', (PbdModuleBase,), {'_deps': [self.mod_a, self.mod_b]})
+
+        self.profile = StartupProfile()
+        self.profile.set_modules([self.core, self.mod_a, self.mod_b, self.root])
+        base = self.profile.started_at
+        for module, start, wall in [('Core', 0.0, 1.0), ('ModuleA', 1.0, 3.0), ('ModuleB', 1.0, 2.0), ('Root', 4.0, 0.5)]:
+            self.profile.record(module, 'configure', base + start, wall, wall / 2)
+        self.profile.record('Core', StartupProfile.INSTANTIATE, base, 0.1, 0.1)
+
+    def test_critical_path(self):
+        path = self.profile.critical_path('configure')
+        self.assertEqual(path['modules'], ['Core', 'ModuleA', 'Root'])
+        self.assertAlmostEqual(path['duration'], 4.5)
+
+    def test_report(self):
+        self.profile.finish()
+        report = self.profile.report(slowest=2)
+        self.assertAlmostEqual(report['phases']['configure']['wall'], 6.5)
+        self.assertAlmostEqual(report['phases']['configure']['cpu'], 3.25)
+        self.assertEqual(report['modules']['ModuleB']['configure']['wall'], 2.0)
+        self.assertNotIn(StartupProfile.INSTANTIATE, report['critical_path'])
+        self.assertAlmostEqual(report['critical_path_duration'], 4.5)
+        self.assertEqual([item['module'] for item in report['slowest']], ['ModuleA', 'ModuleB'])
+
+    def test_chrome_trace(self):
+        trace = self.profile.to_chrome_trace()
+        events = {event['name']: event for event in trace['traceEvents']}
+        self.assertEqual(events['ModuleA.configure']['ts'], 1e6)
+        self.assertEqual(events['ModuleA.configure']['dur'], 3e6)
+        # 并发的 ModuleA、ModuleB 分配在不同泳道
+        self.assertNotEqual(events['ModuleA.configure']['tid'], events['ModuleB.configure']['tid'])
+        self.assertEqual(events['Root.configure']['tid'], events['Core.configure']['tid'])
+
+    def test_write_chrome_trace(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace', 'startup.json')
+            self.profile.write_chrome_trace(path)
+            with open(path, encoding='utf-8') as file:
+                self.assertEqual(len(json.load(file)['traceEvents']), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import unittest
+from typing import ClassVar
+from pbd_di import Container, ISingletonDependency, ITransientDependency, Lazy, LazyProxy
+from pbd_di.autowire import autowire_hints
+
+
+class AutowireRepository(ISingletonDependency):
+    pass
+
+
+class AutowireClock(ITransientDependency):
+    pass
+
+
+class AutowireHandler(ITransientDependency):
+    _di_autowire = True
+    repository: AutowireRepository
+    clock: Lazy[AutowireClock]
+    title: str
+    counter: ClassVar[int] = 0
+
+
+class AutowireConstructorHandler(ITransientDependency):
+    _di_autowire = True
+
+    def __init__(self, repository: AutowireRepository, **kwargs):
+        super().__init__(**kwargs)
+        self.injected = repository
+
+
+class AutowireStrictHandler(ITransientDependency):
+    _di_autowire = True
+    repository: AutowireRepository
+
+    def __init__(self, clock: AutowireClock):
+        self.clock = clock
+
+
+class AutowireBrokenHandler(ITransientDependency):
+    _di_autowire = True
+    repository: UndefinedRepository  # noqa: F821
+
+
+class PlainHandler(ITransientDependency):
+    repository: AutowireRepository
+
+
+class TestAutowire(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        Container._instance = None
+        self.container = Container()
+
+    def test_type_hints_cached(self):
+        hints = autowire_hints(AutowireHandler)
+        self.assertIs(autowire_hints(AutowireHandler), hints)
+        self.assertEqual(dict(hints)['repository'], AutowireRepository)
+        self.assertEqual(dict(hints)['clock'], Lazy[AutowireClock])
+        self.assertNotIn('counter', dict(hints))
+
+    async def test_inject_class_annotations(self):
+        handler = await self.container.get(AutowireHandler)
+        self.assertIs(handler.repository, await self.container.get(AutowireRepository))
+        self.assertIsInstance(handler.clock, LazyProxy)
+        self.assertIsInstance(await handler.clock, AutowireClock)
+        self.assertFalse(hasattr(handler, 'title'))
+
+    async def test_inject_constructor_parameters(self):
+        handler = await self.container.get(AutowireConstructorHandler)
+        self.assertIs(handler.injected, await self.container.get(AutowireRepository))
+
+    async def test_dependencies_not_accepted_by_constructor(self):
+        # 构造函数没有 **kwargs，类注解声明的依赖在构造后赋值
+        handler = await self.container.get(AutowireStrictHandler)
+        self.assertIsInstance(handler.clock, AutowireClock)
+        self.assertIs(handler.repository, await self.container.get(AutowireRepository))
+
+    def test_unresolvable_annotation(self):
+        with self.assertRaises(NameError):
+            autowire_hints(AutowireBrokenHandler)
+
+    async def test_autowire_is_opt_in(self):
+        handler = await self.container.get(PlainHandler)
+        self.assertFalse(hasattr(handler, 'repository'))
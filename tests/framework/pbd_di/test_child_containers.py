@@ -0,0 +1,82 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock
+from pbd_di import Container, ChildContainerCache, ISingletonDependency, get_current_container
+
+
+class TestChildContainerCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.TenantService = type('TenantService', (ISingletonDependency,), {'close': AsyncMock()})
+
+    async def test_get_creates_isolated_children(self):
+        cache = ChildContainerCache()
+        tenant1 = await cache.get("t1")
+        tenant2 = await cache.get("t2")
+        self.assertIs(await cache.get("t1"), tenant1)
+        self.assertIs(tenant1.parent, Container())
+        self.assertIsNot(await tenant1.get(self.TenantService), await tenant2.get(self.TenantService))
+        self.assertEqual(len(cache), 2)
+
+    async def test_lru_eviction_shuts_down(self):
+        cache = ChildContainerCache(max_size=2)
+        tenant1 = await cache.get("t1")
+        service = await tenant1.get(self.TenantService)
+        await cache.get("t2")
+        await cache.get("t1")  # t1 变为最近使用
+        await cache.get("t3")
+        self.assertIn("t1", cache)
+        self.assertNotIn("t2", cache)
+        self.assertIn("t3", cache)
+
+        await cache.get("t4")
+        self.assertNotIn("t1", cache)
+        service.close.assert_awaited_once()
+
+    async def test_in_use_not_evicted(self):
+        cache = ChildContainerCache(max_size=1)
+        async with cache.use("t1") as tenant1:
+            self.assertIs(get_current_container(), tenant1)
+            await cache.get("t2")
+            self.assertIn("t1", cache)
+            self.assertIn("t2", cache)
+        self.assertIsNone(get_current_container())
+
+    async def test_concurrent_use_not_evicted_while_creating(self):
+        cache = ChildContainerCache(max_size=1)
+        tenant0 = await cache.get("t0")
+        shutdown = tenant0.shutdown
+
+        async def slow_shutdown(*args, **kwargs):
+            # 淘汰 t0 期间另一个请求进入 use("t2")
+            await asyncio.sleep(0.01)
+            await shutdown(*args, **kwargs)
+
+        tenant0.shutdown = slow_shutdown
+        used = []
+
+        async def use(key):
+            async with cache.use(key) as tenant:
+                await asyncio.sleep(0.02)
+                used.append((key, tenant, key in cache and cache._containers[key] is tenant))
+
+        await asyncio.gather(use("t1"), use("t2"))
+        self.assertEqual(sorted((key, ok) for key, _, ok in used), [("t1", True), ("t2", True)])
+
+    async def test_evict_idle(self):
+        cache = ChildContainerCache(idle_timeout=0)
+        await cache.get("t1")
+        await cache.evict_idle()
+        self.assertNotIn("t1", cache)
+
+    async def test_close(self):
+        cache = ChildContainerCache()
+        tenant1 = await cache.get("t1")
+        service = await tenant1.get(self.TenantService)
+        await cache.close()
+        self.assertEqual(len(cache), 0)
+        service.close.assert_awaited_once()
+
+    def test_invalid_max_size(self):
+        with self.assertRaises(ValueError):
+            ChildContainerCache(max_size=0)
@@ -1,8 +1,13 @@
+import asyncio
+import contextvars
+import threading
 import unittest
 from unittest.mock import AsyncMock, MagicMock, patch
 from pbd_di import (
     Container, SINGLETON, TRANSIENT,scoped_context, ISingletonDependency, IScopedDependency, ITransientDependency,
-    CircularDependencyException, InvalidScopeException, get_default_dependency_name
+    CircularDependencyException, InvalidScopeException, get_default_dependency_name,
+    IReplaceableInterface, replace_service, DependencyGraphException, IPooledDependency,
+    IServiceProvider, get_current_container
 )
 
 
@@ -112,8 +117,13 @@ class ContainerTestCase(unittest.IsolatedAsyncioTestCase):
         with self.assertRaises(CircularDependencyException) as context:
             await container.get(CircularService1)
         self.assertEqual(context.exception.code, "Circular dependency exception")
-        self.assertEqual(context.exception.data, {"name": "pbd_di.test_container.CircularService1"})
-        self.assertEqual(str(context.exception.message), "检查到循环依赖： pbd_di.test_container.CircularService1")
+        path = [
+            "pbd_di.test_container.CircularService1",
+            f"{CircularService2.__module__}.{CircularService2.__qualname__}",
+            "pbd_di.test_container.CircularService1",
+        ]
+        self.assertEqual(context.exception.data, {"name": "pbd_di.test_container.CircularService1", "path": path})
+        self.assertEqual(str(context.exception.message), f"检查到循环依赖： {' -> '.join(path)}")
 
     async def test_shutdown(self):
         container = self.container
@@ -169,5 +179,615 @@ class ContainerTestCase(unittest.IsolatedAsyncioTestCase):
             self.assertIsInstance(instance, MainService)
             self.assertIs(instance.get_dependency(MockService1), service1)  # 来自context_instances
             self.assertIsInstance(instance.get_dependency(MockService2), MockService2)  # 来自容器解析
-            
 
+    async def test_get_replaceable_interface(self):
+        container = self.container
+
+        class IService(ITransientDependency, IReplaceableInterface):
+            pass
+
+        class Service(IService):
+            pass
+
+        instance = await container.get(IService)
+        self.assertIsInstance(instance, Service)
+
+    async def test_replace_service_after_plan_compiled(self):
+        container = self.container
+        MockTransientService = self.MockTransientService
+        Replacement = type('Replacement', (ITransientDependency,), {})
+
+        self.assertIsInstance(await container.get(MockTransientService), MockTransientService)
+        replace_service(Replacement, MockTransientService)
+        self.assertIsInstance(await container.get(MockTransientService), Replacement)
+
+    async def test_concurrent_singleton_created_once(self):
+        container = self.container
+        created = 0
+
+        class SlowSingleton(ISingletonDependency):
+            async def initialize(self):
+                nonlocal created
+                created += 1
+                await asyncio.sleep(0.01)
+
+        instances = await asyncio.gather(*(container.get(SlowSingleton) for _ in range(10)))
+        self.assertEqual(created, 1)
+        self.assertTrue(all(instance is instances[0] for instance in instances))
+
+    async def test_different_singletons_created_concurrently(self):
+        container = self.container
+        a_started = asyncio.Event()
+        b_started = asyncio.Event()
+
+        class SingletonA(ISingletonDependency):
+            async def initialize(self):
+                a_started.set()
+                await b_started.wait()
+
+        class SingletonB(ISingletonDependency):
+            async def initialize(self):
+                b_started.set()
+                await a_started.wait()
+
+        # 如果单例创建被串行化，这里会超时
+        a, b = await asyncio.wait_for(
+            asyncio.gather(container.get(SingletonA), container.get(SingletonB)), timeout=1
+        )
+        self.assertIsInstance(a, SingletonA)
+        self.assertIsInstance(b, SingletonB)
+
+    async def test_concurrent_mutually_dependent_singletons(self):
+        container = self.container
+        MutualA = type('MutualA', (ISingletonDependency,), {})
+        MutualB = type('MutualB', (ISingletonDependency,), {})
+        MutualA.deps = {'mutual_b': MutualB}
+        MutualB.deps = {'mutual_a': MutualA}
+        # 每次解析前让出事件循环，使两个请求分别开始创建 MutualA 和 MutualB
+        container.set_activation_hook(lambda *services: asyncio.sleep(0.01))
+
+        results = await asyncio.wait_for(
+            asyncio.gather(container.get(MutualA), container.get(MutualB), return_exceptions=True), timeout=1
+        )
+        self.assertTrue(all(isinstance(result, CircularDependencyException) for result in results))
+        self.assertEqual(container._singleton_futures, {})
+        self.assertEqual(container._singleton_waits, {})
+
+    async def test_failed_singleton_creation_is_not_cached(self):
+        container = self.container
+        FailingSingleton = type('FailingSingleton', (ISingletonDependency,), {})
+        service = FailingSingleton()
+        with patch.object(container, '_create_instance', AsyncMock(side_effect=[ValueError("boom"), service])):
+            with self.assertRaises(ValueError):
+                await container.get(FailingSingleton)
+            self.assertIs(await container.get(FailingSingleton), service)
+            self.assertEqual(container._singleton_futures, {})
+
+    async def test_parallel_dependencies_resolved_concurrently(self):
+        container = self.container
+        a_started = asyncio.Event()
+        b_started = asyncio.Event()
+
+        class DepA(ITransientDependency):
+            async def initialize(self):
+                a_started.set()
+                await b_started.wait()
+
+        class DepB(ITransientDependency):
+            async def initialize(self):
+                b_started.set()
+                await a_started.wait()
+
+        class ParallelService(ITransientDependency):
+            _di_parallel = True
+            _deps = [DepA, DepB]
+
+        # 如果依赖被串行解析，这里会超时
+        instance = await asyncio.wait_for(container.get(ParallelService), timeout=1)
+        self.assertIsInstance(instance.get_dependency(DepA), DepA)
+        self.assertIsInstance(instance.get_dependency(DepB), DepB)
+
+    async def test_parallel_dependencies_raise_first_declared_error(self):
+        container = self.container
+
+        class DepA(ITransientDependency):
+            async def initialize(self):
+                await asyncio.sleep(0.01)
+                raise ValueError("a")
+
+        class DepB(ITransientDependency):
+            async def initialize(self):
+                raise KeyError("b")
+
+        class ParallelService(ITransientDependency):
+            _di_parallel = True
+            _deps = [DepA, DepB]
+
+        with self.assertRaises(ValueError):
+            await container.get(ParallelService)
+
+    async def test_parallel_dependencies_detect_circular_dependency(self):
+        container = self.container
+        CircularService1 = type('ParallelCircular1', (ITransientDependency,), {'_di_parallel': True})
+        CircularService2 = type('ParallelCircular2', (ITransientDependency,), {})
+        Other = type('ParallelOther', (ITransientDependency,), {})
+        CircularService1.deps = {'other': Other, 'circular_service2': CircularService2}
+        CircularService2.deps = {'circular_service1': CircularService1}
+
+        with self.assertRaises(CircularDependencyException):
+            await container.get(CircularService1)
+
+    async def test_parallel_dependencies_keep_scoped_instances(self):
+        container = self.container
+        ScopedA = type('ScopedA', (IScopedDependency,), {'close': AsyncMock()})
+        ScopedB = type('ScopedB', (IScopedDependency,), {'close': AsyncMock()})
+
+        class ParallelService(ITransientDependency):
+            _di_parallel = True
+            _deps = [ScopedA, ScopedB]
+
+        async with container._scoped_context.scope():
+            instance = await container.get(ParallelService)
+            self.assertIs(await container.get(ScopedA), instance.get_dependency(ScopedA))
+            self.assertIs(await container.get(ScopedB), instance.get_dependency(ScopedB))
+        ScopedA.close.assert_awaited_once()
+        ScopedB.close.assert_awaited_once()
+
+    async def test_scoped_hit_skips_circular_check(self):
+        container = self.container
+        MockScopedService = self.MockScopedService
+        async with container._scoped_context.scope():
+            instance = await container.get(MockScopedService)
+            with patch('pbd_di.container._resolution_path_ctx') as mock_path:
+                self.assertIs(await container.get(MockScopedService), instance)
+                mock_path.get.assert_not_called()
+                mock_path.set.assert_not_called()
+
+    async def test_validate_and_warm(self):
+        container = self.container
+        created = []
+
+        class WarmSingleton1(ISingletonDependency):
+            def initialize(self):
+                created.append(self)
+
+        class WarmSingleton2(ISingletonDependency):
+            _deps = [WarmSingleton1]
+
+            def initialize(self):
+                created.append(self)
+
+        class WarmTransient(ITransientDependency):
+            _deps = [WarmSingleton2]
+
+        await container.validate_and_warm([WarmTransient])
+        self.assertEqual(len(created), 2)
+        self.assertIs(await container.get(WarmSingleton2), created[1])
+
+    async def test_validate_and_warm_reports_errors(self):
+        container = self.container
+        Scoped = type('ValidateScoped', (IScopedDependency,), {})
+        Singleton = type('ValidateSingleton', (ISingletonDependency,), {'_deps': [Scoped]})
+
+        with self.assertRaises(DependencyGraphException) as context:
+            await container.validate_and_warm([Singleton])
+        self.assertEqual(context.exception.code, "Dependency graph exception")
+        self.assertEqual(len(context.exception.data['errors']), 1)
+        self.assertNotIn(f"{Singleton.__module__}.ValidateSingleton", container._singletons)
+
+    async def test_get_many(self):
+        container = self.container
+        Shared = type('GetManyShared', (IScopedDependency,), {})
+
+        class ServiceA(ITransientDependency):
+            _deps = [Shared]
+
+        class ServiceB(ITransientDependency):
+            _deps = [Shared]
+
+        async with container._scoped_context.scope():
+            a, b, a2 = await container.get_many(ServiceA, ServiceB, ServiceA)
+        self.assertIsInstance(a, ServiceA)
+        self.assertIsInstance(b, ServiceB)
+        self.assertIs(a, a2)  # 同一次调用中重复的类型只解析一次
+        self.assertIs(a.get_dependency(Shared), b.get_dependency(Shared))
+
+    async def test_get_many_parallel(self):
+        container = self.container
+        a_started = asyncio.Event()
+        b_started = asyncio.Event()
+
+        class ServiceA(ITransientDependency):
+            async def initialize(self):
+                a_started.set()
+                await b_started.wait()
+
+        class ServiceB(ITransientDependency):
+            async def initialize(self):
+                b_started.set()
+                await a_started.wait()
+
+        container.parallel_resolution = True
+        try:
+            a, b = await asyncio.wait_for(container.get_many(ServiceA, ServiceB), timeout=1)
+        finally:
+            container.parallel_resolution = False
+        self.assertIsInstance(a, ServiceA)
+        self.assertIsInstance(b, ServiceB)
+
+    async def test_get_pooled(self):
+        container = self.container
+        created = []
+
+        class PooledService(IPooledDependency):
+            _pool_max_size = 2
+
+            def initialize(self):
+                created.append(self)
+
+        PooledService.reset = MagicMock()
+        async with container._scoped_context.scope():
+            instance1 = await container.get(PooledService)
+            instance2 = await container.get(PooledService)
+            self.assertIsNot(instance1, instance2)  # 同一作用域内每次借出不同的实例
+        PooledService.reset.assert_called()
+        self.assertEqual(PooledService.reset.call_count, 2)
+
+        async with container._scoped_context.scope():
+            instance3 = await container.get(PooledService)
+        self.assertIn(instance3, (instance1, instance2))  # 作用域结束后实例归还并复用
+        self.assertEqual(len(created), 2)
+
+    async def test_get_pooled_outside_scope(self):
+        container = self.container
+        PooledService = type('OutsidePooledService', (IPooledDependency,), {})
+        instance1 = await container.get(PooledService)
+        instance2 = await container.get(PooledService)
+        self.assertIsNot(instance1, instance2)
+        self.assertNotIn(f"{PooledService.__module__}.OutsidePooledService", [name for name, _ in container._pools])
+
+    async def test_shutdown_closes_pools(self):
+        container = self.container
+        PooledService = type('ShutdownPooledService', (IPooledDependency,), {'close': AsyncMock()})
+        async with container._scoped_context.scope():
+            instance = await container.get(PooledService)
+        await container.shutdown()
+        instance.close.assert_awaited_once()
+        self.assertEqual(container._pools, {})
+
+    async def test_metrics(self):
+        container = self.container
+        MetricsSingleton = type('MetricsSingleton', (ISingletonDependency,), {'initialize': MagicMock()})
+
+        class MetricsService(ITransientDependency):
+            _deps = [MetricsSingleton]
+
+        metrics = container.enable_metrics()
+        events = []
+        metrics.add_hook(events.append)
+        try:
+            await container.get(MetricsService)
+            await container.get(MetricsService)
+        finally:
+            container.disable_metrics()
+        await container.get(MetricsService)
+
+        snapshot = metrics.snapshot()
+        singleton_name = f"{MetricsSingleton.__module__}.MetricsSingleton"
+        service_name = f"{MetricsService.__module__}.{MetricsService.__qualname__}"
+        self.assertEqual(snapshot["scopes"]["singleton"], {"hits": 1, "misses": 1, "hit_ratio": 0.5})
+        self.assertEqual(snapshot["types"][service_name]["construct"]["count"], 2)
+        self.assertEqual(snapshot["types"][singleton_name]["initialize"]["count"], 1)
+        self.assertEqual(snapshot["types"][service_name]["initialize"]["count"], 0)
+        self.assertIn([service_name, singleton_name], [item["path"] for item in snapshot["slowest"]])
+        self.assertEqual(len([e for e in events if e.kind == "resolve"]), 3)
+
+    async def test_child_container(self):
+        container = self.container
+        TenantSingleton = type('TenantSingleton', (ISingletonDependency,), {})
+        SharedSingleton = type('SharedSingleton', (ISingletonDependency,), {'_di_shared': True})
+        child = container.create_child()
+
+        self.assertIs(child.parent, container)
+        self.assertIsNot(await child.get(TenantSingleton), await container.get(TenantSingleton))
+        self.assertIs(await child.get(TenantSingleton), await child.get(TenantSingleton))
+        self.assertIs(await child.get(SharedSingleton), await container.get(SharedSingleton))
+        self.assertIs(await child.create_child().get(SharedSingleton), await container.get(SharedSingleton))
+
+    async def test_child_container_service_provider(self):
+        container = self.container
+        TenantSingleton = type('ProviderTenantSingleton', (ISingletonDependency,), {})
+        child = container.create_child()
+
+        service_provider = await child.get(IServiceProvider)
+        with child.activate():
+            self.assertIs(await service_provider.get(TenantSingleton), await child.get(TenantSingleton))
+        self.assertIs(await service_provider.get(TenantSingleton), await container.get(TenantSingleton))
+
+    async def test_child_container_shutdown(self):
+        container = self.container
+        TenantSingleton = type('ShutdownTenantSingleton', (ISingletonDependency,), {'close': AsyncMock()})
+        child = container.create_child()
+        root_instance = await container.get(TenantSingleton)
+        child_instance = await child.get(TenantSingleton)
+        await child.shutdown()
+        child_instance.close.assert_awaited_once()
+        self.assertIs(await container.get(TenantSingleton), root_instance)
+
+    async def test_register_factory(self):
+        container = self.container
+        Connection = type('Connection', (), {})
+        factory = MagicMock(side_effect=lambda: Connection())
+        container.register_factory(Connection, factory)
+        self.addCleanup(container.unregister, Connection)
+
+        instance = await container.get(Connection)
+        self.assertIsInstance(instance, Connection)
+        self.assertIs(await container.get(Connection), instance)
+        factory.assert_called_once_with()
+
+    async def test_register_async_factory(self):
+        container = self.container
+
+        class IConnectionPool(ISingletonDependency, IReplaceableInterface):
+            pass
+
+        class ConnectionPool(IConnectionPool):
+            initialize = MagicMock()
+
+        async def factory():
+            return ConnectionPool()
+
+        Service = type('Service', (ITransientDependency,), {'_deps': [IConnectionPool]})
+        container.register_factory(IConnectionPool, factory, scope=TRANSIENT)
+        self.addCleanup(container.unregister, IConnectionPool)
+
+        service = await container.get(Service)
+        pool = service.get_dependency(IConnectionPool)
+        self.assertIsInstance(pool, ConnectionPool)
+        self.assertIsNot(await container.get(IConnectionPool), pool)
+        ConnectionPool.initialize.assert_not_called()
+
+        container.unregister(IConnectionPool)
+        await container.get(IConnectionPool)
+        ConnectionPool.initialize.assert_called_once()
+
+    async def test_register_instance(self):
+        container = self.container
+        Settings = type('Settings', (ISingletonDependency,), {'close': AsyncMock()})
+        settings = Settings()
+        container.register_instance(Settings, settings)
+        self.addCleanup(container.unregister, Settings)
+
+        self.assertIs(await container.get(Settings), settings)
+        self.assertIs(await container.create_child().get(Settings), settings)
+        await container.shutdown()
+        settings.close.assert_not_awaited()
+
+    def test_register_factory_invalid_scope(self):
+        Connection = type('Connection', (), {})
+        with self.assertRaises(InvalidScopeException):
+            self.container.register_factory(Connection, Connection, scope='invalid')
+
+    async def test_get_all(self):
+        container = self.container
+
+        class IPlugin(ITransientDependency, IReplaceableInterface):
+            pass
+
+        class PluginA(IPlugin):
+            pass
+
+        class PluginB(IPlugin, ISingletonDependency):
+            _di_scope = SINGLETON
+            _di_order = -1
+
+        class PluginC(IPlugin):
+            pass
+
+        plugins = await container.get_all(IPlugin)
+        self.assertEqual([type(plugin) for plugin in plugins], [PluginB, PluginA, PluginC])
+        again = await container.get_all(IPlugin)
+        self.assertIs(again[0], plugins[0])
+        self.assertIsNot(again[1], plugins[1])
+        # 默认实现仍然是最后定义的实现，实现类解析为自身
+        self.assertIsInstance(await container.get(IPlugin), PluginC)
+        self.assertIsInstance(await container.get(PluginA), PluginA)
+
+    async def test_get_all_single(self):
+        container = self.container
+        self.assertEqual(len(await container.get_all(self.MockTransientService)), 1)
+
+    async def test_singleton_created_once_across_loops(self):
+        container = self.container
+        created = []
+
+        async def initialize(self):
+            created.append(threading.get_ident())
+            await asyncio.sleep(0.05)
+
+        ThreadSingleton = type('ThreadSingleton', (ISingletonDependency,), {'initialize': initialize})
+        loop = asyncio.get_running_loop()
+
+        def resolve_in_new_loop():
+            return asyncio.run(container.get(ThreadSingleton))
+
+        instances = await asyncio.gather(
+            container.get(ThreadSingleton),
+            *(loop.run_in_executor(None, resolve_in_new_loop) for _ in range(3)),
+        )
+        self.assertEqual(len(created), 1)
+        self.assertTrue(all(instance is instances[0] for instance in instances))
+        self.assertEqual(container._singleton_futures, {})
+
+    async def test_run_in_executor_propagates_scope(self):
+        container = self.container
+        ThreadScoped = type('ThreadScoped', (IScopedDependency,), {})
+        child = container.create_child()
+
+        async with container.scope():
+            instance = await container.get(ThreadScoped)
+            with child.activate():
+                result = await container.run_in_executor(
+                    lambda: (container.get_sync(ThreadScoped), get_current_container())
+                )
+        self.assertIs(result[0], instance)
+        self.assertIs(result[1], child)
+
+    async def test_get_sync_in_plain_thread(self):
+        container = self.container
+        PlainThreadSingleton = type('PlainThreadSingleton', (ISingletonDependency,), {})
+        instance = await container.get(PlainThreadSingleton)
+        result = []
+        thread = threading.Thread(target=lambda: result.append(container.get_sync(PlainThreadSingleton)))
+        thread.start()
+        await asyncio.get_running_loop().run_in_executor(None, thread.join)
+        self.assertIs(result[0], instance)
+
+    async def test_get_sync_in_event_loop(self):
+        with self.assertRaises(RuntimeError):
+            self.container.get_sync(self.MockTransientService)
+
+    async def test_pools_per_event_loop(self):
+        container = self.container
+        LoopPooledService = type('LoopPooledService', (IPooledDependency,), {'_pool_max_size': 1})
+
+        async def use_pool():
+            async with container.scope():
+                return await container.get(LoopPooledService)
+
+        await use_pool()
+        await asyncio.get_running_loop().run_in_executor(None, lambda: asyncio.run(use_pool()))
+        loops = [loop for name, loop in container._pools if name.endswith('LoopPooledService')]
+        self.assertEqual(len(loops), 2)
+
+    async def test_get_sync_drops_pools_of_temporary_loop(self):
+        container = self.container
+        SyncPooledService = type('SyncPooledService', (IPooledDependency,), {'_pool_max_size': 1})
+        async with container.scope():
+            # 复制的上下文带有作用域，get_sync 在临时事件循环中从对象池获取实例
+            context = contextvars.copy_context()
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: context.run(container.get_sync, SyncPooledService)
+            )
+        self.assertFalse([key for key in container._pools if key[0].endswith('SyncPooledService')])
+
+
+    async def test_activation_hook(self):
+        container = self.container
+        HookedSingleton = type('HookedSingleton', (ISingletonDependency,), {})
+        activated = []
+
+        async def activate():
+            activated.append(True)
+
+        container.set_activation_hook(lambda target: activate() if target is HookedSingleton else None)
+        instance = await container.get(HookedSingleton)
+        await container.create_child().get(self.MockTransientService)
+        # 命中缓存的单例不再调用钩子
+        self.assertIs(await container.get(HookedSingleton), instance)
+        self.assertEqual(activated, [True])
+        with self.assertRaises(RuntimeError):
+            container.create_child().set_activation_hook(None)
+        container.set_activation_hook(None)
+
+    async def test_activation_hook_with_lazy_module(self):
+        from pbd_core import ModuleManager, PbdModuleBase
+        container = self.container
+        ILazyOrders = type('ILazyOrders', (IReplaceableInterface,), {})
+        LazyOrders = type('LazyOrders', (ILazyOrders, ISingletonDependency), {})
+        OrdersConsumer = type('OrdersConsumer', (ITransientDependency,), {'_deps': [ILazyOrders]})
+        configured = []
+
+        class LazyOrdersModule(PbdModuleBase):
+            _lazy = True
+            _services = [ILazyOrders]
+
+            async def configure(self):
+                configured.append(await container.get(ILazyOrders))
+
+        RootOrdersModule = type('RootOrdersModule', (PbdModuleBase,), {'_deps': [LazyOrdersModule]})
+        manager = ModuleManager(RootOrdersModule)
+        await manager.initialize_modules()
+        container.set_activation_hook(manager.activate_for)
+        self.addCleanup(container.set_activation_hook, None)
+        self.assertEqual(configured, [])
+        # 按接口解析依赖时激活声明该接口的延迟模块
+        orders = (await container.get(OrdersConsumer)).get_dependency(ILazyOrders)
+        self.assertIsInstance(orders, LazyOrders)
+        self.assertEqual(configured, [orders])
+        self.assertEqual(manager.deferred_modules, [])
+
+    async def test_lazy_module_activated_by_implementation(self):
+        from pbd_core import ModuleManager, PbdModuleBase
+        from pbd_di.resolution_plan import ResolutionPlan
+        container = self.container
+        IReports = type('IReports', (IReplaceableInterface,), {})
+        Reports = type('Reports', (IReports, ISingletonDependency), {})
+        configured = []
+
+        class ReportsModule(PbdModuleBase):
+            _lazy = True
+            _services = [IReports]
+
+            def configure(self):
+                configured.append(True)
+
+        manager = ModuleManager(type('RootReportsModule', (PbdModuleBase,), {'_deps': [ReportsModule]}))
+        await manager.initialize_modules()
+        container.set_activation_hook(manager.activate_for)
+        self.addCleanup(container.set_activation_hook, None)
+        # 计划缓存中没有接口的计划时，按实现类解析也要激活模块
+        ResolutionPlan.invalidate()
+        await container.get(Reports)
+        self.assertEqual(configured, [True])
+
+    async def test_lazy_module_registration_applies_to_activating_request(self):
+        from pbd_core import ModuleManager, PbdModuleBase
+        container = self.container
+        ITunedFoo = type('ITunedFoo', (IReplaceableInterface,), {})
+        DefaultFoo = type('DefaultFoo', (ITunedFoo, ISingletonDependency), {})
+        TunedFoo = type('TunedFoo', (), {})
+        FooConsumer = type('FooConsumer', (ITransientDependency,), {'_deps': [ITunedFoo]})
+
+        class FooModule(PbdModuleBase):
+            _lazy = True
+            _services = [ITunedFoo]
+
+            def configure(self):
+                container.register_factory(ITunedFoo, lambda: TunedFoo())
+
+        manager = ModuleManager(type('RootFooModule', (PbdModuleBase,), {'_deps': [FooModule]}))
+        await manager.initialize_modules()
+        container.set_activation_hook(manager.activate_for)
+        self.addCleanup(container.set_activation_hook, None)
+        self.addCleanup(container.unregister, ITunedFoo)
+        # 触发激活的请求按激活后的注册解析，不会得到激活前的默认实现
+        foo = await container.get(ITunedFoo)
+        self.assertIsInstance(foo, TunedFoo)
+        self.assertIs(await container.get(ITunedFoo), foo)
+        self.assertIs((await container.get(FooConsumer)).get_dependency(ITunedFoo), foo)
+
+    async def test_lazy_module_registration_applies_to_dependency(self):
+        from pbd_core import ModuleManager, PbdModuleBase
+        container = self.container
+        IDepFoo = type('IDepFoo', (IReplaceableInterface,), {})
+        type('DefaultDepFoo', (IDepFoo, ISingletonDependency), {})
+        TunedFoo = type('TunedDepFoo', (), {})
+        FooConsumer = type('DepFooConsumer', (ITransientDependency,), {'_deps': [IDepFoo]})
+
+        class DepFooModule(PbdModuleBase):
+            _lazy = True
+            _services = [IDepFoo]
+
+            def configure(self):
+                container.register_factory(IDepFoo, lambda: TunedFoo())
+
+        manager = ModuleManager(type('RootDepFooModule', (PbdModuleBase,), {'_deps': [DepFooModule]}))
+        await manager.initialize_modules()
+        container.set_activation_hook(manager.activate_for)
+        self.addCleanup(container.set_activation_hook, None)
+        self.addCleanup(container.unregister, IDepFoo)
+        foo = (await container.get(FooConsumer)).get_dependency(IDepFoo)
+        self.assertIsInstance(foo, TunedFoo)
+        self.assertIs(await container.get(IDepFoo), foo)
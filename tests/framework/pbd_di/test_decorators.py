@@ -21,6 +21,14 @@ class TestInjectableExtension(unittest.TestCase):
         self.assertIn(self.MockService2, TargetClass.deps.values())
         self.assertTrue(callable(getattr(TargetClass, 'new_method')))
 
+    def test_dependency_attrs_updated(self):
+        TargetClass = self.targetClass
+        injectable_extension(TargetClass, [self.MockService1])(ExtensionModule)
+        self.assertIn(self.MockService1, TargetClass._dependency_attrs)
+        service = self.MockService1()
+        instance = TargetClass(**{TargetClass._dependency_attrs[self.MockService1]: service})
+        self.assertIs(instance.get_dependency(self.MockService1), service)
+
     def test_no_deps(self):
         TargetClass = self.targetClass
         injectable_extension(TargetClass)(ExtensionModule)
@@ -0,0 +1,97 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+from pbd_di import ITransientDependency, IScopedDependency, DisposeException
+from pbd_di import Container, ISingletonDependency
+from pbd_di.disposal import dispose_instances
+from pbd_di.resolution_plan import ResolutionPlan
+
+
+class TestDisposeInstances(unittest.IsolatedAsyncioTestCase):
+
+    async def test_dependents_closed_before_dependencies(self):
+        closed = []
+
+        class Leaf(IScopedDependency):
+            async def close(self):
+                closed.append("leaf")
+
+        class Middle(ITransientDependency):
+            _deps = [Leaf]
+
+        class Root(IScopedDependency):
+            _deps = [Middle]
+
+            def close(self):
+                closed.append("root")
+
+        # 即使传入顺序与依赖顺序相反，也先关闭 Root
+        leaf, root = ResolutionPlan.of(Leaf), ResolutionPlan.of(Root)
+        await dispose_instances({leaf.name: Leaf(), root.name: Root()}, plans={leaf.name: leaf, root.name: root})
+        self.assertEqual(closed, ["root", "leaf"])
+
+    async def test_factory_product_closed_after_dependents(self):
+        Container._instance = None
+        container = Container()
+        closed = []
+
+        class Connection:
+            def close(self):
+                closed.append("connection")
+
+        IConnection = type('IConnection', (), {})
+        container.register_factory(IConnection, Connection)
+        self.addCleanup(container.unregister, IConnection)
+
+        class Repository(ISingletonDependency):
+            _deps = [IConnection]
+
+            def close(self):
+                closed.append("repository")
+
+        await container.get(Repository)
+        # 工厂产品的类型不是注册的类型，依赖关系来自容器记录的解析计划
+        await container.shutdown()
+        self.assertEqual(closed, ["repository", "connection"])
+
+    async def test_independent_instances_closed_concurrently(self):
+        a_started = asyncio.Event()
+        b_started = asyncio.Event()
+
+        class ServiceA(IScopedDependency):
+            async def close(self):
+                a_started.set()
+                await b_started.wait()
+
+        class ServiceB(IScopedDependency):
+            async def close(self):
+                b_started.set()
+                await a_started.wait()
+
+        # 如果串行关闭，这里会超时
+        await asyncio.wait_for(dispose_instances({"a": ServiceA(), "b": ServiceB()}), timeout=1)
+
+    async def test_errors_are_aggregated(self):
+        failing = MagicMock()
+        failing.close = MagicMock(side_effect=ValueError("boom"))
+        ok = MagicMock()
+        ok.close = MagicMock()
+
+        with self.assertRaises(DisposeException) as context:
+            await dispose_instances({"failing": failing, "ok": ok})
+        ok.close.assert_called_once()
+        self.assertEqual(context.exception.code, "Dispose exception")
+        self.assertEqual(context.exception.data, {"errors": {"failing": "boom"}})
+        self.assertIsInstance(context.exception.inner_exception, ValueError)
+
+    async def test_timeout(self):
+        class SlowService(IScopedDependency):
+            async def close(self):
+                await asyncio.sleep(10)
+
+        with self.assertRaises(DisposeException) as context:
+            await dispose_instances({"slow": SlowService()}, timeout=0.01)
+        self.assertIsInstance(context.exception.errors[0][1], TimeoutError)
+
+    async def test_instances_without_close(self):
+        await dispose_instances({"a": object(), "b": MagicMock(close=None)})
@@ -0,0 +1,141 @@
+import unittest
+from pbd_di import (
+    Container, ISingletonDependency, IReplaceableInterface, register_when, replace_service,
+    RegistryFrozenException
+)
+from pbd_di import environment
+from pbd_di.resolution_plan import ResolutionPlan
+
+
+class TestEnvironmentRegistrations(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        Container._instance = None
+        self.container = Container()
+        # setUp 中的类在每个测试里同名，清空单例缓存避免命中上一个测试的实例
+        self.container._singletons.clear()
+        saved = list(environment._registrations)
+        self.addCleanup(environment._registrations.__setitem__, slice(None), saved)
+        self.addCleanup(ResolutionPlan.thaw)
+        # 构建后创建的单例在解除冻结后会被视为过期，不能留给其他测试
+        self.addCleanup(self.container._singletons.clear)
+
+        class IStore(ISingletonDependency, IReplaceableInterface):
+            pass
+
+        @register_when(IStore, environments=["development", "test"])
+        class MemoryStore(IStore):
+            pass
+
+        @register_when(IStore, environments=["production"])
+        class DatabaseStore(IStore):
+            pass
+
+        @register_when(IStore, environments=["production"], features=["cache"])
+        class CachedDatabaseStore(IStore):
+            pass
+
+        class UnconditionalStore(IStore):
+            pass
+
+        self.IStore = IStore
+        self.MemoryStore = MemoryStore
+        self.DatabaseStore = DatabaseStore
+        self.CachedDatabaseStore = CachedDatabaseStore
+        self.UnconditionalStore = UnconditionalStore
+
+    async def test_build_selects_by_environment(self):
+        self.container.build("development")
+        self.assertEqual(self.container.environment, "development")
+        self.assertIsInstance(await self.container.get(self.IStore), self.MemoryStore)
+        stores = await self.container.get_all(self.IStore)
+        self.assertEqual([type(store) for store in stores], [self.MemoryStore, self.UnconditionalStore])
+
+    async def test_build_selects_by_feature(self):
+        self.container.build("production")
+        self.assertIsInstance(await self.container.get(self.IStore), self.DatabaseStore)
+        # 重新构建前清空单例缓存，否则已创建的 DatabaseStore 会被视为过期
+        ResolutionPlan.thaw()
+        self.container._singletons.clear()
+        self.container.build("production", features=["cache"])
+        self.assertIsInstance(await self.container.get(self.IStore), self.CachedDatabaseStore)
+
+    async def test_build_with_condition(self):
+        IFlag = type('IFlag', (ISingletonDependency, IReplaceableInterface), {})
+        Enabled = register_when(IFlag, condition=lambda env, features: env.startswith("prod"))(
+            type('Enabled', (IFlag,), {})
+        )
+        Disabled = type('Disabled', (IFlag,), {})
+        self.container.build("staging")
+        self.assertIsInstance(await self.container.get(IFlag), Disabled)
+        ResolutionPlan.thaw()
+        self.container._singletons.clear()
+        self.container.build("production")
+        self.assertIsInstance(await self.container.get(IFlag), Enabled)
+
+    async def test_build_refuses_stale_singleton(self):
+        before = await self.container.get(self.IStore)
+        self.assertIsInstance(before, self.UnconditionalStore)
+        with self.assertRaises(RuntimeError):
+            self.container.build("test")
+        self.assertFalse(ResolutionPlan.is_frozen())
+        self.assertIs(await self.container.get(self.IStore), before)
+
+    async def test_build_refuses_dependent_singleton_in_child(self):
+        StoreUser = type('StoreUser', (ISingletonDependency,), {'_deps': [self.IStore]})
+        child = self.container.create_child()
+        await child.get(StoreUser)
+        # 依赖方只存在于子容器中，接口的实现本身没有被缓存在根容器
+        self.container._singletons.clear()
+        with self.assertRaises(RuntimeError):
+            self.container.build("test")
+        await child.shutdown()
+
+    async def test_build_refuses_stale_singleton_after_invalidate(self):
+        StoreUser = type('StoreUser', (ISingletonDependency,), {'_deps': [self.IStore]})
+        user = await self.container.get(StoreUser)
+        # 定义无关的接口实现会清空计划缓存，检查不能依赖缓存中的计划
+        IOther = type('IOther', (ISingletonDependency, IReplaceableInterface), {})
+        type('Other', (IOther,), {})
+        with self.assertRaises(RuntimeError):
+            self.container.build("production")
+        self.assertFalse(ResolutionPlan.is_frozen())
+        self.assertIs(await self.container.get(StoreUser), user)
+
+    async def test_build_allows_unaffected_singletons(self):
+        Unrelated = type('Unrelated', (ISingletonDependency,), {})
+        await self.container.get(Unrelated)
+        child = self.container.create_child()
+        self.container.build("test")
+        self.assertEqual(child.environment, "test")
+
+    async def test_excluded_default_implementation(self):
+        IConfigStore = type('IConfigStore', (ISingletonDependency, IReplaceableInterface), {})
+        DefaultStore = type('DefaultStore', (IConfigStore,), {})
+        DatabaseStore = register_when(IConfigStore, environments=["production"])(
+            type('DatabaseStore', (IConfigStore,), {})
+        )
+        self.assertIs(ResolutionPlan.of(IConfigStore).target, DatabaseStore)
+        self.container.build("development")
+        self.assertIsInstance(await self.container.get(IConfigStore), DefaultStore)
+        stores = await self.container.get_all(IConfigStore)
+        self.assertEqual([type(store) for store in stores], [DefaultStore])
+
+    async def test_new_implementation_after_build(self):
+        self.container.build("test")
+        with self.assertRaises(RegistryFrozenException):
+            type('LateStore', (self.IStore,), {})
+        self.assertIsInstance(await self.container.get(self.IStore), self.MemoryStore)
+
+    async def test_frozen_registry(self):
+        self.container.build("test")
+        with self.assertRaises(RegistryFrozenException):
+            replace_service(self.DatabaseStore, self.IStore)
+        with self.assertRaises(RegistryFrozenException):
+            self.container.register_instance(self.IStore, self.DatabaseStore())
+        with self.assertRaises(RegistryFrozenException):
+            self.container.build("production")
+
+    def test_build_on_child(self):
+        with self.assertRaises(RuntimeError):
+            self.container.create_child().build("test")
@@ -1,6 +1,6 @@
 import unittest
 from unittest.mock import MagicMock
-from pbd_di import IDependencyBase, ISingletonDependency, ITransientDependency, IScopedDependency,IReplaceableInterface, IServiceProvider, DependencyNotFoundException
+from pbd_di import IDependencyBase, ISingletonDependency, ITransientDependency, IScopedDependency,IReplaceableInterface, IServiceProvider, DependencyNotFoundException, get_default_dependency_name
 
 class TestIReplaceableInterface(unittest.TestCase):
     def test_is_interface_direct_inheritance(self):
@@ -163,6 +163,33 @@ class TestDependencyBase(unittest.TestCase):
             instance = TestClass()
             instance.get_dependency(TestDependency)      
 
+    def test_dependency_attrs_precomputed(self):
+        TestDependency = type('TestDependency', (), {'__module__': 'pbd_di.test_dependencybase'})
+
+        class TestClass(IDependencyBase):
+            _deps = [TestDependency]
+
+        class DerivedClass(TestClass):
+            pass
+
+        name = get_default_dependency_name(TestDependency)
+        self.assertEqual(TestClass._dependency_attrs, {TestDependency: name})
+        self.assertEqual(DerivedClass._dependency_attrs, {TestDependency: name})
+        self.assertIsNot(DerivedClass._dependency_attrs, TestClass._dependency_attrs)
+
+    def test_get_dependency_registers_manual_attribute(self):
+        TestDependency = type('TestDependency', (), {'__module__': 'pbd_di.test_dependencybase'})
+
+        class TestClass(IDependencyBase):
+            pass
+
+        dependency = TestDependency()
+        instance = TestClass(**{get_default_dependency_name(TestDependency): dependency})
+        self.assertIs(instance.get_dependency(TestDependency), dependency)
+        self.assertIn(TestDependency, TestClass._dependency_attrs)
+        with self.assertRaises(DependencyNotFoundException):
+            TestClass().get_dependency(TestDependency)
+
 class TestSingletonDependency(unittest.TestCase):
     def test_init_subclass_sets_scope_to_singleton(self):
         class Derived(ISingletonDependency):
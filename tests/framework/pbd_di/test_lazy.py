@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+from pbd_di import (
+    Container, Lazy, LazyProxy, ISingletonDependency, IScopedDependency, ITransientDependency,
+    LazyResolutionException, get_default_dependency_name
+)
+from pbd_di.validation import DependencyGraphValidator
+
+
+class TestLazy(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        Container._instance = None
+        self.container = Container()
+
+    def test_lazy_dependency_name(self):
+        Dep = type('Dep', (ITransientDependency,), {})
+        self.assertEqual(Lazy[Dep], Lazy[Dep])
+        self.assertEqual(get_default_dependency_name(Lazy[Dep]), get_default_dependency_name(Dep))
+
+    async def test_lazy_dependency_resolved_on_await(self):
+        created = []
+        Dep = type('Dep', (ITransientDependency,), {'initialize': lambda self: created.append(self)})
+        Service = type('Service', (ITransientDependency,), {'_deps': [Lazy[Dep]]})
+
+        service = await self.container.get(Service)
+        proxy = service.get_dependency(Dep)
+        self.assertIsInstance(proxy, LazyProxy)
+        self.assertFalse(proxy.resolved)
+        self.assertEqual(created, [])
+
+        instance = await proxy
+        self.assertIsInstance(instance, Dep)
+        self.assertIs(await proxy, instance)
+        self.assertEqual(created, [instance])
+
+    async def test_lazy_dependency_attribute_access(self):
+        Dep = type('LazyAttributeDep', (ISingletonDependency,), {'value': 1})
+        Service = type('Service', (ITransientDependency,), {'_deps': [Lazy[Dep]]})
+
+        service = await self.container.get(Service)
+        proxy = service.get_dependency(Dep)
+        with self.assertRaises(LazyResolutionException):
+            proxy.value
+        self.assertFalse(proxy.resolved)
+        self.assertIs(await proxy.resolve(), await self.container.get(Dep))
+        self.assertEqual(proxy.value, 1)
+        proxy.value = 2
+        self.assertEqual((await self.container.get(Dep)).value, 2)
+
+    async def test_lazy_dependency_uses_creation_scope(self):
+        Dep = type('LazyScopedDep', (IScopedDependency,), {})
+        Service = type('Service', (ITransientDependency,), {'_deps': [Lazy[Dep]]})
+
+        async with self.container.scope():
+            proxy = (await self.container.get(Service)).get_dependency(Dep)
+            expected = await self.container.get(Dep)
+            async with self.container.scope():
+                # 在另一个作用域中首次使用，仍解析到创建代理时的作用域实例
+                self.assertIs(await proxy, expected)
+
+        async with self.container.scope():
+            late = (await self.container.get(Service)).get_dependency(Dep)
+        with self.assertRaises(RuntimeError):
+            await late
+
+    async def test_lazy_dependency_breaks_cycle(self):
+        class ServiceA(ITransientDependency):
+            pass
+
+        class ServiceB(ITransientDependency):
+            _deps = [ServiceA]
+
+        ServiceA.deps = {get_default_dependency_name(ServiceB): Lazy[ServiceB]}
+
+        service = await self.container.get(ServiceA)
+        dep = await service.get_dependency(ServiceB)
+        self.assertIsInstance(dep, ServiceB)
+        self.assertEqual(DependencyGraphValidator([ServiceA]).validate(), [])
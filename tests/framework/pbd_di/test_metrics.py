@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import MagicMock
+from pbd_di import ResolutionMetrics, ResolutionEvent
+from pbd_di.metrics import LatencyHistogram
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_observe(self):
+        histogram = LatencyHistogram((0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 4)
+        self.assertEqual(snapshot["max"], 3.0)
+        self.assertEqual(snapshot["buckets"], {"0.1": 1, "1.0": 2, "+inf": 1})
+
+
+class TestResolutionMetrics(unittest.TestCase):
+
+    def test_scope_hit_ratio(self):
+        metrics = ResolutionMetrics()
+        metrics.record_resolve("a", "singleton", 0.01, lambda: ["a"])
+        metrics.record_hit("a", "singleton")
+        metrics.record_hit("a", "singleton")
+        metrics.record_resolve("b", "transient", 0.01, lambda: ["b"])
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["scopes"]["singleton"], {"hits": 2, "misses": 1, "hit_ratio": 2 / 3})
+        self.assertEqual(snapshot["scopes"]["transient"]["hit_ratio"], 0.0)
+        self.assertEqual(snapshot["types"]["a"]["resolutions"], 3)
+        self.assertEqual(snapshot["types"]["a"]["hits"], 2)
+
+    def test_slowest_paths(self):
+        metrics = ResolutionMetrics(slowest_size=2)
+        path = MagicMock(return_value=["fast"])
+        metrics.record_resolve("fast", "transient", 0.001, path)
+        metrics.record_resolve("slow", "transient", 0.1, lambda: ["root", "slow"])
+        metrics.record_resolve("slower", "transient", 0.2, lambda: ["slower"])
+        metrics.record_resolve("fastest", "transient", 0.0001, path)
+
+        self.assertEqual(metrics.snapshot()["slowest"], [
+            {"path": ["slower"], "duration": 0.2},
+            {"path": ["root", "slow"], "duration": 0.1},
+        ])
+        # 未进入最慢列表时不计算路径
+        path.assert_called_once()
+
+    def test_hooks(self):
+        metrics = ResolutionMetrics()
+        hook = MagicMock()
+        failing_hook = MagicMock(side_effect=ValueError("boom"))
+        metrics.add_hook(failing_hook)
+        metrics.add_hook(hook)
+        metrics.record_construct("a", "transient", 0.5)
+        hook.assert_called_once_with(ResolutionEvent("construct", "a", "transient", 0.5))
+
+        metrics.remove_hook(hook)
+        metrics.record_initialize("a", "transient", 0.5)
+        hook.assert_called_once()
+
+    def test_reset(self):
+        metrics = ResolutionMetrics()
+        metrics.record_hit("a", "scoped")
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), {"types": {}, "scopes": {}, "slowest": []})
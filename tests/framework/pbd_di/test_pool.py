@@ -0,0 +1,100 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from pbd_di import DisposeException
+from pbd_di.pool import ObjectPool
+
+
+class TestObjectPool(unittest.IsolatedAsyncioTestCase):
+
+    async def test_reuse_after_release(self):
+        pool = ObjectPool("test", max_size=2)
+        factory = AsyncMock(side_effect=lambda: MagicMock())
+        instance = await pool.acquire(factory)
+        await pool.release(instance)
+        self.assertIs(await pool.acquire(factory), instance)
+        factory.assert_awaited_once()
+        self.assertEqual(pool.size, 1)
+
+    async def test_release_calls_reset(self):
+        pool = ObjectPool("test")
+        instance = MagicMock()
+        instance.reset = AsyncMock()
+        await pool.release(await pool.acquire(AsyncMock(return_value=instance)))
+        instance.reset.assert_awaited_once()
+        self.assertEqual(pool.idle_count, 1)
+
+    async def test_failed_reset_discards_instance(self):
+        pool = ObjectPool("test")
+        instance = MagicMock()
+        instance.reset = MagicMock(side_effect=ValueError("boom"))
+        instance.close = MagicMock()
+        await pool.release(await pool.acquire(AsyncMock(return_value=instance)))
+        instance.close.assert_called_once()
+        self.assertEqual(pool.size, 0)
+        self.assertEqual(pool.idle_count, 0)
+
+    async def test_max_size_waits_for_release(self):
+        pool = ObjectPool("test", max_size=1)
+        factory = AsyncMock(side_effect=lambda: MagicMock())
+        instance = await pool.acquire(factory)
+        waiter = asyncio.create_task(pool.acquire(factory))
+        await asyncio.sleep(0.01)
+        self.assertFalse(waiter.done())
+        await pool.release(instance)
+        self.assertIs(await asyncio.wait_for(waiter, timeout=1), instance)
+        factory.assert_awaited_once()
+
+    async def test_failed_factory_releases_slot(self):
+        pool = ObjectPool("test", max_size=1)
+        with self.assertRaises(ValueError):
+            await pool.acquire(AsyncMock(side_effect=ValueError("boom")))
+        instance = await asyncio.wait_for(pool.acquire(AsyncMock(return_value="ok")), timeout=1)
+        self.assertEqual(instance, "ok")
+
+    async def test_idle_eviction_keeps_min_size(self):
+        pool = ObjectPool("test", min_size=1, max_size=3, idle_timeout=0)
+        instances = [MagicMock(close=MagicMock()) for _ in range(3)]
+        factory = AsyncMock(side_effect=instances)
+        acquired = [await pool.acquire(factory) for _ in range(3)]
+        for instance in acquired:
+            await pool.release(instance)
+        self.assertEqual(pool.size, 1)
+        self.assertEqual(pool.idle_count, 1)
+        self.assertEqual(sum(instance.close.call_count for instance in instances), 2)
+
+    async def test_close(self):
+        pool = ObjectPool("test")
+        instance = MagicMock()
+        instance.close = MagicMock(side_effect=ValueError("boom"))
+        await pool.release(await pool.acquire(AsyncMock(return_value=instance)))
+        with self.assertRaises(DisposeException):
+            await pool.close()
+        self.assertEqual(pool.size, 0)
+
+    async def test_cancelled_reset_releases_slot(self):
+        pool = ObjectPool("test", max_size=1)
+        instance = MagicMock()
+        instance.reset = AsyncMock(side_effect=asyncio.CancelledError())
+        await pool.acquire(AsyncMock(return_value=instance))
+        with self.assertRaises(asyncio.CancelledError):
+            await pool.release(instance)
+        self.assertEqual(pool.size, 0)
+        self.assertEqual(pool.idle_count, 0)
+        # 名额已释放，可以再次借出
+        await asyncio.wait_for(pool.acquire(AsyncMock(return_value=MagicMock())), 1)
+
+    async def test_release_after_close(self):
+        pool = ObjectPool("test")
+        instance = MagicMock()
+        await pool.acquire(AsyncMock(return_value=instance))
+        await pool.close()
+        await pool.release(instance)
+        instance.close.assert_called_once()
+        instance.reset.assert_not_called()
+        self.assertEqual(pool.size, 0)
+        self.assertEqual(pool.idle_count, 0)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            ObjectPool("test", min_size=2, max_size=1)
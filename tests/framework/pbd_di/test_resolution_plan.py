@@ -0,0 +1,123 @@
+import unittest
+from pbd_di import ISingletonDependency, ITransientDependency, IScopedDependency, IReplaceableInterface, replace_service, injectable_extension
+from pbd_di.resolution_plan import ResolutionPlan
+
+
+class TestResolutionPlan(unittest.TestCase):
+
+    def setUp(self):
+        ResolutionPlan.invalidate()
+
+    def test_plan_is_cached(self):
+        Service = type('Service', (ITransientDependency,), {})
+        plan = ResolutionPlan.of(Service)
+        self.assertIs(ResolutionPlan.of(Service), plan)
+        self.assertEqual(plan.name, f"{Service.__module__}.{Service.__qualname__}")
+        self.assertEqual(plan.scope, 'transient')
+
+    def test_plan_compiles_dependencies(self):
+        Dep = type('Dep', (ISingletonDependency,), {})
+
+        class Service(ITransientDependency):
+            _deps = [Dep]
+
+        plan = ResolutionPlan.of(Service)
+        self.assertEqual(len(plan.dependencies), 1)
+        name, dep_plan = plan.dependencies[0]
+        self.assertIn(name, Service.deps)
+        self.assertIs(dep_plan, ResolutionPlan.of(Dep))
+
+    def test_plan_resolves_implementation(self):
+        class IService(ITransientDependency, IReplaceableInterface):
+            pass
+
+        class Service(IService):
+            pass
+
+        plan = ResolutionPlan.of(IService)
+        self.assertIs(plan.target, Service)
+        self.assertIs(plan, ResolutionPlan.of(Service))
+
+    def test_plan_detects_initialize_mode(self):
+        class SyncService(ITransientDependency):
+            def initialize(self):
+                pass
+
+        class AsyncService(ITransientDependency):
+            async def initialize(self):
+                pass
+
+        self.assertFalse(ResolutionPlan.of(SyncService).initialize_is_async)
+        self.assertTrue(ResolutionPlan.of(AsyncService).initialize_is_async)
+        self.assertIsNone(ResolutionPlan.of(ITransientDependency).initialize)
+
+    def test_plan_with_circular_dependencies(self):
+        class Service1:
+            _di_scope = 'singleton'
+            deps = {}
+
+        class Service2:
+            _di_scope = 'singleton'
+            deps = {}
+
+        Service1.deps = {'service2': Service2}
+        Service2.deps = {'service1': Service1}
+        plan = ResolutionPlan.of(Service1)
+        self.assertIs(plan.dependencies[0][1].dependencies[0][1], plan)
+
+    def test_replace_service_invalidates(self):
+        Service = type('Service', (ITransientDependency,), {})
+        Replacement = type('Replacement', (ITransientDependency,), {})
+        self.assertIs(ResolutionPlan.of(Service).target, Service)
+        replace_service(Replacement, Service)
+        self.assertIs(ResolutionPlan.of(Service).target, Replacement)
+
+    def test_injectable_extension_invalidates(self):
+        Service = type('Service', (ITransientDependency,), {})
+        Dep = type('Dep', (ITransientDependency,), {})
+        self.assertEqual(ResolutionPlan.of(Service).dependencies, ())
+
+        class Extension:
+            pass
+
+        injectable_extension(Service, [Dep])(Extension)
+        self.assertEqual(len(ResolutionPlan.of(Service).dependencies), 1)
+
+    def test_is_stale(self):
+        class Service(ITransientDependency):
+            pass
+
+        plan = ResolutionPlan.of(Service)
+        self.assertFalse(plan.is_stale())
+        Service.initialize = lambda self: None
+        self.assertTrue(plan.is_stale())
+        self.assertFalse(ResolutionPlan.recompile(Service).is_stale())
+
+    def test_dependency_batches(self):
+        Shared = type('Shared', (IScopedDependency,), {})
+        Independent = type('Independent', (ITransientDependency,), {})
+
+        class First(ITransientDependency):
+            _deps = [Shared]
+
+        class Second(ITransientDependency):
+            _deps = [Shared]
+
+        class Service(ITransientDependency):
+            _deps = [Independent, First, Second]
+
+        batches = ResolutionPlan.of(Service).dependency_batches()
+        # Second 与 First 共享作用域依赖，必须放在下一批次
+        self.assertEqual([[plan.target for _, plan in batch] for batch in batches], [[Independent, First], [Second]])
+
+    def test_dependency_batches_split_on_edges(self):
+        Leaf = type('Leaf', (ITransientDependency,), {})
+
+        class Middle(ITransientDependency):
+            _deps = [Leaf]
+
+        class Service(ITransientDependency):
+            _deps = [Leaf, Middle]
+
+        batches = ResolutionPlan.of(Service).dependency_batches()
+        self.assertEqual(len(batches), 2)
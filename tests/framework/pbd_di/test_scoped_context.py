@@ -1,7 +1,9 @@
 import unittest
 import asyncio
+from contextvars import copy_context
 from unittest.mock import AsyncMock, MagicMock
 from pbd_di.scoped_context import ScopedContext
+from pbd_di import DisposeException
 
 
 class TestScopedContext(unittest.IsolatedAsyncioTestCase):
@@ -77,4 +79,68 @@ class TestScopedContext(unittest.IsolatedAsyncioTestCase):
                 scoped_context.set("test_key2", mock_instance2)
                 self.assertIsNone(scoped_context.get("test_key1"))
         mock_instance1.close.assert_awaited_once()
-        mock_instance2.close.assert_called_once()
\ No newline at end of file
+        mock_instance2.close.assert_called_once()
+
+    async def test_merge_child_context(self):
+        scoped_context = ScopedContext()
+        # 不在作用域内时，子上下文创建独立的存储，需要合并回来
+        context = copy_context()
+        context.run(scoped_context.set, "test_key", "value")
+        self.assertIsNone(scoped_context.get("test_key"))
+        scoped_context.merge(context)
+        self.assertEqual(scoped_context.get("test_key"), "value")
+
+        # 作用域内子上下文共享同一存储，合并不产生变化
+        async with scoped_context.scope():
+            context = copy_context()
+            context.run(scoped_context.set, "test_key2", "value2")
+            self.assertEqual(scoped_context.get("test_key2"), "value2")
+            scoped_context.merge(context)
+            self.assertEqual(scoped_context.get("test_key2"), "value2")
+
+    async def test_child_task_shares_scope(self):
+        scoped_context = ScopedContext()
+
+        async def create():
+            scoped_context.set("test_key", "value")
+
+        async with scoped_context.scope():
+            await asyncio.create_task(create())
+            self.assertEqual(scoped_context.get("test_key"), "value")
+
+    async def test_concurrent_scopes_are_isolated(self):
+        scoped_context = ScopedContext()
+        ready = asyncio.Event()
+
+        async def worker(value):
+            async with scoped_context.scope():
+                scoped_context.set("test_key", value)
+                await ready.wait()
+                return scoped_context.get("test_key")
+
+        tasks = [asyncio.create_task(worker(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        ready.set()
+        self.assertEqual(await asyncio.gather(*tasks), [0, 1, 2])
+        self.assertIsNone(scoped_context.get("test_key"))
+
+    async def test_set_outside_scope(self):
+        scoped_context = ScopedContext()
+        scoped_context.set("test_key", "value")
+        self.assertEqual(scoped_context.get("test_key"), "value")
+        async with scoped_context.scope():
+            self.assertIsNone(scoped_context.get("test_key"))
+        self.assertEqual(scoped_context.get("test_key"), "value")
+
+    async def test_close_errors_do_not_abort_cleanup(self):
+        scoped_context = ScopedContext()
+        mock_instance1 = MagicMock()
+        mock_instance1.close = AsyncMock(side_effect=ValueError("boom"))
+        mock_instance2 = MagicMock()
+        mock_instance2.close = AsyncMock()
+        with self.assertRaises(DisposeException):
+            async with scoped_context.scope():
+                scoped_context.set("test_key1", mock_instance1)
+                scoped_context.set("test_key2", mock_instance2)
+        mock_instance2.close.assert_awaited_once()
+        self.assertIsNone(scoped_context.get("test_key1"))
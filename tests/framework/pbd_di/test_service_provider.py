@@ -54,3 +54,24 @@ class TestServiceProvider(unittest.IsolatedAsyncioTestCase):
 
             self.assertTrue("Invalid service type" in str(context.exception))
 
+    async def test_get_many(self):
+        with patch('pbd_di.service_provider.Container') as mock_container:
+            mock_container_instance = AsyncMock()
+            mock_container.return_value = mock_container_instance
+            mock_container_instance.get_many.return_value = ["a", "b"]
+
+            result = await self.service_provider.get_many(int, str)
+
+            self.assertEqual(result, ["a", "b"])
+            mock_container_instance.get_many.assert_awaited_once_with(int, str)
+
+    async def test_get_all(self):
+        with patch('pbd_di.service_provider.Container') as mock_container:
+            mock_container_instance = AsyncMock()
+            mock_container.return_value = mock_container_instance
+            mock_container_instance.get_all.return_value = ["a", "b"]
+
+            result = await self.service_provider.get_all(int)
+
+            self.assertEqual(result, ["a", "b"])
+            mock_container_instance.get_all.assert_awaited_once_with(int)
@@ -0,0 +1,130 @@
+import threading
+import unittest
+from pbd_di import Container, ISingletonDependency, RestoreException
+from pbd_di.resolution_plan import ResolutionPlan
+
+restore_calls = []
+
+
+class SnapshotSettings(ISingletonDependency):
+    initialize_calls = 0
+
+    def initialize(self):
+        type(self).initialize_calls += 1
+        self.values = {"culture": "zh-CN"}
+
+    def on_restore(self):
+        restore_calls.append("settings")
+
+
+class SnapshotConsumer(ISingletonDependency):
+    _deps = [SnapshotSettings]
+
+    async def on_restore(self):
+        restore_calls.append("consumer")
+
+
+class SnapshotLocked(ISingletonDependency):
+
+    def initialize(self):
+        self.lock = threading.Lock()
+
+
+class SnapshotOptOut(ISingletonDependency):
+    _di_snapshot = False
+
+
+class SnapshotOptOutUser(ISingletonDependency):
+    _deps = [SnapshotOptOut]
+
+
+class SnapshotBroken(ISingletonDependency):
+
+    def on_restore(self):
+        raise OSError("无法打开资源")
+
+
+class TestContainerSnapshot(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        Container._instance = None
+        self.container = Container()
+        restore_calls.clear()
+        self.names = [ResolutionPlan.of(t).name for t in (SnapshotSettings, SnapshotConsumer, SnapshotLocked, SnapshotOptOut, SnapshotBroken, SnapshotOptOutUser)]
+        self._clear()
+        self.addCleanup(self._clear)
+
+    def _clear(self):
+        for name in self.names:
+            self.container._singletons.pop(name, None)
+
+    async def test_snapshot_and_restore(self):
+        container = self.container
+        consumer = await container.get(SnapshotConsumer)
+        await container.get(SnapshotLocked)
+        await container.get(SnapshotOptOut)
+        data = container.snapshot()
+
+        # 模拟新启动的工作进程
+        self._clear()
+        calls = SnapshotSettings.initialize_calls
+        restored = await container.restore(data)
+
+        self.assertEqual(sorted(restored), sorted(self.names[:2]))
+        settings = await container.get(SnapshotSettings)
+        restored_consumer = await container.get(SnapshotConsumer)
+        self.assertIsNot(restored_consumer, consumer)
+        self.assertIs(restored_consumer.get_dependency(SnapshotSettings), settings)
+        self.assertEqual(settings.values, {"culture": "zh-CN"})
+        self.assertEqual(SnapshotSettings.initialize_calls, calls)
+        self.assertEqual(restore_calls, ["settings", "consumer"])
+        # 未写入快照的单例按需重新创建
+        self.assertIsInstance(await container.get(SnapshotLocked), SnapshotLocked)
+
+    async def test_restore_keeps_existing(self):
+        container = self.container
+        await container.get(SnapshotSettings)
+        data = container.snapshot()
+        existing = await container.get(SnapshotSettings)
+        self.assertEqual(await container.restore(data), [])
+        self.assertIs(await container.get(SnapshotSettings), existing)
+
+    async def test_restore_links_existing_singletons(self):
+        container = self.container
+        await container.get(SnapshotConsumer)
+        data = container.snapshot()
+        self._clear()
+        settings = await container.get(SnapshotSettings)
+        self.assertEqual(await container.restore(data), [self.names[1]])
+        # 引用连接到容器中已存在的单例，而不是快照中的副本
+        self.assertIs((await container.get(SnapshotConsumer)).get_dependency(SnapshotSettings), settings)
+
+    async def test_reference_to_skipped_singleton(self):
+        container = self.container
+        await container.get(SnapshotOptOutUser)
+        data = container.snapshot()
+
+        self._clear()
+        self.assertEqual(await container.restore(data), [])
+        user = await container.get(SnapshotOptOutUser)
+        self.assertIs(user.get_dependency(SnapshotOptOut), await container.get(SnapshotOptOut))
+
+        self._clear()
+        opt_out = await container.get(SnapshotOptOut)
+        self.assertEqual(await container.restore(data), [self.names[5]])
+        self.assertIs((await container.get(SnapshotOptOutUser)).get_dependency(SnapshotOptOut), opt_out)
+
+    async def test_restore_hook_failure(self):
+        container = self.container
+        await container.get(SnapshotBroken)
+        data = container.snapshot()
+        self._clear()
+        with self.assertRaises(RestoreException) as context:
+            await container.restore(data)
+        self.assertIsInstance(context.exception.errors[0][1], OSError)
+        self.assertNotIn(self.names[4], container._singletons)
+
+    async def test_invalid_snapshot(self):
+        import pickle
+        with self.assertRaises(ValueError):
+            await self.container.restore(pickle.dumps({"singletons": {}}))
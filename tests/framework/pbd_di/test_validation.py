@@ -0,0 +1,79 @@
+import unittest
+from abc import ABC, abstractmethod
+from pbd_di import ISingletonDependency, ITransientDependency, IScopedDependency, IPooledDependency, IReplaceableInterface
+from pbd_di.validation import DependencyGraphValidator, get_registered_dependencies
+
+
+class TestDependencyGraphValidator(unittest.TestCase):
+
+    def test_valid_graph(self):
+        Leaf = type('Leaf', (ISingletonDependency,), {})
+
+        class Service(ITransientDependency):
+            _deps = [Leaf]
+
+        validator = DependencyGraphValidator([Service])
+        self.assertEqual(validator.validate(), [])
+        self.assertEqual([plan.target for plan in validator.singletons()], [Leaf])
+
+    def test_missing_dependency(self):
+        class NotInjectable:
+            pass
+
+        class IAbstract(ISingletonDependency, IReplaceableInterface, ABC):
+            @abstractmethod
+            def run(self):
+                pass
+
+        class Service(ITransientDependency):
+            _deps = [NotInjectable, IAbstract]
+
+        errors = DependencyGraphValidator([Service]).validate()
+        self.assertEqual(len(errors), 2)
+        self.assertIn("NotInjectable 的作用域 None", errors[0])
+        self.assertIn("IAbstract 没有可实例化的实现", errors[1])
+
+    def test_cycle_reported_once_with_path(self):
+        Service1 = type('Service1', (ITransientDependency,), {})
+        Service2 = type('Service2', (ITransientDependency,), {})
+        Service3 = type('Service3', (ITransientDependency,), {})
+        Service1.deps = {'service2': Service2}
+        Service2.deps = {'service3': Service3}
+        Service3.deps = {'service1': Service1}
+
+        errors = DependencyGraphValidator([Service1, Service2]).validate()
+        names = [f"{cls.__module__}.{cls.__qualname__}" for cls in (Service1, Service2, Service3, Service1)]
+        self.assertEqual(errors, [f"检查到循环依赖： {' -> '.join(names)}"])
+
+    def test_singleton_depending_on_scoped(self):
+        Scoped = type('Scoped', (IScopedDependency,), {})
+
+        class Middle(ITransientDependency):
+            _deps = [Scoped]
+
+        class Singleton(ISingletonDependency):
+            _deps = [Middle]
+
+        errors = DependencyGraphValidator([Singleton]).validate()
+        self.assertEqual(len(errors), 1)
+        self.assertIn("Singleton", errors[0])
+        self.assertIn("Middle -> ", errors[0])
+        self.assertTrue(errors[0].endswith("Scoped"))
+
+    def test_pooled_captive_dependencies(self):
+        Scoped = type('Scoped', (IScopedDependency,), {})
+        Pooled = type('Pooled', (IPooledDependency,), {'_deps': [Scoped]})
+        Singleton = type('Singleton', (ISingletonDependency,), {'_deps': [Pooled]})
+
+        errors = DependencyGraphValidator([Singleton]).validate()
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(errors[0].startswith("单例"))
+        self.assertTrue(errors[1].startswith("池化实例"))
+
+    def test_registered_dependencies(self):
+        class RegisteredService(ITransientDependency):
+            pass
+
+        registered = get_registered_dependencies()
+        self.assertIn(RegisteredService, registered)
+        self.assertNotIn(ITransientDependency, registered)